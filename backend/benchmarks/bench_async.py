@@ -0,0 +1,184 @@
+"""Latency and throughput under many concurrent clients.
+
+Starts uvicorn on --backend-dir (default: this backend) and opens --clients
+keep-alive connections that send requests back to back for --duration seconds,
+drawn from a mix of what a room of players does: game polls (the play
+screen's fields, revalidated by ETag), category and song picks, fuzzy-scored
+lyric attempts and the odd new song. Prints req/s and p50/p99 latency per
+endpoint. To compare with an earlier revision, export it and point
+--backend-dir at it:
+    git archive <rev> backend | tar -x -C /tmp/prev
+    python benchmarks/bench_async.py --backend-dir /tmp/prev/backend
+Run from the backend directory:
+    python benchmarks/bench_async.py [--clients 300] [--duration 10] [--backend memory]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from common import HOST, percentile, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the play screen polls, revalidating with If-None-Match like the browser does
+PLAY_FIELDS = "id,name,players,categories,played_categories,current_round,current_player," \
+              "players_played_this_round,state,scores,version"
+WORDS = "soleil chanson danse lumière amour nuit étoile rêve matin voyage".split()
+
+
+def make_lrc(rng, n_lines=40):
+    return "\n".join(f"[{i // 20:02d}:{i * 3 % 60:02d}.00]" + " ".join(rng.choice(WORDS) for _ in range(6))
+                     for i in range(n_lines))
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection(HOST, port, timeout=60)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def setup(port, n_games, n_songs, rng):
+    """Games in fuzzy scoring mode; returns (game_id, players, [(song_id, answer words)])"""
+    games = []
+    for g in range(n_games):
+        players = [f"player {i}" for i in range(8)]
+        songs = [{"title": f"Song {i}", "category": f"Cat {i % 5}", "youtube_url": "", "spotify_id": "",
+                  "lrc": make_lrc(rng), "hidden_line_indices": [10, 11]} for i in range(n_songs)]
+        _, game = request(port, "POST", "/games", {"name": f"load {g}", "player_names": players, "songs": songs,
+                                                   "scoring_mode": "fuzzy"})
+        request(port, "POST", f"/games/{game['id']}/start")
+        picks = []
+        for song_id, song in game["songs"].items():
+            lines = song.get("lyrics") or []
+            words = " ".join(line["text"] for line in lines[10:12]).split() if lines else []
+            picks.append((int(song_id), words))
+        games.append((game["id"], players, picks))
+    return games
+
+
+def next_request(rng, games):
+    """(endpoint label, method, path, body)"""
+    game_id, players, picks = rng.choice(games)
+    kind = rng.random()
+    if kind < 0.40:
+        return "GET /games/{id}", "GET", f"/games/{game_id}?fields={PLAY_FIELDS}", None
+    if kind < 0.55:
+        return "GET /games/{id}/categories", "GET", f"/games/{game_id}/categories", None
+    if kind < 0.65:
+        return "POST select_category", "POST", f"/games/{game_id}/select_category", {"category": "Cat 1"}
+    if kind < 0.75:
+        song_id, _ = rng.choice(picks)
+        return "POST select_song", "POST", f"/games/{game_id}/select_song", {"song_id": song_id}
+    if kind < 0.97:
+        song_id, words = rng.choice(picks)
+        # Mostly typos, so fuzzy matching has edit distances to compute
+        attempt = [w[:-1] + "x" if rng.random() < 0.5 else w for w in words]
+        return "POST attempt_lyrics", "POST", f"/games/{game_id}/attempt_lyrics", {
+            "song_id": song_id, "attempt": attempt, "player": rng.choice(players)}
+    song = {"title": "new", "category": "Cat 0", "youtube_url": "", "spotify_id": "", "lrc": make_lrc(rng, 200),
+            "hidden_line_indices": [3]}
+    return "POST /games/{id}/songs", "POST", f"/games/{game_id}/songs", song
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    length = 0
+    etag = None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"etag":
+            etag = value.strip().decode()
+    await reader.readexactly(length)
+    return status, etag
+
+
+async def client(port, seed, games, deadline, latencies, statuses):
+    rng = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        while time.perf_counter() < deadline:
+            label, method, path, body = next_request(rng, games)
+            payload = json.dumps(body).encode() if body is not None else b""
+            revalidate = f"If-None-Match: {etags[path]}\r\n" if path in etags else ""
+            head = (f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+                    f"{revalidate}Content-Length: {len(payload)}\r\n\r\n").encode()
+            start = time.perf_counter()
+            writer.write(head + payload)
+            status, etag = await read_response(reader)
+            if etag is not None:
+                etags[path] = etag
+            latencies[label].append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def load(port, clients, duration, games):
+    latencies = defaultdict(list)
+    statuses = defaultdict(int)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, i, games, start + duration, latencies, statuses) for i in range(clients)))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--games", type=int, default=4)
+    parser.add_argument("--songs", type=int, default=50)
+    parser.add_argument("--backend", default="memory", help="STORAGE_BACKEND of the server")
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help="backend to serve (e.g. an exported older revision)")
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log", "--backlog", str(max(2048, args.clients * 2))],
+        cwd=args.backend_dir,
+        env=dict(os.environ, STORAGE_BACKEND=args.backend, STORAGE_DIR=tempfile.mkdtemp(prefix="load-")),
+    )
+    try:
+        wait_until_up(args.port)
+        games = setup(args.port, args.games, args.songs, random.Random(0))
+        elapsed, latencies, statuses = asyncio.run(load(args.port, args.clients, args.duration, games))
+    finally:
+        server.terminate()
+        server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} clients for {elapsed:.1f} s against {args.backend_dir} ({args.backend} store): "
+          f"{total} requests, {total / elapsed:.0f} req/s")
+    print(f"statuses: {dict(statuses)}")
+    print(f"{'endpoint':<30} {'requests':>9} {'p50':>9} {'p99':>9}")
+    everything = [value for values in latencies.values() for value in values]
+    for label, values in sorted(latencies.items()) + [("all", everything)]:
+        print(f"{label:<30} {len(values):>9} {percentile(values, 50) * 1000:>6.1f} ms "
+              f"{percentile(values, 99) * 1000:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
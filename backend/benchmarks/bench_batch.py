@@ -0,0 +1,125 @@
+"""Per-turn latency of one request per command vs POST /games/{id}/batch.
+
+A full turn is select_category, select_song, attempt_lyrics, complete_category,
+next_player and a GET of the play screen's fields: six requests, or one batch
+returning the same fields. The end of a turn (what the play screen sends once
+the player has answered) is attempt_lyrics, complete_category and next_player:
+three requests or one batch. Requests go through httpx to the ASGI app,
+in-process with the in-memory store, so the times are the server's share;
+--rtt adds a network round trip per request on top. The flows take turns on
+games of their own; finished games are replaced.
+Run from the backend directory:
+    python benchmarks/bench_batch.py [--turns 2000] [--rtt 30]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+
+PLAY_FIELDS = "id,name,players,categories,played_categories,current_round,current_player," \
+              "players_played_this_round,state,scores,version"
+
+
+class Table:
+    """A game being played, and what each turn needs to know about it"""
+
+    def __init__(self, http, categories):
+        self.http = http
+        self.categories = categories
+
+    async def open(self):
+        songs = [{"title": f"Chanson {i}", "category": f"Catégorie {i % self.categories}", "youtube_url": "",
+                  "spotify_id": "", "lrc": "\n".join(f"[00:{j:02d}.00]ligne {j} de la chanson {i}" for j in range(40)),
+                  "hidden_line_indices": [10, 11]} for i in range(self.categories * 3)]
+        game = (await self.http.post("/games", json={"name": "bench", "player_names": ["a", "b", "c"],
+                                                      "songs": songs})).json()
+        self.game_id = game["id"]
+        self.answers = {int(song_id): " ".join(line["text"] for line in song["lyrics"][10:12]).split()
+                        for song_id, song in game["songs"].items()}
+        self.left = list(game["categories"])
+        self.player = (await self.http.post(f"/games/{self.game_id}/start")).json()["current_player"]
+
+    def commands(self):
+        category = self.left.pop()
+        song_id = next(iter(self.answers))
+        return category, song_id, [
+            {"op": "select_category", "category": category},
+            {"op": "select_song", "song_id": song_id},
+            {"op": "attempt_lyrics", "song_id": song_id, "attempt": self.answers[song_id], "player": self.player},
+            {"op": "complete_category", "category": category},
+            {"op": "next_player"},
+        ]
+
+    def advance(self, turn):
+        self.player = turn.get("current_player")
+
+    async def requests(self, full):
+        path = f"/games/{self.game_id}"
+        category, song_id, commands = self.commands()
+        if full:
+            await self.http.post(f"{path}/select_category", json={"category": category})
+            await self.http.post(f"{path}/select_song", json={"song_id": song_id})
+        await self.http.post(f"{path}/attempt_lyrics", json={k: v for k, v in commands[2].items() if k != "op"})
+        await self.http.post(f"{path}/complete_category", json={"category": category})
+        self.advance((await self.http.post(f"{path}/next_player")).json())
+        if full:
+            await self.http.get(path, params={"fields": PLAY_FIELDS})
+        return 6 if full else 3
+
+    async def batch(self, full):
+        _, _, commands = self.commands()
+        response = await self.http.post(f"/games/{self.game_id}/batch", params={"fields": PLAY_FIELDS},
+                                        json={"commands": commands if full else commands[2:]})
+        self.advance(response.json()["results"][-1])
+        return 1
+
+
+async def run(args):
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    flows = [(f"{scope} turn, {label}", full, method)
+             for scope, full in (("full", True), ("end of", False))
+             for label, method in (("requests", Table.requests), ("batch", Table.batch))]
+    tables = {}
+    timings = {name: [] for name, _, _ in flows}
+    requests = {}
+    for turn in range(args.turns + args.turns // 10):
+        for name, full, method in flows:
+            table = tables.get(name)
+            if table is None or not table.left or table.player is None:
+                table = tables[name] = Table(http, args.categories)
+                await table.open()
+            start = time.perf_counter()
+            requests[name] = await method(table, full)
+            if turn >= args.turns // 10:  # the first tenth warms up
+                timings[name].append(time.perf_counter() - start)
+    await http.aclose()
+
+    print(f"{args.turns} turns per flow, 3 players; with {args.rtt:g} ms per round trip")
+    print(f"{'flow':<26} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'with rtt':>9}")
+    for name, samples in timings.items():
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1000
+        p95 = samples[int(len(samples) * 0.95)] * 1000
+        print(f"{name:<26} {requests[name]:>8} {p50:>8.2f} {p95:>8.2f} {p50 + requests[name] * args.rtt:>9.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=30, help="turns per game, before it is replaced")
+    parser.add_argument("--rtt", type=float, default=30.0, help="network round trip per request, in ms")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
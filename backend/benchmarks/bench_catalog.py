@@ -0,0 +1,169 @@
+"""Editing a large game's catalog, as the song manager does: move, rename
+and delete songs one request at a time, then the same edits as batches.
+
+"before" replays the previous category bookkeeping (rebuild the category's
+song_ids list on every move/delete, scan every song on rename), "index" the
+current one through Game.catalog(); both end each edit with save_game() as the
+endpoints do. The batches call the endpoint functions. Everything runs
+in-process with the in-memory store, so HTTP and disk are left out. Use
+--categories 1 for the worst case of one large category.
+Run from the backend directory:
+    python benchmarks/bench_catalog.py [--songs 5000] [--categories 20] [--edits 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import main  # noqa: E402
+
+LRC = "\n".join(f"[00:{i:02d}.00]ligne {i}" for i in range(30))
+
+
+def make_game(n_songs, n_categories):
+    songs = [main.SongCreate(title=f"Song {i}", category=f"Cat {i % n_categories}", youtube_url="", spotify_id="",
+                             lrc=LRC, hidden_line_indices=[3]) for i in range(n_songs)]
+    main.commit_game(main.GameCreate(name="bench", player_names=["a"], songs=songs))
+    return main.games[max(main.games)]
+
+
+def legacy_move(game, song_id, category):
+    old_category = game.songs[song_id].category
+    game.songs[song_id].category = category
+    if old_category != category:
+        game.categories[old_category].song_ids = [
+            sid for sid in game.categories[old_category].song_ids if sid != song_id
+        ]
+        if not game.categories[old_category].song_ids:
+            del game.categories[old_category]
+        if category not in game.categories:
+            game.categories[category] = main.Category(name=category, song_ids=[])
+        game.categories[category].song_ids.append(song_id)
+
+
+def legacy_delete(game, song_id):
+    category = game.songs.pop(song_id).category
+    game.categories[category].song_ids = [sid for sid in game.categories[category].song_ids if sid != song_id]
+    if not game.categories[category].song_ids:
+        del game.categories[category]
+
+
+def legacy_rename(game, old, new):
+    game.categories[new] = game.categories.pop(old)
+    for song in game.songs.values():
+        if song.category == old:
+            song.category = new
+
+
+def legacy_by_category(game, name):
+    return [game.songs[sid] for sid in game.categories[name].song_ids if sid in game.songs]
+
+
+def index_move(game, song_id, category):
+    game.songs[song_id].category = category
+    game.catalog().move(song_id, category)
+
+
+def index_delete(game, song_id):
+    del game.songs[song_id]
+    game.catalog().remove(song_id)
+
+
+def index_rename(game, old, new):
+    for song_id in game.catalog().rename(old, new):
+        game.songs[song_id].category = new
+
+
+def index_by_category(game, name):
+    return [game.songs[sid] for sid in game.catalog().song_ids(name)]
+
+
+def save(game):
+    main.save_game(game, "categories")
+
+
+def workflow(game, edits, n_categories, move, delete, rename, by_category):
+    """Per-request edits; returns seconds per phase"""
+    rng = random.Random(1)
+    ids = list(game.songs)
+    rng.shuffle(ids)
+    timings = {}
+
+    start = time.perf_counter()
+    for song_id in ids[:edits]:
+        move(game, song_id, f"Cat {rng.randrange(n_categories)}")
+        save(game)
+    timings["move"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(n_categories):
+        by_category(game, f"Cat {i}")
+    timings["list categories"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(max(1, n_categories // 2)):
+        rename(game, f"Cat {i}", f"Renamed {i}")
+        save(game)
+    timings["rename"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for song_id in ids[edits:2 * edits]:
+        delete(game, song_id)
+        save(game)
+    timings["delete"] = time.perf_counter() - start
+    return timings
+
+
+def indexed_workflow(game, edits, n_categories):
+    start = time.perf_counter()
+    game.catalog()
+    build = time.perf_counter() - start
+    timings = workflow(game, edits, n_categories, index_move, index_delete, index_rename, index_by_category)
+    timings["build index (once per load)"] = build
+    return timings
+
+
+def batches(game, edits, n_categories):
+    rng = random.Random(1)
+    ids = list(game.songs)
+    rng.shuffle(ids)
+    timings = {}
+
+    start = time.perf_counter()
+    patch = main.SongsPatch(songs=[main.SongPatch(id=song_id, category=f"Cat {rng.randrange(n_categories)}")
+                                   for song_id in ids[:edits]])
+    main.update_songs_in_game(game.id, patch)
+    timings["move"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main.delete_songs_from_game(game.id, main.SongIds(song_ids=ids[edits:2 * edits]))
+    timings["delete"] = time.perf_counter() - start
+    return timings
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=1000)
+    args = parser.parse_args()
+
+    legacy = workflow(make_game(args.songs, args.categories), args.edits, args.categories,
+                      legacy_move, legacy_delete, legacy_rename, legacy_by_category)
+    indexed = indexed_workflow(make_game(args.songs, args.categories), args.edits, args.categories)
+    batched = batches(make_game(args.songs, args.categories), args.edits, args.categories)
+
+    print(f"{args.songs} songs in {args.categories} categories, {args.edits} moves and {args.edits} deletes")
+    print(f"{'':<28} {'before':>10} {'index':>10} {'one batch':>10}")
+    for phase in indexed:
+        before = f"{legacy[phase] * 1000:>7.1f} ms" if phase in legacy else f"{'':>10}"
+        batch = f"{batched[phase] * 1000:>7.1f} ms" if phase in batched else f"{'':>10}"
+        print(f"{phase:<28} {before} {indexed[phase] * 1000:>7.1f} ms {batch}")
+
+
+if __name__ == "__main__":
+    main_()
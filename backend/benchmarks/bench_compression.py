@@ -0,0 +1,67 @@
+"""Bandwidth and latency of catalog reads: uncompressed, compressed, and
+revalidated with If-None-Match.
+
+Builds a library and a game of --songs songs in-process and reads each
+catalog endpoint through the app. "first" compresses the body, "repeat" takes
+it from the precompressed cache, "304" is a client revalidating its copy.
+Transfer times assume a --mbps link, where the bytes matter more than the
+server time.
+Run from the backend directory:
+    python benchmarks/bench_compression.py [--songs 300] [--lines 60] [--mbps 20]
+"""
+import argparse
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import compression  # noqa: E402
+import main  # noqa: E402
+from common import best_of  # noqa: E402
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=60)
+    parser.add_argument("--mbps", type=float, default=20.0, help="client bandwidth for the transfer estimate")
+    args = parser.parse_args()
+
+    client = TestClient(main.app)
+    songs = []
+    for i in range(args.songs):
+        lrc = "\n".join(f"[{j // 60:02d}:{j % 60:02d}.00]chanson {i} : voilà la ligne {j}, on chante encore"
+                        for j in range(args.lines))
+        songs.append({"title": f"Chanson {i}", "category": f"Catégorie {i % 12}", "youtube_url": "https://youtu.be/x",
+                      "spotify_id": "x", "lrc": lrc, "hidden_line_indices": [10, 11]})
+    game_id = client.post("/games", json={"name": "bench", "player_names": ["a", "b"], "songs": songs}).json()["id"]
+
+    paths = ["/songs", "/songs?fields=id,title,category", "/categories", f"/games/{game_id}/songs",
+             f"/games/{game_id}/categories", f"/games/{game_id}"]
+    encodings = ["identity"] + compression.ENCODINGS
+    print(f"{args.songs} songs of {args.lines} lines; transfer at {args.mbps:g} Mbit/s; "
+          f"min size {compression.MIN_SIZE} B")
+    print(f"{'read':<36} {'encoding':<9} {'bytes':>10} {'first ms':>9} {'repeat ms':>10} {'transfer ms':>12}")
+    for path in paths:
+        for encoding in encodings:
+            headers = {"Accept-Encoding": encoding}
+            main.precompressed = compression.CompressedCache()
+            first, response = best_of(lambda: client.get(path, headers=headers), repeat=1)
+            repeat, response = best_of(lambda: client.get(path, headers=headers))
+            size = response.num_bytes_downloaded
+            transfer = size * 8 / (args.mbps * 1e6)
+            print(f"{path:<36} {response.headers.get('content-encoding', 'identity'):<9} {size:>10} "
+                  f"{first * 1000:>9.2f} {repeat * 1000:>10.2f} {transfer * 1000:>12.1f}")
+        etag = response.headers["etag"]
+        revalidate, response = best_of(lambda: client.get(path, headers={"If-None-Match": etag}))
+        print(f"{path:<36} {'304':<9} {response.num_bytes_downloaded:>10} {'':>9} {revalidate * 1000:>10.2f} "
+              f"{0:>12.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+"""Cost of the hidden line difficulty analysis, and of suggestions on a large library.
+
+Fills the library with --songs synthetic songs (words drawn from a Zipf-like
+vocabulary, as in bench_search.py), then times the per-line analysis of a
+song (done once per content when it is parsed), a cached analysis, and
+GET /games/{id}/songs/{song_id}/hidden_lines through the app. Word rarity
+comes from the library's search index, kept current one song at a time; the
+baseline recounts, for every request, the library songs holding each word
+of the song, which is what the suggestions would cost without it.
+Run from the backend directory:
+    python benchmarks/bench_difficulty.py [--songs 20000] [--lines 30] [--requests 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench_search import vocabulary  # noqa: E402
+from common import percentile, timings  # noqa: E402
+from difficulty import AnalysisCache, analyze, score_lines  # noqa: E402
+from search import terms  # noqa: E402
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    words = vocabulary(rng)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    for i in range(args.songs):
+        lrc = "\n".join(f"[{j * 3 // 60:02d}:{j * 3 % 60:02d}.00]"
+                        f"{' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(3, 10)))}"
+                        for j in range(args.lines))
+        main.create_library_song(main.SongCreate(title=f"Chanson {i}", category=f"Catégorie {i % 20}",
+                                                 youtube_url="", spotify_id="", lrc=lrc, hidden_line_indices=[0]))
+    start = time.perf_counter()
+    index = main.library_search_index()
+    print(f"{args.songs} songs of {args.lines} lines; word frequencies (search index) built in "
+          f"{time.perf_counter() - start:.1f} s, then kept current as songs are added")
+
+    sample = [main.songs[song_id] for song_id in rng.sample(list(main.songs), args.requests)]
+    rows = [("analysis (once per content)", timings(lambda: analyze(rng.choice(sample).lyrics), args.requests))]
+    cache = AnalysisCache()
+    for song in sample:
+        cache.get(song.lrc, song.lyrics)
+    rows.append(("analysis, cached", timings(lambda: cache.get(rng.choice(sample).lrc), args.requests)))
+    rows.append(("scoring, index frequencies", timings(
+        lambda: score_lines(cache.get(rng.choice(sample).lrc), index.frequency, len(index)), args.requests)))
+
+    client = TestClient(main.app)
+    game = client.post("/games", json={"name": "bench", "player_names": ["a"],
+                                       "song_ids": [song.id for song in sample]}).json()
+    game_songs = list(game["songs"])
+    rows.append(("GET .../hidden_lines", timings(lambda: client.get(
+        f"/games/{game['id']}/songs/{rng.choice(game_songs)}/hidden_lines",
+        params={"difficulty": "hard", "count": 2}), args.requests)))
+
+    library = [(song.id, set(terms(song.title + "\n" + "\n".join(song.lyrics.texts())))) for song in
+               main.songs.values()]
+
+    def recount():
+        analysis = cache.get(rng.choice(sample).lrc)
+        needed = {term for line in analysis.terms for term in line}
+        counts = dict.fromkeys(needed, 0)
+        for _, song_terms in library:
+            for term in needed & song_terms:
+                counts[term] += 1
+        score_lines(analysis, counts.get, len(library))
+    rows.append(("scoring, recounted per request", timings(recount, max(5, args.requests // 20))))
+
+    print(f"{'step':<34} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, samples in rows:
+        print(f"{label:<34} {percentile(samples, 50) * 1000:>8.3f} {percentile(samples, 95) * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""Bytes and latency per state change: SSE push vs. the POST + GET /games/{id} refetch.
+
+Starts uvicorn (in-memory store), creates a game with --songs songs, then
+calls next_player repeatedly. The push path times from sending the POST to
+receiving the matching event on an open /games/{id}/events stream; the
+refetch path times the POST plus the full GET the frontend does today.
+Run from the backend directory:
+    python benchmarks/bench_events.py [--songs 200] [--changes 200]
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from common import HOST, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LRC = "\n".join(f"[{i // 60:02d}:{i % 60:02d}.00]ligne numero {i} de la chanson" for i in range(60))
+
+
+def request(conn, method, path, body=None):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return json.loads(data), len(data)
+
+
+def read_events(port, game_id, received: "queue.Queue"):
+    conn = http.client.HTTPConnection(HOST, port)
+    conn.request("GET", f"/games/{game_id}/events")
+    response = conn.getresponse()
+    frame = b""
+    while True:
+        line = response.readline()
+        if not line:
+            return
+        frame += line
+        if line == b"\n":
+            if not frame.startswith(b":"):
+                received.put((time.perf_counter(), len(frame)))
+            frame = b""
+
+
+def summarize(label, latencies, sizes):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<22} {statistics.mean(sizes):>10.0f} B {statistics.median(latencies) * 1000:>8.2f} ms "
+          f"{p99 * 1000:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=dict(os.environ, STORAGE_BACKEND="memory"),
+    )
+    try:
+        wait_until_up(args.port)
+        conn = http.client.HTTPConnection(HOST, args.port)
+        songs = [{"title": f"Song {i}", "category": f"Cat {i % 10}", "youtube_url": "", "spotify_id": "",
+                  "lrc": LRC, "hidden_line_indices": [10, 11]} for i in range(args.songs)]
+        game, _ = request(conn, "POST", "/games", {"name": "bench", "player_names": ["a", "b", "c", "d"],
+                                                   "songs": songs})
+        game_id = game["id"]
+        request(conn, "POST", f"/games/{game_id}/start")
+
+        received = queue.Queue()
+        threading.Thread(target=read_events, args=(args.port, game_id, received), daemon=True).start()
+        time.sleep(0.5)
+
+        push_latency, push_bytes = [], []
+        for _ in range(args.changes):
+            start = time.perf_counter()
+            request(conn, "POST", f"/games/{game_id}/next_player")
+            arrived, size = received.get(timeout=5)
+            push_latency.append(arrived - start)
+            push_bytes.append(size)
+
+        refetch_latency, refetch_bytes = [], []
+        for _ in range(args.changes):
+            start = time.perf_counter()
+            request(conn, "POST", f"/games/{game_id}/next_player")
+            _, size = request(conn, "GET", f"/games/{game_id}")
+            refetch_latency.append(time.perf_counter() - start)
+            refetch_bytes.append(size)
+
+        print(f"game with {args.songs} songs, {args.changes} state changes each")
+        print(f"{'':<22} {'bytes/change':>12} {'p50':>11} {'p99':>11}")
+        summarize("SSE event", push_latency, push_bytes)
+        summarize("POST + GET refetch", refetch_latency, refetch_bytes)
+    finally:
+        server.terminate()
+        try:
+            # uvicorn waits for the open event stream during a graceful shutdown
+            server.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Songs/sec for bulk import: streamed NDJSON and a zip of .lrc files vs one
+POST /games/{id}/songs per song, plus the server's peak memory.
+
+Starts uvicorn (in-memory store) once per IMPORT_WORKERS setting. The NDJSON
+body is generated on the fly and sent chunked, so neither side holds it whole.
+Run from the backend directory:
+    python benchmarks/bench_import.py [--songs 20000] [--workers 1,4]
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+from common import HOST, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LRC = "\n".join(f"[{i // 60:02d}:{i % 60:02d}.00]ligne numéro {i} de la chanson" for i in range(60))
+
+
+def song(i):
+    return {"title": f"Song {i}", "category": f"Cat {i % 50}", "youtube_url": "", "spotify_id": "",
+            "lrc": LRC, "hidden_line_indices": [10, 11]}
+
+
+def request(conn, method, path, body=None, headers=None):
+    if isinstance(body, dict):
+        body = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"}
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def peak_rss_mb(pid):
+    """VmHWM of the server and its pool workers (Linux only)"""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+        for p in pids:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+    except (OSError, StopIteration):
+        return float("nan")
+    return total / 1024
+
+
+def ndjson_body(n):
+    """Yield the NDJSON body in ~64 KB chunks"""
+    chunk = []
+    size = 0
+    for i in range(n):
+        line = json.dumps(song(i)).encode() + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size > 65536:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def zip_body(n):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(n):
+            archive.writestr(f"Cat {i % 50}/Song {i}.lrc", f"[ti:Song {i}]\n{LRC}")
+    return buffer.getvalue()
+
+
+def run(port, workers, n, single):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=dict(os.environ, STORAGE_BACKEND="memory", IMPORT_WORKERS=str(workers)),
+    )
+    try:
+        wait_until_up(port)
+        conn = http.client.HTTPConnection(HOST, port, timeout=600)
+        results = {}
+
+        _, game = request(conn, "POST", "/games", {"name": "bench", "player_names": ["a"]})
+        start = time.perf_counter()
+        _, summary = request(conn, "POST", f"/games/{game['id']}/songs/import", ndjson_body(n),
+                             {"Content-Type": "application/x-ndjson"})
+        results["ndjson"] = (summary["imported"], time.perf_counter() - start)
+
+        body = zip_body(n)
+        _, game = request(conn, "POST", "/games", {"name": "bench", "player_names": ["a"]})
+        start = time.perf_counter()
+        _, summary = request(conn, "POST", f"/games/{game['id']}/songs/import?format=zip", body)
+        results["zip"] = (summary["imported"], time.perf_counter() - start)
+
+        if single:
+            _, game = request(conn, "POST", "/games", {"name": "bench", "player_names": ["a"]})
+            start = time.perf_counter()
+            for i in range(single):
+                request(conn, "POST", f"/games/{game['id']}/songs", song(i))
+            results["one POST per song"] = (single, time.perf_counter() - start)
+
+        rss = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"IMPORT_WORKERS={workers} (peak RSS {rss:.0f} MB)")
+    for label, (count, elapsed) in results.items():
+        print(f"  {label:<18} {count:>7} songs {elapsed:>8.2f} s {count / elapsed:>9.0f} songs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="comma-separated IMPORT_WORKERS values")
+    parser.add_argument("--single", type=int, default=2000, help="songs for the one-request-per-song baseline")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    print(f"{args.songs} songs of {LRC.count(chr(10)) + 1} lines, {os.cpu_count()} CPU(s)")
+    for workers in dict.fromkeys(int(w) for w in args.workers.split(",")):
+        run(args.port, workers, args.songs, args.single)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""GET /games/{id} and GET /games/{id}/songs on a large game: the stdlib
+encoder vs orjson, and payloads rebuilt from scratch vs stitched from each
+song's cached bytes.
+
+The game changes between reads (a score update), so its per-version memo
+never hits: every read serializes the game again, as it does while a game is
+being played. "cold" drops the songs' cached bytes too.
+Run from the backend directory:
+    python benchmarks/bench_json.py [--songs 1000] [--lines 60]
+"""
+import argparse
+import json
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from common import best_of  # noqa: E402
+
+
+def stdlib_json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=60)
+    args = parser.parse_args()
+    if main.orjson is None:
+        sys.exit("orjson is not installed")
+
+    lrc = "\n".join(f"[{i // 60:02d}:{i % 60:02d}.00]voilà la ligne numéro {i} de cette chanson" for i in range(args.lines))
+    client = TestClient(main.app)
+    songs = [{"title": f"Chanson {i}", "category": f"Catégorie {i % 20}", "youtube_url": "https://youtu.be/x",
+              "spotify_id": "x", "lrc": lrc, "hidden_line_indices": [10, 11]} for i in range(args.songs)]
+    game_id = client.post("/games", json={"name": "bench", "player_names": ["a", "b"], "songs": songs}).json()["id"]
+    game = main.games[game_id]
+
+    def changed():
+        game.scores["a"] += 1
+        main.save_game(game, "scores")
+
+    def drop_song_bytes():
+        for song in game.songs.values():
+            song._json = None
+
+    def rebuilt(encode):
+        changed()
+        return encode(main.game_payload(game))
+
+    def stitched(cold):
+        changed()
+        if cold:
+            drop_song_bytes()
+        return main.game_json(game)[1]
+
+    def http_game():
+        changed()
+        return client.get(f"/games/{game_id}").content
+
+    expected = stdlib_json(main.game_payload(game))
+    assert main.encode_game(game) == expected, "stitched body differs from the stdlib one"
+    cases = [
+        ("GET /games/{id}  stdlib json", lambda: rebuilt(stdlib_json)),
+        ("                 orjson", lambda: rebuilt(main.orjson.dumps)),
+        ("                 stitched, cold", lambda: stitched(True)),
+        ("                 stitched", lambda: stitched(False)),
+        ("                 over HTTP", http_game),
+        ("GET /games/{id}/songs  stdlib json",
+         lambda: stdlib_json([main.song_payload(s) for s in game.songs.values()])),
+        ("                       stitched",
+         lambda: main.json_array([main.song_json(s) for s in game.songs.values()])),
+    ]
+    print(f"game with {args.songs} songs of {args.lines} lines, {len(expected) / 1e6:.1f} MB")
+    print(f"{'read':<40} {'ms':>8}")
+    for label, fn in cases:
+        elapsed, _ = best_of(fn)
+        print(f"{label:<40} {elapsed * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+"""Read latency of the leaderboard and stats endpoints as finished games pile up,
+vs summing every game's scores on each read.
+
+Plays --games games of 3 players drawn from --players names, one round of 3
+categories each (every turn a batch: select_category, attempt_lyrics with a
+random share of the words right, complete_category, next_player), and at each
+checkpoint (500 games, then doubling) times GET /leaderboard (first page and
+one in the middle), GET /players/{username}/stats and
+GET /categories/{name}/stats through the app. The scan is the best case
+without running totals: summing game.scores over the in-memory games, then
+sorting, with no HTTP around it.
+Run from the backend directory:
+    python benchmarks/bench_leaderboard.py [--games 4000] [--players 2000] [--reads 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from common import async_timings, percentile  # noqa: E402
+
+CATEGORIES = 3
+
+
+def scan_leaderboard():
+    totals = {}
+    for game in main.games.values():
+        for username, points in game.scores.items():
+            totals[username] = totals.get(username, 0) + points
+    return sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:20]
+
+
+async def play(http, rng, names, songs):
+    game = (await http.post("/games", json={"name": "bench", "player_names": rng.sample(names, 3),
+                                            "song_ids": [song.id for song in songs]})).json()
+    path = f"/games/{game['id']}"
+    player = (await http.post(f"{path}/start")).json()["current_player"]
+    for category, entry in game["categories"].items():
+        song_id = entry["song_ids"][0]
+        words = game["songs"][str(song_id)]["lyrics"][1]["text"].split()
+        attempt = [word if rng.random() < 0.8 else "?" for word in words]
+        response = await http.post(f"{path}/batch", params={"fields": "state"}, json={"commands": [
+            {"op": "select_category", "category": category},
+            {"op": "attempt_lyrics", "song_id": song_id, "attempt": attempt, "player": player},
+            {"op": "complete_category", "category": category},
+            {"op": "next_player"},
+        ]})
+        player = response.json()["results"][-1].get("current_player")
+
+
+async def run(args):
+    rng = random.Random(1)
+    names = [f"joueur{i}" for i in range(args.players)]
+    library = [main.create_library_song(main.SongCreate(
+        title=f"Chanson {i}", category=f"Catégorie {i}", youtube_url="", spotify_id="",
+        lrc=f"[00:01.00]la ligne visible {i}\n[00:04.00]les mots cachés numéro {i} à trouver",
+        hidden_line_indices=[1])) for i in range(CATEGORIES * 10)]
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+    print(f"{args.players} player names, 3 per game; p50 / p95 ms over {args.reads} reads")
+    print(f"{'games':>6} {'ranked':>7} {'top 20':>13} {'middle page':>13} {'player':>13} {'category':>13} "
+          f"{'scan top 20':>13}")
+    played = 0
+    checkpoint = 500
+    while checkpoint <= args.games:
+        while played < checkpoint:
+            await play(http, rng, names, rng.sample(library, CATEGORIES))
+            played += 1
+        total = int((await http.get("/leaderboard")).headers["x-total-count"])
+        rows = [
+            await async_timings(lambda: http.get("/leaderboard"), args.reads),
+            await async_timings(lambda: http.get("/leaderboard", params={"offset": total // 2}), args.reads),
+            await async_timings(lambda: http.get(f"/players/{rng.choice(names)}/stats"), args.reads),
+            await async_timings(lambda: http.get(f"/categories/Catégorie {rng.randrange(len(library))}/stats"),
+                                args.reads),
+        ]
+
+        async def scan():
+            scan_leaderboard()
+        rows.append(await async_timings(scan, max(5, args.reads // 20)))
+        print(f"{played:>6} {total:>7} " + " ".join(
+            f"{percentile(samples, 50) * 1000:>6.2f}/{percentile(samples, 95) * 1000:<6.2f}" for samples in rows))
+        checkpoint *= 2
+    await http.aclose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=4000)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=200)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
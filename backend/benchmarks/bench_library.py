@@ -0,0 +1,86 @@
+"""Memory for N games playing the same catalog: per-game song copies (as
+create_game did before) vs game songs referencing the shared library.
+
+Measured with tracemalloc in-process, with the in-memory store.
+Run from the backend directory:
+    python benchmarks/bench_library.py [--games 200] [--songs 50]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import main  # noqa: E402
+from lrc import lrc_cache, parse_lrc  # noqa: E402
+
+
+def make_catalog(n_songs, n_lines):
+    return [
+        main.SongCreate(
+            title=f"Song {i}", category=f"Cat {i % 10}", youtube_url="", spotify_id="",
+            lrc="\n".join(f"[{j // 60:02d}:{j % 60:02d}.00]chanson {i} ligne numéro {j} des paroles"
+                          for j in range(n_lines)),
+            hidden_line_indices=[10, 11],
+        )
+        for i in range(n_songs)
+    ]
+
+
+def copies(catalog, n_games):
+    """The previous create_game: a fresh Song with its own lyrics for every game"""
+    games = []
+    song_id = 0
+    for _ in range(n_games):
+        game_songs = {}
+        for song in catalog:
+            song_id += 1
+            game_songs[song_id] = main.Song(id=song_id, lyrics=parse_lrc(song.lrc), **song.dict())
+        games.append(game_songs)
+    return games
+
+
+def references(catalog, n_games):
+    for g in range(n_games):
+        main.commit_game(main.GameCreate(name=f"Game {g}", player_names=["a", "b"], songs=catalog))
+    # create_game's response is cached per game as serialized JSON; that cache is
+    # measured separately below and kept out of the song structures
+    payloads = 0
+    for game in main.games.values():
+        payloads += sum(len(body) for body in game._payload[1].values())
+        game._payload = None
+    return payloads
+
+
+def measure(fn, *args):
+    lrc_cache.clear()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--songs", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=60)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.songs, args.lines)
+    copied, _ = measure(copies, catalog, args.games)
+    shared, payloads = measure(references, catalog, args.games)
+
+    print(f"{args.games} games x {args.songs} songs of {args.lines} lines")
+    print(f"  per-game copies : {copied / 2**20:8.1f} MB")
+    print(f"  library refs    : {shared / 2**20:8.1f} MB  ({len(main.songs)} library songs)")
+    print(f"  ratio           : {copied / shared:8.1f}x")
+    print(f"  (cached GET /games/{{id}} payloads, same either way: {payloads / 2**20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main_()
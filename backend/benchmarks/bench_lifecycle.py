@@ -0,0 +1,86 @@
+"""Memory and lobby cost of finished games, before and after they are archived.
+
+Creates --games games of --songs songs each (read once, as players would),
+finishes all but one in ten, then archives the finished ones the way the
+eviction sweep does after GAME_FINISHED_TTL. Memory is measured with
+tracemalloc, in-process with the in-memory store (its archive is a temporary
+directory). Then, untraced, times the lobby listing (up to 1,000 games, as
+GET /games sent every game before, vs the page of waiting games) and the
+restore of an archived game.
+Run from the backend directory:
+    python benchmarks/bench_lifecycle.py [--games 1000] [--songs 20]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from common import best_of  # noqa: E402
+from storage import EvictionPolicy  # noqa: E402
+
+
+def traced_mb() -> float:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2**20
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--songs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40)
+    args = parser.parse_args()
+
+    client = TestClient(main.app)
+    tracemalloc.start()
+    start_mb = traced_mb()
+    for g in range(args.games):
+        songs = [main.SongCreate(
+            title=f"Chanson {g}-{i}", category=f"Catégorie {i % 5}", youtube_url="", spotify_id="",
+            lrc="\n".join(f"[{j // 60:02d}:{j % 60:02d}.00]partie {g} chanson {i} ligne {j}" for j in range(args.lines)),
+            hidden_line_indices=[10, 11]) for i in range(args.songs)]
+        main.commit_game(main.GameCreate(name=f"Partie {g}", player_names=["a", "b", "c"], songs=songs, seed=g))
+        game_id = max(main.games)
+        client.get(f"/games/{game_id}")
+        if g % 10:
+            game = main.games[game_id]
+            game.state = "finished"
+            main.save_game(game, "state")
+
+    resident_mb = traced_mb() - start_mb
+    main.store.eviction = EvictionPolicy(finished_ttl=1, idle_ttl=0)
+    start = time.perf_counter()
+    archived = main.store.sweep(time.monotonic() + 2)
+    sweep = time.perf_counter() - start
+    archived_mb = traced_mb() - start_mb
+    tracemalloc.stop()
+
+    everything, response = best_of(lambda: client.get("/games?limit=1000"))
+    everything_bytes = len(response.content)
+    lobby, response = best_of(lambda: client.get("/games?state=waiting"))
+    lobby_bytes = len(response.content)
+    restore, _ = best_of(lambda: main.games[archived[0]], repeat=1)
+    read, _ = best_of(lambda: client.get(f"/games/{archived[1]}"), repeat=1)
+    disk = sum(os.path.getsize(os.path.join(main.store.archive_dir, name)) for name in os.listdir(main.store.archive_dir))
+
+    print(f"{args.games} games of {args.songs} songs, {len(archived)} finished")
+    print(f"memory above baseline:    all resident {resident_mb:8.1f} MB   finished archived {archived_mb:8.1f} MB")
+    print(f"archive on disk:          {disk / 2**20:8.1f} MB, swept in {sweep * 1000:.0f} ms")
+    print(f"GET /games?limit=1000:    {everything * 1000:8.2f} ms  {everything_bytes} bytes")
+    print(f"GET /games?state=waiting: {lobby * 1000:8.2f} ms  {lobby_bytes} bytes")
+    print(f"restore an archived game: {restore * 1000:8.2f} ms   first GET of another: {read * 1000:.2f} ms")
+    main.store.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,81 @@
+"""Micro-benchmark: legacy per-request parse_lrc vs the cached single-pass engine.
+
+Run from the backend directory:
+    python benchmarks/bench_lrc.py [--lines 20000] [--repeat 5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import best_of  # noqa: E402
+from lrc import LrcCache, parse_lrc_document  # noqa: E402
+
+
+def legacy_parse_lrc(lrc_content: str):
+    """The original implementation from main.py, kept verbatim for comparison"""
+    lines = lrc_content.split('\n')
+    result = []
+    time_exp = re.compile(r'\[(\d+):(\d+)(?:\.(\d+))?\]')
+
+    for line in lines:
+        match = time_exp.match(line)
+        if match:
+            min_val = int(match.group(1))
+            sec_val = int(match.group(2))
+            ms_val = int(match.group(3).ljust(3, '0')[:3]) if match.group(3) else 0
+            time_ms = min_val * 60 * 1000 + sec_val * 1000 + ms_val
+            text = time_exp.sub('', line).strip()
+            result.append({"time": time_ms, "text": text})
+
+    return result
+
+
+def make_lrc(n_lines: int) -> str:
+    words = ["je", "ne", "regrette", "rien", "la", "vie", "en", "rose", "mon", "amour", "toujours", "encore"]
+    out = ["[ar:Bench]", "[ti:Synthetic]", "[offset:0]"]
+    for i in range(n_lines):
+        t = i * 1500
+        text = " ".join(words[(i + k) % len(words)] for k in range(6))
+        out.append(f"[{t // 60000:02d}:{(t // 1000) % 60:02d}.{(t % 1000) // 10:02d}]{text}")
+    return "\n".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=50, help="same song imported into N games")
+    args = parser.parse_args()
+
+    content = make_lrc(args.lines)
+    print(f"LRC file: {args.lines} lines, {len(content) / 1024:.0f} KiB")
+
+    legacy, _ = best_of(lambda: legacy_parse_lrc(content), args.repeat)
+    single, _ = best_of(lambda: parse_lrc_document(content).as_dicts(), args.repeat)
+    print(f"legacy parse_lrc           {legacy * 1000:8.2f} ms")
+    print(f"single-pass (uncached)     {single * 1000:8.2f} ms  ({legacy / single:.2f}x)")
+
+    cache = LrcCache()
+    cache.get(content)
+    cached, _ = best_of(lambda: cache.get(content).as_dicts(), args.repeat)
+    print(f"cached (hash + copy)       {cached * 1000:8.2f} ms  ({legacy / cached:.2f}x)")
+
+    cache.clear()
+    start = time.perf_counter()
+    for _ in range(args.imports):
+        cache.get(content).as_dicts()
+    cached_total = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.imports):
+        legacy_parse_lrc(content)
+    legacy_total = time.perf_counter() - start
+    print(f"{args.imports} imports of the same song: legacy {legacy_total * 1000:.1f} ms, "
+          f"cached {cached_total * 1000:.1f} ms (hits={cache.hits}, misses={cache.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Memory and serialization speed of Song.lyrics: the previous List[Dict]
+field vs the compact lrc.Lyrics, for a catalog of --songs songs.
+
+Memory is measured with tracemalloc around building the Song models (the lrc
+strings are created beforehand and excluded). Serialization covers the JSON
+the endpoints send (song_payload + encode_json) and pydantic's model_dump_json.
+Run from the backend directory:
+    python benchmarks/bench_lyrics.py [--songs 10000] [--lines 60]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+
+from pydantic import BaseModel  # noqa: E402
+
+import main  # noqa: E402
+from common import best_of  # noqa: E402
+from lrc import lrc_cache, parse_lrc, parse_lyrics  # noqa: E402
+
+WORDS = ["je", "ne", "regrette", "rien", "été", "cœur", "l'âme", "déjà", "toujours", "encore", "où", "amour"]
+
+
+class LegacySong(BaseModel):
+    """Song as it was before, lyrics validated into a list of dicts"""
+    id: int
+    title: str
+    category: str
+    youtube_url: str
+    spotify_id: str
+    lrc: str
+    lyrics: List[Dict]
+    hidden_line_indices: List[int]
+
+
+def make_lrc(i, n_lines):
+    return "\n".join(
+        f"[{j // 60:02d}:{j % 60:02d}.{(i + j) % 100:02d}]" + " ".join(WORDS[(i * 7 + j + k) % len(WORDS)] for k in range(7))
+        for j in range(n_lines)
+    )
+
+
+def build(model, parse, lrcs):
+    return [
+        model(id=i, title=f"Song {i}", category=f"Cat {i % 20}", youtube_url="", spotify_id="", lrc=lrc,
+              lyrics=parse(lrc), hidden_line_indices=[3, 4])
+        for i, lrc in enumerate(lrcs)
+    ]
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    result = fn(*args)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, result
+
+
+def legacy_payload(song):
+    """song_payload() as it was, lyrics passed through as stored"""
+    return {
+        "id": song.id,
+        "title": song.title,
+        "category": song.category,
+        "youtube_url": song.youtube_url,
+        "spotify_id": song.spotify_id,
+        "lrc": song.lrc,
+        "lyrics": song.lyrics,
+        "hidden_line_indices": song.hidden_line_indices
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=60)
+    args = parser.parse_args()
+
+    lrcs = [make_lrc(i, args.lines) for i in range(args.songs)]
+    # The LRC parse cache would otherwise hold every document
+    lrc_cache.maxsize = 0
+
+    legacy_bytes, legacy = measure(build, LegacySong, parse_lrc, lrcs)
+    compact_bytes, compact = measure(build, main.Song, parse_lyrics, lrcs)
+    lines = args.songs * args.lines
+
+    legacy_json = main.encode_json([legacy_payload(s) for s in legacy])
+    compact_json = main.encode_json([main.song_payload(s) for s in compact])
+    assert legacy_json == compact_json.replace(b',"source_id":null', b""), "JSON output differs"
+    assert legacy[0].model_dump_json() == compact[0].model_dump_json(exclude={"source_id"})
+
+    print(f"{args.songs} songs x {args.lines} lines ({lines} lines, {len(compact_json) / 2**20:.1f} MB of JSON)")
+    print(f"{'':<22} {'memory':>10} {'per line':>10} {'endpoint JSON':>14} {'model_dump_json':>16}")
+    for label, size, songs, payload in (("List[Dict] (before)", legacy_bytes, legacy, legacy_payload),
+                                        ("Lyrics (compact)", compact_bytes, compact, main.song_payload)):
+        endpoint, _ = best_of(lambda: main.encode_json([payload(s) for s in songs]), repeat=3)
+        dump, _ = best_of(lambda: [s.model_dump_json() for s in songs], repeat=3)
+        print(f"{label:<22} {size / 2**20:>8.1f} MB {size / lines:>8.0f} B {endpoint * 1000:>11.0f} ms "
+              f"{dump * 1000:>13.0f} ms")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,173 @@
+"""Cost of the metrics middleware and of sampled profiling.
+
+Each configuration runs in its own process (METRICS and PROFILE_* are read at
+import) and calls the ASGI app directly, with no HTTP client in between, so
+the middleware's share of a request isn't diluted by transport costs: this is
+the worst case. Requests are a cheap ETag revalidation (304) and a mix of
+game reads, category picks and song picks. Configurations take turns for
+--repeat rounds, so drifts in machine speed hit them alike; the best round
+counts. Whole-request timings vary by several percent between rounds, more
+than the middleware costs, so it is also timed on its own, around an app that
+does nothing.
+Run from the backend directory:
+    python benchmarks/bench_metrics.py [--requests 20000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = [
+    ("metrics off", {"METRICS": "0"}),
+    ("metrics on", {"METRICS": "1"}),
+    ("profiling 1% over 1 s", {"METRICS": "1", "PROFILE_SLOW_MS": "1000"}),
+]
+
+
+async def call(app, method, path, body=b"", headers=()):
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                         *headers]}
+    received = False
+    status = None
+    etag = None
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, etag
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            etag = dict(message["headers"]).get(b"etag")
+
+    await app(scope, receive, send)
+    return status, etag
+
+
+async def scenario(requests):
+    """Microseconds per request for each workload, after a warm-up run"""
+    import main
+
+    lrc = "\n".join(f"[00:{i:02d}.00]voilà la ligne {i} de la chanson" for i in range(40))
+    songs = [{"title": f"Chanson {i}", "category": f"Catégorie {i % 5}", "youtube_url": "", "spotify_id": "",
+              "lrc": lrc, "hidden_line_indices": [10, 11]} for i in range(50)]
+    body = json.dumps({"name": "bench", "player_names": ["a", "b"], "songs": songs}).encode()
+    await call(main.app, "POST", "/games", body)
+    game_id = max(main.games)
+    await call(main.app, "POST", f"/games/{game_id}/start")
+    song_ids = list(main.games[game_id].songs)
+    play = f"/games/{game_id}?fields=id,players,state,scores,current_player,version"
+    _, etag = await call(main.app, "GET", play)
+
+    async def revalidate(i):
+        return await call(main.app, "GET", play, headers=[(b"if-none-match", etag)])
+
+    async def mix(i):
+        kind = i % 4
+        if kind == 0:
+            return await call(main.app, "GET", play)
+        if kind == 1:
+            return await call(main.app, "GET", f"/games/{game_id}/categories")
+        if kind == 2:
+            return await call(main.app, "POST", f"/games/{game_id}/select_category",
+                              json.dumps({"category": "Catégorie 1"}).encode())
+        return await call(main.app, "POST", f"/games/{game_id}/select_song",
+                          json.dumps({"song_id": song_ids[i % len(song_ids)]}).encode())
+
+    results = {}
+    for label, workload in (("GET 304", revalidate), ("mix", mix)):
+        for i in range(requests // 10):
+            await workload(i)
+        start = time.perf_counter()
+        for i in range(requests):
+            await workload(i)
+        results[label] = (time.perf_counter() - start) / requests * 1e6
+    return results
+
+
+async def middleware_cost(requests):
+    """Microseconds the metrics middleware adds to a request"""
+    from metrics import Metrics, MetricsMiddleware
+
+    class Route:
+        path = "/games/{game_id}"
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"content-length", b"0")], "route": Route()}
+    timings = {}
+    for label, wrapped in (("bare", app), ("metrics", MetricsMiddleware(app, Metrics()))):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await wrapped(scope, None, send)
+            best = min(best, time.perf_counter() - start)
+        timings[label] = best / requests * 1e6
+    return timings["metrics"] - timings["bare"]
+
+
+def child(requests):
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    print(json.dumps(asyncio.run(scenario(requests))))
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.requests)
+        return
+
+    profile_dir = tempfile.mkdtemp(prefix="profiles-")
+    results = {}
+    for _ in range(args.repeat):
+        for label, env in CONFIGS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(args.requests)],
+                env=dict(os.environ, STORAGE_BACKEND="memory", PROFILE_DIR=profile_dir, **env),
+                cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+            ).stdout
+            rounds = json.loads(output.splitlines()[-1])
+            best = results.setdefault(label, rounds)
+            for workload, us in rounds.items():
+                best[workload] = min(best[workload], us)
+
+    baseline = results[CONFIGS[0][0]]
+    print(f"{args.requests} requests per workload, best of {args.repeat}, ASGI app called directly")
+    print(f"{'configuration':<26} " + " ".join(f"{workload + ' us':>12} {'overhead':>9}" for workload in baseline))
+    for label, per_request in results.items():
+        print(f"{label:<26} " + " ".join(
+            f"{us:>12.1f} {(us / baseline[workload] - 1) * 100:>8.1f}%" for workload, us in per_request.items()))
+    sys.path.insert(0, BACKEND_DIR)
+    cost = asyncio.run(middleware_cost(args.requests * 5))
+    print(f"middleware alone: {cost:.1f} us per request, " + ", ".join(
+        f"{cost / us * 100:.1f}% of {workload}" for workload, us in baseline.items()))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,59 @@
+"""Payload size and serialization time of full vs. projected song/game reads.
+
+Builds a game with --songs songs in-process and serializes each read the way
+the endpoints do (cold, i.e. without the per-version memo of GET /games/{id}).
+Run from the backend directory:
+    python benchmarks/bench_projection.py [--songs 500] [--lines 60]
+"""
+import argparse
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from common import best_of  # noqa: E402
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=60)
+    args = parser.parse_args()
+
+    lrc = "\n".join(f"[{i // 60:02d}:{i % 60:02d}.00]voici la ligne numero {i} de cette chanson" for i in range(args.lines))
+    client = TestClient(main.app)
+    songs = [{"title": f"Chanson {i}", "category": f"Categorie {i % 20}", "youtube_url": "https://youtu.be/x",
+              "spotify_id": "x", "lrc": lrc, "hidden_line_indices": [10, 11]} for i in range(args.songs)]
+    game_id = client.post("/games", json={"name": "bench", "player_names": ["a", "b"], "songs": songs}).json()["id"]
+    game = main.games[game_id]
+    summary = main.SONG_SUMMARY_FIELDS
+    play_fields = tuple(f for f in main.GAME_FIELDS if f != "songs")
+
+    cases = [
+        ("GET /games/{id}", lambda: main.encode_json(main.game_payload(game))),
+        ("  ?song_fields=id,title,category", lambda: main.encode_json(main.game_payload(game, None, summary))),
+        ("  ?fields=<all but songs>", lambda: main.encode_json(main.game_payload(game, play_fields))),
+        ("GET /games/{id}/songs", lambda: main.encode_json([main.song_payload(s) for s in game.songs.values()])),
+        ("  ?fields=id,title,category",
+         lambda: main.encode_json([main.song_payload(s, summary) for s in game.songs.values()])),
+    ]
+    print(f"game with {args.songs} songs of {args.lines} lines")
+    print(f"{'read':<36} {'bytes':>10} {'encode ms':>10}")
+    for label, fn in cases:
+        elapsed, body = best_of(fn)
+        print(f"{label:<36} {len(body):>10} {elapsed * 1000:>10.2f}")
+
+    # End to end through the app, including FastAPI and the test client
+    for label, path in [("HTTP /games/{id}/songs", f"/games/{game_id}/songs"),
+                        ("HTTP /games/{id}/songs?fields=...", f"/games/{game_id}/songs?fields=id,title,category")]:
+        elapsed, response = best_of(lambda: client.get(path))
+        print(f"{label:<36} {len(response.content):>10} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,151 @@
+"""Micro-benchmark: attempts/sec for attempt_lyrics scoring.
+
+Exact mode: legacy per-attempt tokenizing vs the answer index built once per
+song. Fuzzy mode: a plain full-matrix alignment with a textbook Levenshtein
+vs the banded alignment with the bit-parallel edit distance, on an attempt
+with forgotten words and typos.
+
+Run from the backend directory:
+    python benchmarks/bench_scoring.py [--hidden 40] [--attempts 2000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import FUZZY_THRESHOLD, build_answer_index, fold, normalize_word, score_words, score_words_fuzzy  # noqa: E402
+
+
+WORDS = ["Je", "ne", "regrette", "rien", "été", "cœur", "où", "l'âme", "déjà", "Noël", "garçon", "toujours"]
+
+
+def legacy_score(lyrics, hidden_line_indices, attempt):
+    """The original attempt_lyrics loop from main.py, kept verbatim for comparison"""
+    expected_words = []
+    hidden_texts = []
+    for idx in hidden_line_indices:
+        if idx < len(lyrics):
+            hidden_text = lyrics[idx]["text"]
+            hidden_texts.append(hidden_text)
+            words = re.findall(r'\b\w+\b', hidden_text.lower())
+            expected_words.extend(words)
+
+    word_results = []
+    correct_count = 0
+    for i, (expected, attempted) in enumerate(zip(expected_words, attempt)):
+        is_correct = expected.lower().strip() == attempted.lower().strip()
+        word_results.append({"word": expected, "attempt": attempted, "correct": is_correct})
+        if is_correct:
+            correct_count += 1
+    return correct_count, word_results
+
+
+def naive_levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[:], i
+        for j, cb in enumerate(b, 1):
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+    return row[-1]
+
+
+def naive_fuzzy(index, attempt):
+    """Reference alignment: full (n+1) x (m+1) matrix, similarity recomputed per cell"""
+    expected = index.keys
+    keys = [normalize_word(w) for w in attempt]
+    n, m = len(expected), len(keys)
+
+    def sim(a, b):
+        return 1.0 - naive_levenshtein(a, b) / max(len(a), len(b), 1)
+
+    cost = [[float(i + j) if i == 0 or j == 0 else 0.0 for j in range(m + 1)] for i in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            cost[i][j] = min(cost[i - 1][j - 1] + 1.0 - sim(expected[i - 1], keys[j - 1]),
+                             cost[i - 1][j] + 1.0, cost[i][j - 1] + 1.0)
+    correct = 0
+    i, j = n, m
+    while i > 0 and j > 0:
+        s = sim(expected[i - 1], keys[j - 1])
+        if cost[i][j] == cost[i - 1][j - 1] + 1.0 - s:
+            correct += s >= FUZZY_THRESHOLD
+            i, j = i - 1, j - 1
+        elif cost[i][j] == cost[i - 1][j] + 1.0:
+            i -= 1
+        else:
+            j -= 1
+    return correct
+
+
+def sloppy(words):
+    """A realistic fuzzy attempt: every 25th word forgotten, every 7th with a typo"""
+    out = []
+    for i, word in enumerate(words):
+        if i % 25 == 24:
+            continue
+        if i % 7 == 3 and len(word) > 3:
+            word = word[:2] + word[3] + word[2] + word[4:]
+        out.append(word)
+    return out
+
+
+def make_song(n_lines: int, words_per_line: int):
+    lyrics = []
+    for i in range(n_lines):
+        text = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(words_per_line))
+        lyrics.append({"time": i * 1500, "text": text + ","})
+    return lyrics
+
+
+def rate(fn, attempts):
+    start = time.perf_counter()
+    for _ in range(attempts):
+        fn()
+    return attempts / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=80)
+    parser.add_argument("--hidden", type=int, default=40, help="hidden lines per song")
+    parser.add_argument("--words", type=int, default=10, help="words per line")
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--skip-naive", action="store_true", help="skip the slow full-matrix reference")
+    args = parser.parse_args()
+
+    lyrics = make_song(args.lines, args.words)
+    hidden = list(range(0, min(args.lines, args.hidden * 2), 2))[:args.hidden]
+    index = build_answer_index(lyrics, hidden)
+    # What a player types: lower case, mostly without accents
+    attempt = [fold(w) if i % 3 else w for i, w in enumerate(index.words)]
+
+    legacy_correct, _ = legacy_score(lyrics, hidden, attempt)
+    indexed_correct, _ = score_words(index, attempt)
+
+    print(f"{len(hidden)} hidden lines, {len(index.words)} words per attempt")
+    print(f"  legacy  : {rate(lambda: legacy_score(lyrics, hidden, attempt), args.attempts):10.0f} attempts/s"
+          f"  ({legacy_correct}/{len(index.words)} correct)")
+    print(f"  indexed : {rate(lambda: score_words(index, attempt), args.attempts):10.0f} attempts/s"
+          f"  ({indexed_correct}/{len(index.words)} correct, accent-folded)")
+    start = time.perf_counter()
+    build_answer_index(lyrics, hidden)
+    print(f"  index build (once per song): {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    typed = sloppy(attempt)
+    positional, _ = score_words(index, typed)
+    aligned, _ = score_words_fuzzy(index, typed)
+    fuzzy_attempts = max(1, args.attempts // 20)
+    print(f"fuzzy: {len(typed)} words typed, {len(index.words) - len(typed)} forgotten, typos every 7th word")
+    print(f"  exact mode scores {positional}/{len(index.words)}, fuzzy mode {aligned}/{len(index.words)}")
+    if not args.skip_naive:
+        naive_attempts = max(1, fuzzy_attempts // 50)
+        print(f"  naive   : {rate(lambda: naive_fuzzy(index, typed), naive_attempts):10.1f} attempts/s"
+              f"  ({naive_fuzzy(index, typed)} correct)")
+    print(f"  banded  : {rate(lambda: score_words_fuzzy(index, typed), fuzzy_attempts):10.1f} attempts/s")
+
+
+if __name__ == "__main__":
+    main()
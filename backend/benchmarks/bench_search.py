@@ -0,0 +1,137 @@
+"""Query latency of GET /search on a large library, vs scanning every song.
+
+Fills the library with --songs synthetic songs of --lines lines, their words
+drawn from a Zipf-like French vocabulary (so "je" or "amour" are everywhere
+and most words are rare), then times the first search (which builds the
+index), adding a song to the indexed library, and queries of each kind through
+the app (index size counts the postings, vocabulary and slot tables, not the
+ids they share with the library). The scan is the best case of searching without an index: every
+song's title and lyrics already folded to lowercase ASCII, one substring test
+per query word.
+Run from the backend directory:
+    python benchmarks/bench_search.py [--songs 50000] [--lines 30] [--queries 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+warnings.filterwarnings("ignore")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from common import percentile  # noqa: E402
+from scoring import fold  # noqa: E402
+
+COMMON = ["je", "tu", "la", "le", "de", "et", "que", "les", "un", "pas", "mon", "amour", "nuit", "été", "cœur",
+          "toujours", "rêve", "chanson", "soleil", "mer", "vie", "temps", "encore", "danse", "là", "où"]
+SYLLABLES = ["cha", "mé", "lo", "ré", "bou", "ti", "gnon", "quê", "par", "vin", "ser", "é", "ou", "te", "ra",
+             "moi", "fleu", "ciel", "gui", "ta", "ro", "nè", "su", "da"]
+
+QUERIES = [
+    ("common word", "amour"),
+    ("accents folded", "ete"),
+    ("rare word", None),
+    ("two words", None),
+    ("prefix", "cha"),
+    ("title + lyric", None),
+    ("no match", "zzzz"),
+]
+
+
+def vocabulary(rng):
+    words = list(COMMON)
+    seen = set(words)
+    while len(words) < 20000:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def index_bytes(index):
+    postings = sys.getsizeof(index.postings) + sum(
+        sys.getsizeof(term) + sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1])
+        for term, entry in index.postings.items())
+    return postings + sys.getsizeof(index.vocabulary) + sys.getsizeof(index.slots) + sys.getsizeof(index.documents)
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=50000)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    words = vocabulary(rng)
+    rank = {word: i for i, word in enumerate(words)}
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    start = time.perf_counter()
+    for i in range(args.songs):
+        title = " ".join(rng.choices(words, cum_weights=weights, k=3)).capitalize()
+        lrc = "\n".join(f"[{j // 60:02d}:{j % 60:02d}.00]{' '.join(rng.choices(words, cum_weights=weights, k=7))}"
+                        for j in range(args.lines))
+        main.create_library_song(main.SongCreate(title=title, category=f"Catégorie {i % 20}", youtube_url="",
+                                                 spotify_id="", lrc=lrc, hidden_line_indices=[0]))
+    print(f"{args.songs} songs of {args.lines} lines, {len(words)} words; library filled in "
+          f"{time.perf_counter() - start:.1f} s")
+
+    client = TestClient(main.app)
+    start = time.perf_counter()
+    client.get("/search", params={"q": "amour"})
+    build = time.perf_counter() - start
+    index = main.library_index
+    print(f"first search (builds the index): {build:.1f} s; {len(index.postings)} words, "
+          f"{sum(len(slots) for slots, _ in index.postings.values())} postings, {index_bytes(index) / 2**20:.0f} MB")
+
+    lrc = "\n".join(f"[00:{j:02d}.00]une toute nouvelle ligne {j}" for j in range(args.lines))
+    start = time.perf_counter()
+    for i in range(100):
+        main.create_library_song(main.SongCreate(title=f"Nouvelle {i}", category="Nouveautés", youtube_url="",
+                                                 spotify_id="", lrc=f"{lrc}\n[01:00.00]{i}", hidden_line_indices=[0]))
+    main.library_search_index()
+    print(f"100 songs added then indexed by the next search: "
+          f"{(time.perf_counter() - start) * 1000 / 100:.2f} ms per song")
+
+    library = list(main.songs.values())
+    scanned = [(fold(song.title + "\n" + "\n".join(song.lyrics.texts())), song.id) for song in library]
+    sample = rng.sample(library, args.queries)
+    print(f"{'query':<16} {'matches':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'scan ms':>8}")
+    for label, fixed in QUERIES:
+        timings = []
+        matches = []
+        for i in range(args.queries):
+            song = sample[i]
+            lyric = song.lyrics.text(i % args.lines).split()
+            q = fixed
+            if label == "rare word":
+                q = max(lyric, key=lambda word: rank.get(word, 0))
+            elif label == "two words":
+                q = " ".join(lyric[:2])
+            elif label == "title + lyric":
+                q = f"{song.title.split()[0]} {lyric[-1]}"
+            start = time.perf_counter()
+            response = client.get("/search", params={"q": q})
+            timings.append(time.perf_counter() - start)
+            matches.append(int(response.headers["x-total-count"]))
+        folded = fold(q).split()
+        start = time.perf_counter()
+        for _ in range(5):
+            [song_id for text, song_id in scanned if all(word in text for word in folded)]
+        scan = (time.perf_counter() - start) / 5
+        print(f"{label:<16} {int(statistics.median(matches)):>8} {percentile(timings, 50) * 1000:>8.2f} "
+              f"{percentile(timings, 95) * 1000:>8.2f} {percentile(timings, 99) * 1000:>8.2f} "
+              f"{scan * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+"""Requests/sec on hot game endpoints with persistence off (memory) and on (log).
+
+Each mode runs in its own interpreter because main.py opens its store at import.
+Run from the backend directory:
+    python benchmarks/bench_storage.py [--requests 5000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LRC = "\n".join(f"[00:{i:02d}.00]ligne numero {i} de la chanson" for i in range(40))
+
+
+def run(n_requests: int):
+    sys.path.insert(0, BACKEND_DIR)
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    songs = [{"title": f"Song {i}", "category": f"Cat {i % 5}", "youtube_url": "", "spotify_id": "",
+              "lrc": LRC, "hidden_line_indices": [10, 11]} for i in range(50)]
+    game = client.post("/games", json={"name": "bench", "player_names": ["a", "b", "c", "d"],
+                                       "songs": songs}).json()
+    game_id = game["id"]
+    song_id = int(next(iter(game["songs"])))
+    client.post(f"/games/{game_id}/start")
+    attempt = {"song_id": song_id, "attempt": "ligne numero 10 de la chanson".split(), "player": "a"}
+
+    start = time.perf_counter()
+    for i in range(n_requests):
+        if i % 2:
+            client.post(f"/games/{game_id}/attempt_lyrics", json=attempt)
+        else:
+            r = client.post(f"/games/{game_id}/next_player")
+            if r.json().get("message") == "Game finished":
+                break
+    elapsed = time.perf_counter() - start
+    main.store.close()
+    print(f"{os.environ.get('STORAGE_BACKEND', 'memory'):>8}: {n_requests / elapsed:8.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--child", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        run(args.requests)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for backend in ("memory", "log"):
+            env = dict(os.environ, STORAGE_BACKEND=backend, STORAGE_DIR=data_dir)
+            subprocess.run([sys.executable, __file__, "--child", "--requests", str(args.requests)],
+                           env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
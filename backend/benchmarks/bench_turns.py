@@ -0,0 +1,76 @@
+"""next_player cost for party games with hundreds of players: the previous
+random.choice over rebuilt lists vs the seeded TurnScheduler.
+
+Plays --rounds full rounds per player count, in-process with the in-memory
+store. Both variants end every turn with save_game() as the endpoint does;
+"scheduler" calls the next_player endpoint function itself.
+Run from the backend directory:
+    python benchmarks/bench_turns.py [--players 100,300,1000] [--rounds 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import main  # noqa: E402
+
+
+def make_game(n_players, n_categories=50):
+    main.commit_game(main.GameCreate(name="party", player_names=[f"player {i}" for i in range(n_players)],
+                                     categories=[f"Cat {i}" for i in range(n_categories)], seed=1))
+    game = main.games[max(main.games)]
+    main.start_game(game.id)
+    return game
+
+
+def legacy_next_player(game):
+    """next_player's turn selection as it was"""
+    if game.current_player and game.current_player not in game.players_played_this_round:
+        game.players_played_this_round.append(game.current_player)
+    all_players = [p.username for p in game.players]
+    remaining = [p for p in all_players if p not in game.players_played_this_round]
+    if remaining:
+        game.current_player = random.choice(remaining)
+    elif [c for c in game.categories.keys() if c not in game.played_categories]:
+        game.current_round += 1
+        game.players_played_this_round = []
+        game.current_player = random.choice(all_players)
+    main.save_game(game, "current_player", "current_round", "players_played_this_round")
+
+
+def scheduler_next_player(game):
+    main.next_player(game.id)
+
+
+def play(next_player, n_players, rounds):
+    game = make_game(n_players)
+    turns = n_players * rounds
+    start = time.perf_counter()
+    for _ in range(turns):
+        next_player(game)
+    return (time.perf_counter() - start) / turns
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", default="100,300,1000")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # Events go nowhere without subscribers; keep them out of the timing anyway
+    main.events.publish = lambda *args, **kwargs: None
+
+    print(f"{args.rounds} rounds, time per next_player")
+    print(f"{'players':>8} {'before':>10} {'scheduler':>10}")
+    for n in (int(n) for n in args.players.split(",")):
+        before = play(legacy_next_player, n, args.rounds)
+        after = play(scheduler_next_player, n, args.rounds)
+        print(f"{n:>8} {before * 1e6:>7.0f} us {after * 1e6:>7.0f} us")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,63 @@
+"""Helpers shared by the benchmark scripts, imported from their directory:
+    from common import best_of  # noqa: E402
+"""
+import http.client
+import time
+
+HOST = "127.0.0.1"
+
+
+def best_of(fn, repeat=5):
+    """(seconds taken by the fastest of `repeat` calls to fn, what the last one returned)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def timings(fn, repeat):
+    """Seconds taken by each of `repeat` calls to fn"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def async_timings(call, repeat):
+    """timings() of an async call, awaited one at a time"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(values, p):
+    """Nearest-rank p-th percentile (0 to 100) of the values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def wait_until_up(port, timeout=30.0, host=HOST):
+    """Poll GET /games until the server under test answers it"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        conn = http.client.HTTPConnection(host, port, timeout=1)
+        try:
+            conn.request("GET", "/games")
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
@@ -0,0 +1,104 @@
+"""Throughput of GET /games/{id} and POST /games/{id}/attempt_lyrics as uvicorn workers are added.
+
+Starts `uvicorn main:app --workers N` on the shared SQLite store for each N,
+then drives it from several client processes (stdlib http.client, keep-alive).
+Run from the backend directory:
+    python benchmarks/load_workers.py [--workers 1 2 4] [--clients 8] [--duration 5]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import HOST, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LRC = "\n".join(f"[00:{i:02d}.00]ligne numero {i} de la chanson" for i in range(40))
+
+
+def request(conn, method, path, body=None):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    # Bytes, so http.client sends headers and body in one segment (avoids Nagle/delayed-ACK stalls)
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} -> {response.status}: {data[:200]!r}")
+    return json.loads(data)
+
+
+def client(port, method, path, body, duration, results):
+    conn = http.client.HTTPConnection(HOST, port)
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        request(conn, method, path, body)
+        count += 1
+    results.put(count)
+
+
+def measure(port, method, path, body, clients, duration):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(port, method, path, body, duration, results))
+             for _ in range(clients)]
+    for p in procs:
+        p.start()
+    total = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return total / duration
+
+
+def run_server(workers, port, data_dir):
+    env = dict(os.environ, STORAGE_BACKEND="sqlite", STORAGE_DIR=data_dir, WEB_CONCURRENCY=str(workers))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes, {args.duration:.0f}s per measurement")
+    print(f"{'workers':>7} {'GET game req/s':>15} {'attempt req/s':>14}")
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as data_dir:
+            server = run_server(workers, args.port, data_dir)
+            try:
+                wait_until_up(args.port)
+                conn = http.client.HTTPConnection(HOST, args.port)
+                songs = [{"title": f"Song {i}", "category": f"Cat {i % 5}", "youtube_url": "", "spotify_id": "",
+                          "lrc": LRC, "hidden_line_indices": [10, 11]} for i in range(20)]
+                game = request(conn, "POST", "/games", {"name": "load", "player_names": ["a", "b"], "songs": songs})
+                game_id = game["id"]
+                song_id = int(next(iter(game["songs"])))
+                request(conn, "POST", f"/games/{game_id}/start")
+                attempt = {"song_id": song_id, "attempt": "ligne numero 10 de la chanson".split(), "player": "a"}
+
+                reads = measure(args.port, "GET", f"/games/{game_id}", None, args.clients, args.duration)
+                writes = measure(args.port, "POST", f"/games/{game_id}/attempt_lyrics", attempt,
+                                 args.clients, args.duration)
+                baseline = baseline or (reads, writes)
+                print(f"{workers:>7} {reads:>9.0f} ({reads / baseline[0]:.1f}x) {writes:>8.0f} ({writes / baseline[1]:.1f}x)")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Concurrent mutations against a running server, then invariant checks.
+
+Starts uvicorn and fires --requests mutations at --games games from
+--concurrency client threads: correct lyric attempts (each worth +10 to
+the player), next_player calls and renames of a guest player. Afterwards
+every game must show:
+  - each player's score equal to 10 x their attempts (no lost updates),
+  - round and players_played_this_round matching the number of next_player
+    calls, without duplicates and without the current player,
+  - the guest under exactly one of its names, in players and scores.
+Renames racing each other may answer 404; any other failure is reported.
+Run from the backend directory:
+    python benchmarks/stress_games.py [--requests 5000] [--concurrency 64] [--backend memory]
+        [--switch-interval 1e-5]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import HOST, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LRC = "[00:01.00]un deux trois\n[00:04.00]quatre cinq six"
+ANSWER = ["quatre", "cinq", "six"]
+GUEST = ("guest", "guest renamed")
+
+local = threading.local()
+
+
+def request(port, method, path, body=None):
+    conn = getattr(local, "conn", None)
+    if conn is None:
+        conn = local.conn = http.client.HTTPConnection(HOST, port, timeout=60)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    except (OSError, http.client.HTTPException):
+        local.conn = None
+        raise
+
+
+def create_game(port, n_players):
+    players = [f"player {i}" for i in range(n_players)] + [GUEST[0]]
+    _, game = request(port, "POST", "/games", {
+        "name": "stress", "player_names": players,
+        "songs": [{"title": "t", "category": "c", "youtube_url": "", "spotify_id": "", "lrc": LRC,
+                   "hidden_line_indices": [1]}],
+        "categories": ["other"],
+    })
+    request(port, "POST", f"/games/{game['id']}/start")
+    return game["id"], int(next(iter(game["songs"]))), players
+
+
+def rename_guest(port, game_id):
+    """Toggle the guest's name, whichever it currently is"""
+    for old, new in (GUEST, GUEST[::-1]):
+        status, _ = request(port, "PUT", f"/games/{game_id}/players", {"old_username": old, "new_username": new})
+        if status == 200:
+            return status
+    return status
+
+
+def check(port, game_id, players, attempts, turns):
+    _, game = request(port, "GET", f"/games/{game_id}")
+    problems = []
+    for player in players[:-1]:
+        expected = 10 * attempts[player]
+        if game["scores"].get(player) != expected:
+            problems.append(f"{player}: score {game['scores'].get(player)}, expected {expected}")
+
+    n_players = len(game["players"])
+    played = game["players_played_this_round"]
+    if game["current_round"] != 1 + turns // n_players or len(played) != turns % n_players:
+        problems.append(f"{turns} turns: round {game['current_round']} with {len(played)} played, expected "
+                        f"round {1 + turns // n_players} with {turns % n_players}")
+    if len(set(played)) != len(played):
+        problems.append(f"duplicate turns: {played}")
+    if game["current_player"] in played:
+        problems.append(f"current player {game['current_player']} already played")
+
+    names = [p["username"] for p in game["players"]]
+    guests = [name for name in GUEST if name in names]
+    if len(guests) != 1 or [name for name in GUEST if name in game["scores"]] != guests:
+        problems.append(f"guest is {guests} in players, {list(game['scores'])} in scores")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=4)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--backend", default="memory", help="STORAGE_BACKEND of the server")
+    parser.add_argument("--switch-interval", type=float, default=1e-5, help="sys.setswitchinterval of the server")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    storage_dir = tempfile.mkdtemp(prefix="stress-")
+    # A short GIL switch interval makes the server's threads interleave far more often
+    server = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys, uvicorn; sys.setswitchinterval({args.switch_interval}); "
+         f"uvicorn.run('main:app', host='{HOST}', port={args.port}, log_level='warning', access_log=False)"],
+        cwd=BACKEND_DIR, env=dict(os.environ, STORAGE_BACKEND=args.backend, STORAGE_DIR=storage_dir),
+    )
+    try:
+        wait_until_up(args.port)
+        games = [create_game(args.port, args.players) for _ in range(args.games)]
+
+        rng = random.Random(0)
+        plan = []
+        attempts = {game_id: Counter() for game_id, _, _ in games}
+        turns = Counter()
+        for _ in range(args.requests):
+            game_id, song_id, players = rng.choice(games)
+            kind = rng.random()
+            if kind < 0.6:
+                player = rng.choice(players[:-1])
+                attempts[game_id][player] += 1
+                plan.append(("POST", f"/games/{game_id}/attempt_lyrics",
+                             {"song_id": song_id, "attempt": ANSWER, "player": player}))
+            elif kind < 0.9:
+                turns[game_id] += 1
+                plan.append(("POST", f"/games/{game_id}/next_player", None))
+            else:
+                plan.append(("RENAME", game_id, None))
+
+        def send(item):
+            method, path, body = item
+            try:
+                if method == "RENAME":
+                    return rename_guest(args.port, path)
+                return request(args.port, method, path, body)[0]
+            except (OSError, http.client.HTTPException) as e:
+                return type(e).__name__
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            statuses = Counter(pool.map(send, plan))
+        elapsed = time.perf_counter() - start
+
+        # This thread's connection sat idle during the run; the server may have closed it
+        local.conn = None
+        problems = []
+        for game_id, _, players in games:
+            problems += [f"game {game_id}: {p}" for p in check(args.port, game_id, players, attempts[game_id],
+                                                                turns[game_id])]
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.requests} mutations on {args.games} games from {args.concurrency} threads "
+          f"({args.backend} store): {elapsed:.2f} s, {args.requests / elapsed:.0f} req/s")
+    print(f"statuses: {dict(statuses)}")
+    if problems:
+        print(f"{len(problems)} invariant violations:")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("invariants hold")
+
+
+if __name__ == "__main__":
+    main()
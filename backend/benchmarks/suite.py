@@ -0,0 +1,293 @@
+"""Benchmark suite for the game API, with a stored baseline to catch regressions.
+
+Scenarios drive the app in-process through httpx's ASGI transport, one
+request at a time, with seeded data so every run sends the same requests:
+  create_game  POST /games with --songs new songs, --games times
+  rounds       full games of --players players: start, then per turn
+               select_category, select_song, attempt_lyrics,
+               complete_category and next_player until the game finishes
+  bulk_edits   on a --songs game: batched PATCH renames and moves, single
+               song PUTs with new lyrics, and the song list read after each
+Each scenario runs in a fresh interpreter (main.py opens its store at import),
+--repeat times; the best run counts. Reports requests/s, p50/p95/p99 latency
+per endpoint and resident memory (peak, and growth over the bare import).
+
+The baseline (benchmarks/baseline.json) holds one entry per storage backend
+and is only meaningful on the machine that wrote it: save one before a change,
+compare after. Exits with status 1 when throughput, a median latency or
+memory growth is worse than its baseline by more than --tolerance.
+Run from the backend directory:
+    python benchmarks/suite.py --save-baseline      # record
+    python benchmarks/suite.py                      # compare
+    python benchmarks/suite.py [--backend memory] [--scenarios rounds,bulk_edits] [--repeat 3] [--tolerance 0.25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+
+from common import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+WORDS = "soleil chanson danse lumière amour nuit étoile rêve matin voyage coeur route mer ciel".split()
+PERCENTILES = (50, 95, 99)
+
+
+def make_lrc(rng, n_lines=60):
+    return "\n".join(f"[{i * 3 // 60:02d}:{i * 3 % 60:02d}.00]" + " ".join(rng.choice(WORDS) for _ in range(7))
+                     for i in range(n_lines))
+
+
+def make_songs(rng, n_songs, n_categories, prefix=""):
+    return [{"title": f"{prefix}Chanson {i}", "category": f"Catégorie {i % n_categories}",
+             "youtube_url": "https://youtu.be/x", "spotify_id": "x", "lrc": make_lrc(rng),
+             "hidden_line_indices": [20, 21]} for i in range(n_songs)]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+class Client:
+    """httpx client on the ASGI app that records each request's latency per endpoint"""
+
+    def __init__(self, app):
+        import httpx
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        self.latencies = defaultdict(list)
+
+    async def __call__(self, label, method, path, body=None):
+        start = time.perf_counter()
+        response = await self.http.request(method, path, json=body)
+        self.latencies[label].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path}: {response.status_code} {response.text[:200]}")
+        return response.json()
+
+
+async def create_game(client, args, rng):
+    for g in range(args.games):
+        await client("POST /games", "POST", "/games", {
+            "name": f"bench {g}", "player_names": [f"player {i}" for i in range(args.players)],
+            "songs": make_songs(rng, args.songs, args.categories, prefix=f"{g} "), "seed": g})
+
+
+async def rounds(client, args, rng):
+    for g in range(args.games):
+        game = await client("POST /games", "POST", "/games", {
+            "name": f"bench {g}", "player_names": [f"player {i}" for i in range(args.players)],
+            "songs": make_songs(rng, args.categories * 4, args.categories, prefix=f"{g} "), "seed": g,
+            "scoring_mode": "fuzzy" if g % 2 else "exact"})
+        game_id = game["id"]
+        answers = {int(song_id): " ".join(line["text"] for line in song["lyrics"][20:22]).split()
+                   for song_id, song in game["songs"].items()}
+        categories = list(game["categories"])
+        rng.shuffle(categories)
+        turn = await client("POST start", "POST", f"/games/{game_id}/start")
+        while True:
+            category = categories.pop() if categories else game["categories"][0]
+            picks = await client("POST select_category", "POST", f"/games/{game_id}/select_category",
+                                 {"category": category})
+            song_id = rng.choice(picks["songs"])["id"]
+            await client("POST select_song", "POST", f"/games/{game_id}/select_song", {"song_id": song_id})
+            words = answers[song_id]
+            attempt = [word if rng.random() < 0.8 else word[:-1] for word in words]
+            await client("POST attempt_lyrics", "POST", f"/games/{game_id}/attempt_lyrics",
+                         {"song_id": song_id, "attempt": attempt, "player": turn["current_player"]})
+            await client("POST complete_category", "POST", f"/games/{game_id}/complete_category",
+                         {"category": category})
+            turn = await client("POST next_player", "POST", f"/games/{game_id}/next_player")
+            if "current_player" not in turn:
+                break
+
+
+async def bulk_edits(client, args, rng):
+    game = await client("POST /games", "POST", "/games", {
+        "name": "bench", "player_names": ["a", "b"], "songs": make_songs(rng, args.songs, args.categories)})
+    game_id = game["id"]
+    song_ids = [int(song_id) for song_id in game["songs"]]
+    for batch in range(args.edits):
+        edits = rng.sample(song_ids, min(50, len(song_ids)))
+        await client("PATCH songs", "PATCH", f"/games/{game_id}/songs", {"songs": [
+            {"id": song_id, "title": f"Titre {batch}-{song_id}",
+             "category": f"Catégorie {rng.randrange(args.categories + 5)}"} for song_id in edits]})
+        song_id = rng.choice(song_ids)
+        await client("PUT song", "PUT", f"/games/{game_id}/songs/{song_id}", {
+            "title": f"Réécrite {batch}", "category": "Catégorie 0", "youtube_url": "", "spotify_id": "",
+            "lrc": make_lrc(rng), "hidden_line_indices": [5]})
+        await client("GET songs", "GET", f"/games/{game_id}/songs?fields=id,title,category")
+        await client("GET categories", "GET", f"/games/{game_id}/categories")
+
+
+SCENARIOS = {"create_game": create_game, "rounds": rounds, "bulk_edits": bulk_edits}
+
+
+async def run_scenario(name, args):
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    import main
+
+    client = Client(main.app)
+    await client("GET /games", "GET", "/games")  # first request builds FastAPI's caches
+    client.latencies.clear()
+    before = rss_mb()
+    start = time.perf_counter()
+    await SCENARIOS[name](client, args, random.Random(args.seed))
+    elapsed = time.perf_counter() - start
+    requests = sum(len(values) for values in client.latencies.values())
+    main.store.close()
+    return {
+        "requests": requests,
+        "req_per_s": requests / elapsed,
+        "latency_ms": {label: {f"p{p}": percentile(values, p) * 1000 for p in PERCENTILES}
+                       for label, values in sorted(client.latencies.items())},
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": rss_mb() - before,
+    }
+
+
+def best(runs):
+    """Best of each figure over the runs: noise only ever makes things slower"""
+    result = dict(runs[0])
+    result["req_per_s"] = max(run["req_per_s"] for run in runs)
+    result["peak_rss_mb"] = min(run["peak_rss_mb"] for run in runs)
+    result["rss_growth_mb"] = min(run["rss_growth_mb"] for run in runs)
+    result["latency_ms"] = {label: {key: min(run["latency_ms"][label][key] for run in runs) for key in percentiles}
+                            for label, percentiles in runs[0]["latency_ms"].items()}
+    return result
+
+
+def regressions(name, result, baseline, tolerance):
+    """(what, baseline, now) for every figure worse than the baseline by more than tolerance.
+
+    Only medians are checked: p95 and p99 rest on a handful of requests per
+    endpoint and move with whatever else the machine does.
+    """
+    worse = []
+    if result["req_per_s"] < baseline["req_per_s"] * (1 - tolerance):
+        worse.append((f"{name} req/s", baseline["req_per_s"], result["req_per_s"]))
+    for label, percentiles in result["latency_ms"].items():
+        reference = baseline["latency_ms"].get(label, {}).get("p50")
+        if reference is not None and percentiles["p50"] > reference * (1 + tolerance):
+            worse.append((f"{name} {label} p50 ms", reference, percentiles["p50"]))
+    # Growth below a few MB is allocator noise
+    if result["rss_growth_mb"] > max(baseline["rss_growth_mb"] * (1 + tolerance), baseline["rss_growth_mb"] + 5):
+        worse.append((f"{name} rss growth MB", baseline["rss_growth_mb"], result["rss_growth_mb"]))
+    return worse
+
+
+def report(name, result, baseline):
+    def change(now, before):
+        if not before:
+            return ""
+        return f" ({(now / before - 1) * 100:+.0f}%)"
+
+    baseline = baseline or {}
+    print(f"\n{name}: {result['requests']} requests, {result['req_per_s']:.0f} req/s"
+          f"{change(result['req_per_s'], baseline.get('req_per_s'))}, "
+          f"peak RSS {result['peak_rss_mb']:.0f} MB, growth {result['rss_growth_mb']:.1f} MB"
+          f"{change(result['rss_growth_mb'], baseline.get('rss_growth_mb'))}")
+    print(f"  {'endpoint':<24}" + "".join(f"{'p' + str(p) + ' ms':>9}{'':<8}" for p in PERCENTILES))
+    for label, percentiles in result["latency_ms"].items():
+        before = baseline.get("latency_ms", {}).get(label, {})
+        print(f"  {label:<24}" + "".join(
+            f"{percentiles[f'p{p}']:>9.2f}{change(percentiles[f'p{p}'], before.get(f'p{p}')):<8}" for p in PERCENTILES))
+
+
+def environment(args):
+    return {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "settings": {key: getattr(args, key) for key in ("games", "songs", "players", "categories", "edits",
+                                                              "seed")}}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="memory", help="STORAGE_BACKEND: memory, log or sqlite")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--categories", type=int, default=24)
+    parser.add_argument("--edits", type=int, default=50, help="bulk_edits batches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="record this run instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing, 0.25 = 25%%")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_scenario(args.child, args))))
+        return
+
+    names = [name.strip() for name in args.scenarios.split(",")]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    baseline = stored.get(args.backend)
+    if baseline is not None and not args.save_baseline and baseline["environment"] != environment(args):
+        print(f"warning: baseline recorded with {baseline['environment']}, not {environment(args)}")
+
+    results = {}
+    for name in names:
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="suite-") as data_dir:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--child", name],
+                    env=dict(os.environ, STORAGE_BACKEND=args.backend, STORAGE_DIR=data_dir, METRICS="1"),
+                    cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+                ).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+        results[name] = best(runs)
+
+    print(f"{args.backend} store, best of {args.repeat}")
+    worse = []
+    for name, result in results.items():
+        reference = (baseline or {}).get("scenarios", {}).get(name)
+        report(name, result, None if args.save_baseline else reference)
+        if reference is not None and not args.save_baseline:
+            worse += regressions(name, result, reference, args.tolerance)
+
+    if args.save_baseline:
+        entry = stored.setdefault(args.backend, {"scenarios": {}})
+        entry["environment"] = environment(args)
+        entry["scenarios"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline saved to {args.baseline}")
+    elif baseline is None:
+        print(f"\nno {args.backend} baseline in {args.baseline}; record one with --save-baseline")
+    elif worse:
+        print(f"\n{len(worse)} regressions over {args.tolerance:.0%}:")
+        for what, before, now in worse:
+            print(f"  {what}: {before:.2f} -> {now:.2f}")
+        sys.exit(1)
+    else:
+        print(f"\nno regression over {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
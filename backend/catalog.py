@@ -0,0 +1,102 @@
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from main import Category, Song
+
+
+class CatalogIndex:
+    """A game's category membership, kept up to date by every song/category mutation.
+
+    Category.song_ids stays the persisted and serialized form; this index is
+    what mutations work on: an insertion-ordered set of song ids per category
+    and the category of every song, so moving, deleting or renaming is O(1)
+    per song instead of a rebuild of the whole list. Categories touched since
+    the last sync() get their song_ids rewritten once, when the game is saved.
+    """
+    __slots__ = ("members", "category_of", "dirty")
+
+    def __init__(self):
+        self.members: Dict[str, Dict[int, None]] = {}
+        self.category_of: Dict[int, str] = {}
+        self.dirty: Dict[str, None] = {}  # ordered, so new categories keep their creation order
+
+    @classmethod
+    def build(cls, categories: Dict[str, "Category"], songs: Dict[int, "Song"]) -> "CatalogIndex":
+        """Index a game as loaded; ids of songs that no longer exist are dropped"""
+        index = cls()
+        for name, category in categories.items():
+            members = index.members[name] = {}
+            for song_id in category.song_ids:
+                if song_id in songs and song_id not in index.category_of:
+                    members[song_id] = None
+                    index.category_of[song_id] = name
+            if len(members) != len(category.song_ids):
+                index.dirty[name] = None
+        for song_id, song in songs.items():
+            # Songs missing from their category's list (older data)
+            if song_id not in index.category_of:
+                index.add(song_id, song.category)
+        return index
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.members
+
+    def song_ids(self, name: str) -> List[int]:
+        return list(self.members.get(name, ()))
+
+    def ensure(self, name: str):
+        if name not in self.members:
+            self.members[name] = {}
+            self.dirty[name] = None
+
+    def add(self, song_id: int, name: str):
+        self.ensure(name)
+        self.members[name][song_id] = None
+        self.category_of[song_id] = name
+        self.dirty[name] = None
+
+    def remove(self, song_id: int, drop_empty: bool = True) -> Optional[str]:
+        """Take a song out of its category (dropping the category once empty); returns the category"""
+        name = self.category_of.pop(song_id, None)
+        if name is None:
+            return None
+        members = self.members[name]
+        members.pop(song_id, None)
+        if drop_empty and not members:
+            del self.members[name]
+        self.dirty[name] = None
+        return name
+
+    def move(self, song_id: int, name: str):
+        if self.category_of.get(song_id) != name:
+            self.remove(song_id)
+            self.add(song_id, name)
+
+    def rename(self, old: str, new: str) -> List[int]:
+        """Move every song of `old` to `new` (merging if `new` exists); returns the moved ids"""
+        moved = self.members.pop(old)
+        self.ensure(new)
+        self.members[new].update(moved)
+        for song_id in moved:
+            self.category_of[song_id] = new
+        self.dirty.update(dict.fromkeys((old, new)))
+        return list(moved)
+
+    def drop(self, name: str) -> List[int]:
+        """Remove a category; returns the ids of the songs it held"""
+        removed = self.members.pop(name)
+        for song_id in removed:
+            del self.category_of[song_id]
+        self.dirty[name] = None
+        return list(removed)
+
+    def sync(self, categories: Dict[str, "Category"], make_category: Callable[..., "Category"]):
+        """Write the touched categories back to the game's Category models"""
+        for name in self.dirty:
+            if name not in self.members:
+                categories.pop(name, None)
+            elif name in categories:
+                categories[name].song_ids = list(self.members[name])
+            else:
+                categories[name] = make_category(name=name, song_ids=list(self.members[name]))
+        self.dirty.clear()
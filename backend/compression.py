@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+from executor import run_cpu
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # brotli's 11 costs ~50x the time for a few percent on lyrics
+OFFLOAD_SIZE = 64 * 1024  # bodies compressed on the CPU executor rather than the event loop
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {"gzip": lambda body: gzip.compress(body, GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def configured_encodings(value: Optional[str]) -> List[str]:
+    """COMPRESSION ("br,gzip", "gzip", "none"...) in order of preference, minus what isn't installed"""
+    if value is None:
+        value = "br,gzip"
+    return [name for name in (v.strip() for v in value.split(",")) if name in COMPRESSORS]
+
+
+ENCODINGS = configured_encodings(os.environ.get("COMPRESSION"))
+MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))  # bytes; smaller bodies are sent as is
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred configured encoding the client accepts (q > 0), if any"""
+    if not accept_encoding or not ENCODINGS:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for name in ENCODINGS:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """(content, Content-Encoding); bodies under MIN_SIZE stay uncompressed"""
+    if encoding is None or len(body) < MIN_SIZE:
+        return body, None
+    return COMPRESSORS[encoding](body), encoding
+
+
+class CompressedCache:
+    """Compressed variants of cached response bodies, LRU bounded by total size.
+
+    Keys must change whenever the body does (they include the ETag), so
+    entries are never invalidated, only evicted.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[bytes, Optional[str]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def peek(self, key: Hashable, encoding: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        with self._lock:
+            entry = self._entries.get((key, encoding))
+            if entry is not None:
+                self._entries.move_to_end((key, encoding))
+            return entry
+
+    def get(self, key: Hashable, encoding: str, build: Callable[[], bytes]) -> Tuple[bytes, Optional[str]]:
+        """(content, Content-Encoding) for the body build() returns, compressed once per key"""
+        entry = self.peek(key, encoding)
+        if entry is not None:
+            return entry
+        entry = compress(build(), encoding)
+        with self._lock:
+            if (key, encoding) not in self._entries:
+                self._entries[(key, encoding)] = entry
+                self.size += len(entry[0])
+            while self.size > self.max_bytes and self._entries:
+                _, (content, _) = self._entries.popitem(last=False)
+                self.size -= len(content)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CompressionMiddleware:
+    """Compress complete responses the endpoints didn't compress themselves.
+
+    Streamed responses (server-sent events, imports) pass through untouched,
+    as do bodies under MIN_SIZE; large bodies are compressed off the event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENCODINGS:
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            pending, start = start, None
+            headers = pending["headers"]
+            body = message.get("body", b"")
+            if message.get("more_body") or any(name == b"content-encoding" for name, _ in headers):
+                await send(pending)
+                await send(message)
+                return
+            content, used = (await run_cpu(compress, body, encoding) if len(body) >= OFFLOAD_SIZE
+                             else compress(body, encoding))
+            if used is not None:
+                headers = [(name, value) for name, value in headers if name != b"content-length"]
+                headers += [(b"content-encoding", used.encode()), (b"content-length", str(len(content)).encode())]
+                headers = vary_accept_encoding(headers)
+            await send(dict(pending, headers=headers))
+            await send(dict(message, body=content))
+
+        await self.app(scope, receive, send_compressed)
+
+
+def vary_accept_encoding(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for i, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
@@ -0,0 +1,128 @@
+from array import array
+from collections import Counter, OrderedDict
+from math import log
+from threading import Lock
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from lrc import LrcCache, Lyrics, parse_lyrics
+from scoring import WORD_EXP, normalize_word
+from timeline import LINE_FALLBACK_MS
+
+
+DIFFICULTIES = {"easy": 0.25, "medium": 0.5, "hard": 0.75}  # target difficulty of the hidden lines
+LONG_LINE_WORDS = 12  # words from which a line counts as long as they get
+FAST_WORDS_PER_SECOND = 4.0  # sung this fast or faster counts as fast as it gets
+# Share of each feature in a line's difficulty
+RARITY_WEIGHT = 0.4
+LENGTH_WEIGHT = 0.25
+SPEED_WEIGHT = 0.25
+REPETITION_WEIGHT = 0.1  # a line sung again elsewhere in the song is easier to recall
+MAX_SUGGESTIONS = 3
+DEFAULT_CACHE_SIZE = 1024
+
+
+class SongAnalysis(NamedTuple):
+    """Per-line features of a song's lyrics, which only depend on its content.
+
+    Columns rather than an object per line, like Lyrics: entry i of each
+    describes line i.
+    """
+    words: array  # words in the line
+    durations: array  # ms until the next line starts (LINE_FALLBACK_MS for the last one)
+    repeats: array  # lines of the song with the same words, this one included
+    terms: Tuple[Tuple[str, ...], ...]  # folded words, looked up in the catalog's word frequencies
+
+
+class LineScore(NamedTuple):
+    index: int
+    rarity: float  # 0 (words in every song) to 1 (in none)
+    difficulty: Optional[float]  # 0 to 1, None for lines without words (never hidden)
+
+
+def analyze(lyrics: Lyrics) -> SongAnalysis:
+    times = lyrics.times
+    texts = lyrics.texts()
+    terms = tuple(tuple(term for term in map(normalize_word, WORD_EXP.findall(text)) if term) for text in texts)
+    durations = array("I", (max(0, end - start) for start, end in zip(times, list(times[1:]) + [None]) if end is not None))
+    if times:
+        durations.append(LINE_FALLBACK_MS)
+    counts = Counter(line for line in terms if line)
+    return SongAnalysis(array("H", (min(len(line), 65535) for line in terms)), durations,
+                        array("H", (min(counts[line], 65535) if line else 0 for line in terms)), terms)
+
+
+class AnalysisCache:
+    """Thread-safe LRU of song analyses keyed by the LRC content's hash (see LrcCache.key)"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, SongAnalysis]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, lrc_content: str, lyrics: Optional[Lyrics] = None) -> SongAnalysis:
+        """The analysis of this content, from the parsed lyrics if given, else parsing it"""
+        key = LrcCache.key(lrc_content)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                return analysis
+        analysis = analyze(lyrics if lyrics is not None else parse_lyrics(lrc_content))
+        with self._lock:
+            self._entries[key] = analysis
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def __len__(self):
+        return len(self._entries)
+
+
+analyses = AnalysisCache()
+
+
+def score_lines(analysis: SongAnalysis, frequency: Callable[[str], int], documents: int) -> List[LineScore]:
+    """Difficulty of each line given the catalog's word frequencies: `frequency(term)`
+    is the number of songs, out of `documents`, holding the word. An empty catalog
+    holds none of them, so every word is as rare as it gets."""
+    scale = log(documents + 1)
+    rarities: Dict[str, float] = {}
+    scores = []
+    for index, terms in enumerate(analysis.terms):
+        if not terms:
+            scores.append(LineScore(index, 0.0, None))
+            continue
+        for term in terms:
+            if term not in rarities:
+                # The count may include removed songs (see SearchIndex.frequency): at most "in every song"
+                rarities[term] = max(0.0, log((documents + 1) / (frequency(term) + 1)) / scale) if documents else 1.0
+        rarity = sum(rarities[term] for term in terms) / len(terms)
+        words = analysis.words[index]
+        per_second = words * 1000 / max(analysis.durations[index], 1)
+        difficulty = (RARITY_WEIGHT * rarity
+                      + LENGTH_WEIGHT * min(words / LONG_LINE_WORDS, 1.0)
+                      + SPEED_WEIGHT * min(per_second / FAST_WORDS_PER_SECOND, 1.0)
+                      + REPETITION_WEIGHT * (analysis.repeats[index] == 1))
+        scores.append(LineScore(index, rarity, difficulty))
+    return scores
+
+
+def song_difficulty(scores: List[LineScore]) -> Optional[float]:
+    """Mean difficulty of the lines with words"""
+    sung = [score.difficulty for score in scores if score.difficulty is not None]
+    return sum(sung) / len(sung) if sung else None
+
+
+def suggest_hidden_lines(scores: List[LineScore], difficulty: str, count: int,
+                         suggestions: int = MAX_SUGGESTIONS) -> List[Tuple[List[int], float]]:
+    """Runs of `count` consecutive lines with words whose mean difficulty is the
+    closest to the target, best first, as (line indices, mean difficulty)"""
+    target = DIFFICULTIES[difficulty]
+    runs = []
+    for first in range(len(scores) - count + 1):
+        run = scores[first:first + count]
+        if all(score.difficulty is not None for score in run):
+            mean = sum(score.difficulty for score in run) / count
+            runs.append((abs(mean - target), first, mean))
+    runs.sort()
+    return [(list(range(first, first + count)), mean) for _, first, mean in runs[:suggestions]]
@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Dict, Optional, Set
+import asyncio
+import json
+
+
+DEFAULT_QUEUE_SIZE = 256  # events buffered per subscriber before it is told to resync
+RELAY_INTERVAL = 0.05  # seconds between polls of the shared event table (sqlite backend)
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+def encode_event(event_type: str, data: dict) -> bytes:
+    """Server-sent event frame, encoded once and shared by every subscriber"""
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class Subscription:
+    def __init__(self, broker: "GameEvents", game_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.broker = broker
+        self.game_id = game_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize)
+
+    def deliver(self, payload: bytes):
+        """Runs on the subscriber's event loop"""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what's buffered and have the client refetch once
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class GameEvents:
+    """Per-game fan-out of small typed events to server-sent event streams.
+
+    Endpoints run in the threadpool, so publish() hands each frame to the
+    subscribers' event loop with call_soon_threadsafe. The frame is encoded
+    once per event whatever the number of spectators.
+
+    With a store that shares state between workers (it has poll_events),
+    events are written to the store inside the endpoint's transaction and a
+    relay task in every worker forwards them to its own subscribers.
+    """
+
+    def __init__(self, store, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.store = store
+        self.maxsize = maxsize
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = Lock()
+        self._relay: Optional[asyncio.Task] = None
+        self._local = local()  # .held: events publish() queued for hold()
+
+    @property
+    def shared(self) -> bool:
+        return hasattr(self.store, "poll_events")
+
+    def subscribe(self, game_id: int) -> Subscription:
+        """Must be called from the event loop (i.e. an async endpoint)"""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self, game_id, loop, self.maxsize)
+        with self._lock:
+            self._subscribers.setdefault(game_id, set()).add(subscription)
+        if self.shared and (self._relay is None or self._relay.done()):
+            self._relay = loop.create_task(self._run_relay())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.game_id]
+
+    def subscriber_count(self, game_id: int) -> int:
+        return len(self._subscribers.get(game_id, ()))
+
+    def publish(self, game_id: int, event_type: str, **data):
+        data["game_id"] = game_id
+        payload = encode_event(event_type, data)
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            held.append((game_id, payload))
+        else:
+            self._send(game_id, payload)
+
+    @contextmanager
+    def hold(self):
+        """Queue this thread's publish() calls until the block ends: they go out
+        together if it completes, and not at all if it raises"""
+        held = self._local.held = []
+        try:
+            yield
+        finally:
+            self._local.held = None
+        for game_id, payload in held:
+            self._send(game_id, payload)
+
+    def _send(self, game_id: int, payload: bytes):
+        if self.shared:
+            self.store.publish_event(game_id, payload)
+        else:
+            self._fan_out(game_id, payload)
+
+    def _fan_out(self, game_id: int, payload: bytes):
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, payload)
+
+    async def _run_relay(self):
+        loop = asyncio.get_running_loop()
+        last_id = await loop.run_in_executor(None, self.store.last_event_id)
+        while self._subscribers:
+            await asyncio.sleep(RELAY_INTERVAL)
+            rows = await loop.run_in_executor(None, self.store.poll_events, last_id)
+            for event_id, game_id, payload in rows:
+                last_id = event_id
+                self._fan_out(game_id, payload)
@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+import asyncio
+import os
+
+
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS") or os.cpu_count() or 1)
+
+T = TypeVar("T")
+
+# Sized to the CPUs, unlike the request threadpool (40 threads): a burst of heavy
+# requests queues here instead of taking every thread the cheap ones need
+cpu_executor = ThreadPoolExecutor(CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_cpu(func: Callable[..., T], *args) -> T:
+    """Run CPU-bound work (LRC parsing, fuzzy scoring) off the event loop, CPU_WORKERS at a time"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, func, *args)
@@ -0,0 +1,205 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+import asyncio
+import atexit
+import json
+import multiprocessing
+import os
+import posixpath
+import tarfile
+import zipfile
+
+from executor import cpu_executor
+from lrc import Lyrics, parse_lrc_document
+
+
+IMPORT_BATCH_SIZE = 200  # songs parsed per pool task and committed per transaction
+MAX_ITEM_BYTES = 4 * 1024 * 1024  # larger NDJSON lines or archive members are rejected
+SPOOL_MEMORY = 16 * 1024 * 1024  # archive uploads beyond this are spooled to disk
+DEFAULT_CATEGORY = "Sans catégorie"
+
+FORMATS = ("ndjson", "zip", "tar")
+
+# (item name, song fields or None, parsed lyrics or None, error or None)
+ParsedItem = Tuple[str, Optional[dict], Optional[Lyrics], Optional[str]]
+
+
+def detect_format(requested: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    if requested:
+        return requested if requested in FORMATS else None
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json"):
+        return "ndjson"
+    if content_type in ("application/zip", "application/x-zip-compressed"):
+        return "zip"
+    if content_type in ("application/x-tar", "application/gzip", "application/x-gzip", "application/x-gtar"):
+        return "tar"
+    return None
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Many .lrc files in the wild are Windows-1252 / Latin-1
+        return data.decode("latin-1")
+
+
+def parse_batch(items: List[Tuple[str, object]]) -> List[ParsedItem]:
+    """Runs in a pool worker: decode NDJSON lines and parse every song's LRC.
+
+    An item is either a raw NDJSON line (bytes) or the song fields of an
+    archive member (dict). Failures are reported per item.
+    """
+    parsed = []
+    for name, raw in items:
+        try:
+            data = json.loads(raw) if isinstance(raw, bytes) else raw
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            lrc = data.get("lrc")
+            if not isinstance(lrc, str):
+                raise ValueError("missing 'lrc'")
+            lyrics = parse_lrc_document(lrc).lyrics()
+        except (ValueError, RecursionError) as e:
+            parsed.append((name, None, None, str(e)))
+            continue
+        parsed.append((name, data, lyrics, None))
+    return parsed
+
+
+async def ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, object]]:
+    """Split a streamed NDJSON body into (line number, line) without buffering it whole"""
+    buffer = b""
+    line_no = 0
+    skipping = False  # inside an oversized line, waiting for its end
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                yield f"line {line_no}", ValueError("line too long")
+            elif line.strip():
+                yield f"line {line_no}", line
+        if len(buffer) > MAX_ITEM_BYTES:
+            buffer = b""
+            skipping = True
+    line_no += 1
+    if skipping:
+        yield f"line {line_no}", ValueError("line too long")
+    elif buffer.strip():
+        yield f"line {line_no}", buffer
+
+
+def _song_fields(name: str, data: bytes, default_category: str) -> dict:
+    """Song fields for an .lrc archive member: title from [ti:] or the file name,
+    category from the enclosing folder"""
+    lrc = _decode(data)
+    folder, filename = posixpath.split(name)
+    title = posixpath.splitext(filename)[0]
+    for line in lrc.splitlines()[:20]:
+        if line.lower().startswith("[ti:") and line.rstrip().endswith("]"):
+            title = line.strip()[4:-1].strip() or title
+            break
+    return {
+        "title": title,
+        "category": posixpath.basename(folder) or default_category,
+        "youtube_url": "",
+        "spotify_id": "",
+        "lrc": lrc,
+        "hidden_line_indices": [],
+    }
+
+
+def archive_items(fileobj, kind: str, default_category: str = DEFAULT_CATEGORY) -> Iterator[Tuple[str, object]]:
+    """Yield the .lrc members of a zip or (optionally compressed) tar archive one at a time"""
+    if kind == "zip":
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".lrc"):
+                    continue
+                if info.file_size > MAX_ITEM_BYTES:
+                    yield info.filename, ValueError("file too large")
+                    continue
+                yield info.filename, _song_fields(info.filename, archive.read(info), default_category)
+    else:
+        with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.lower().endswith(".lrc"):
+                    continue
+                if member.size > MAX_ITEM_BYTES:
+                    yield member.name, ValueError("file too large")
+                    continue
+                yield member.name, _song_fields(member.name, archive.extractfile(member).read(), default_category)
+
+
+async def spool(chunks: AsyncIterator[bytes]) -> SpooledTemporaryFile:
+    """Archives need random access (zip's index is at the end): keep small uploads in
+    memory and larger ones in a temporary file"""
+    fileobj = SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+    async for chunk in chunks:
+        fileobj.write(chunk)
+    fileobj.seek(0)
+    return fileobj
+
+
+async def batched(items: AsyncIterator[Tuple[str, object]], size: int = IMPORT_BATCH_SIZE):
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportPool:
+    """Parses import batches in worker processes, a bounded number at a time.
+
+    With a single worker (or a single CPU) batches are parsed in the bounded
+    CPU executor instead, which still keeps the event loop free.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self.workers <= 1:
+            return cpu_executor
+        with self._lock:
+            if self._executor is None:
+                # spawn: the server's threads (store flusher, event relay) must not be forked
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self._executor.shutdown)
+        return self._executor
+
+    async def parse(self, batches) -> AsyncIterator[List[ParsedItem]]:
+        """Parsed batches in input order; at most two per worker are in flight,
+        so memory stays bounded however large the upload"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        in_flight = deque()
+        async for batch in batches:
+            # Items that already failed while being read skip the pool
+            failed = [(name, None, None, str(raw)) for name, raw in batch if isinstance(raw, Exception)]
+            batch = [(name, raw) for name, raw in batch if not isinstance(raw, Exception)]
+            in_flight.append((failed, loop.run_in_executor(executor, parse_batch, batch)))
+            if len(in_flight) >= 2 * max(1, self.workers):
+                failed, future = in_flight.popleft()
+                yield failed + await future
+        while in_flight:
+            failed, future = in_flight.popleft()
+            yield failed + await future
+
+
+import_pool = ImportPool(int(os.environ["IMPORT_WORKERS"]) if os.environ.get("IMPORT_WORKERS") else None)
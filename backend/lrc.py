@@ -0,0 +1,263 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import hashlib
+import re
+
+
+# One timestamped line: first "[mm:ss.xx]" tag, any further timestamp tags, then the text
+LINE_EXP = re.compile(r'^\[(\d+):(\d+)(?:[.:](\d+))?\]((?:\[\d+:\d+(?:[.:]\d+)?\])*)(.*)$', re.MULTILINE)
+TIME_EXP = re.compile(r'\[(\d+):(\d+)(?:[.:](\d+))?\]')
+# Header metadata tag such as "[ar:Artist]" or "[offset:+250]"
+META_EXP = re.compile(r'^\[([A-Za-z#]+):([^\]\n]*)\]', re.MULTILINE)
+# Enhanced LRC word-level timestamp "<mm:ss.xx>"
+WORD_TAG_EXP = re.compile(r'<(\d+):(\d+)(?:[.:](\d+))?>')
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+class LrcWord(NamedTuple):
+    time: int
+    text: str
+
+
+class LrcLine(NamedTuple):
+    time: int
+    text: str
+    words: Tuple[LrcWord, ...] = ()
+
+
+class Lyrics(Sequence):
+    """Compact, immutable list of {"time": ms, "text": str} lines.
+
+    Timestamps live in one array and all the texts in one newline-separated
+    UTF-8 buffer (with start offsets for random access), instead of a dict,
+    an int and a str object per line. Items are built on access, so it can
+    stand in for the List[Dict] it replaces.
+    """
+    __slots__ = ("times", "starts", "blob")
+
+    def __init__(self, times: array, starts: array, blob: bytes):
+        self.times = times
+        self.starts = starts
+        self.blob = blob
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[Tuple[int, str]]) -> "Lyrics":
+        times = array("Q")  # milliseconds; 'I' would overflow on absurd [mm:] tags
+        starts = array("I")
+        texts = []
+        start = 0
+        for time_ms, text in lines:
+            # LRC texts never span lines; anything else is flattened to keep the separator unambiguous
+            encoded = text.replace("\n", " ").encode("utf-8")
+            times.append(time_ms)
+            starts.append(start)
+            texts.append(encoded)
+            start += len(encoded) + 1
+        return cls(times, starts, b"\n".join(texts))
+
+    @classmethod
+    def coerce(cls, value) -> "Lyrics":
+        """Accept a Lyrics as is, or build one from a list of {"time", "text"} dicts"""
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, (list, tuple)):
+            raise ValueError("lyrics must be a list of {time, text} objects")
+        try:
+            return cls.from_lines((int(line["time"]), str(line["text"])) for line in value)
+        except (KeyError, TypeError, OverflowError) as e:
+            raise ValueError(f"invalid lyric line: {e}")
+
+    def time(self, index: int) -> int:
+        return self.times[index]
+
+    def text(self, index: int) -> str:
+        start = self.starts[index]
+        end = self.blob.find(b"\n", start)
+        return self.blob[start:end if end >= 0 else len(self.blob)].decode("utf-8")
+
+    def texts(self) -> List[str]:
+        if not self.times:
+            return []
+        return self.blob.decode("utf-8").split("\n")
+
+    def as_dicts(self) -> List[Dict]:
+        return [{"time": time_ms, "text": text} for time_ms, text in zip(self.times, self.texts())]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the buffers"""
+        return len(self.blob) + self.times.itemsize * len(self.times) + self.starts.itemsize * len(self.starts)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {"time": self.times[index], "text": self.text(index)}
+
+    def __iter__(self):
+        return iter(self.as_dicts())
+
+    def __eq__(self, other):
+        if isinstance(other, Lyrics):
+            return self.times == other.times and self.blob == other.blob
+        if isinstance(other, list):
+            return self.as_dicts() == other
+        return NotImplemented
+
+    def __reduce__(self):
+        return Lyrics, (self.times, self.starts, self.blob)
+
+    def __repr__(self):
+        return f"Lyrics({len(self)} lines)"
+
+
+class LrcDocument(NamedTuple):
+    """Parsed LRC file: time-sorted lines plus the metadata tags found in the header"""
+    lines: Tuple[LrcLine, ...]
+    metadata: Dict[str, str]
+    offset: int
+
+    def as_dicts(self) -> List[Dict]:
+        return [{"time": line.time, "text": line.text} for line in self.lines]
+
+    def lyrics(self) -> Lyrics:
+        return Lyrics.from_lines((line.time, line.text) for line in self.lines)
+
+
+def _to_ms(minutes: str, seconds: str, fraction: Optional[str]) -> int:
+    ms = int(fraction.ljust(3, '0')[:3]) if fraction else 0
+    return int(minutes) * 60 * 1000 + int(seconds) * 1000 + ms
+
+
+def _parse_words(text: str) -> Tuple[str, Tuple[LrcWord, ...]]:
+    """Strip enhanced <mm:ss.xx> tags from a line, returning the plain text and timed words"""
+    parts = WORD_TAG_EXP.split(text)
+    if len(parts) == 1:
+        return text.strip(), ()
+
+    # split() yields [before, m, s, frac, segment, m, s, frac, segment, ...]
+    plain = [parts[0]]
+    words = []
+    for i in range(1, len(parts), 4):
+        segment = parts[i + 3]
+        plain.append(segment)
+        if segment.strip():
+            words.append(LrcWord(_to_ms(parts[i], parts[i + 1], parts[i + 2]), segment.strip()))
+    return ''.join(plain).strip(), tuple(words)
+
+
+def _shift(line: LrcLine, offset: int) -> LrcLine:
+    """Apply an [offset:] adjustment; a positive offset makes lyrics appear sooner"""
+    words = tuple(LrcWord(max(0, w.time - offset), w.text) for w in line.words)
+    return LrcLine(max(0, line.time - offset), line.text, words)
+
+
+def parse_lrc_document(lrc_content: str) -> LrcDocument:
+    """Parse LRC content with a single regex pass over the whole file.
+
+    Handles lines carrying several timestamps ("[00:12.00][01:30.00]Chorus"),
+    metadata tags such as [ar:], [ti:] and [offset:], and enhanced word-level
+    "<mm:ss.xx>" tags. Lines are returned sorted by time.
+    """
+    metadata = {key.lower(): value.strip() for key, value in META_EXP.findall(lrc_content)}
+    lines = []
+    append = lines.append
+    new_line = tuple.__new__
+    in_order = True
+    last_time = -1
+
+    for minutes, seconds, fraction, extra_tags, text in LINE_EXP.findall(lrc_content):
+        ms = int(fraction.ljust(3, '0')[:3]) if fraction else 0
+        time_ms = int(minutes) * 60000 + int(seconds) * 1000 + ms
+        if '<' in text:
+            text, words = _parse_words(text)
+        else:
+            text, words = text.strip(), ()
+
+        if time_ms < last_time:
+            in_order = False
+        last_time = time_ms
+        append(new_line(LrcLine, (time_ms, text, words)))
+
+        if extra_tags:
+            # The same line repeated at other timestamps, e.g. a chorus
+            for extra in TIME_EXP.findall(extra_tags):
+                in_order = False
+                append(new_line(LrcLine, (_to_ms(*extra), text, words)))
+
+    if not in_order:
+        # Stable sort keeps file order for lines sharing a timestamp
+        lines.sort(key=lambda line: line.time)
+
+    offset = 0
+    if "offset" in metadata:
+        try:
+            offset = int(metadata["offset"])
+        except ValueError:
+            offset = 0
+    if offset:
+        lines = [_shift(line, offset) for line in lines]
+
+    return LrcDocument(tuple(lines), metadata, offset)
+
+
+class LrcCache:
+    """Thread-safe LRU of parsed documents keyed by a hash of the LRC content"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, LrcDocument]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(lrc_content: str) -> bytes:
+        return hashlib.blake2b(lrc_content.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, lrc_content: str) -> LrcDocument:
+        key = self.key(lrc_content)
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        # Parse outside the lock so a large upload doesn't block other requests
+        document = parse_lrc_document(lrc_content)
+        with self._lock:
+            self._entries[key] = document
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return document
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+lrc_cache = LrcCache()
+
+
+def parse_lrc(lrc_content: str) -> List[Dict]:
+    """Parse LRC content into array of {time, text} objects"""
+    return lrc_cache.get(lrc_content).as_dicts()
+
+
+def parse_lyrics(lrc_content: str) -> Lyrics:
+    """Parse LRC content into the compact form stored on songs"""
+    return lrc_cache.get(lrc_content).lyrics()
@@ -1,12 +1,43 @@
-from fastapi import FastAPI, HTTPException
+from collections import deque
+from copy import deepcopy
+from functools import wraps
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, PrivateAttr, ValidationError, WithJsonSchema
+from starlette.concurrency import iterate_in_threadpool
+from threading import Thread
+from typing import Annotated, Callable, List, Dict, Hashable, Optional, Tuple
+import asyncio
+import json
+import os
+import sys
 import random
-import re
+import tarfile
+import zipfile
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder gives the same bytes, only slower
+    orjson = None
+
+from catalog import CatalogIndex
+from compression import OFFLOAD_SIZE, CompressedCache, CompressionMiddleware, negotiate
+from difficulty import DIFFICULTIES, analyses, score_lines, song_difficulty, suggest_hidden_lines
+from events import GameEvents
+from executor import run_cpu
+from importer import DEFAULT_CATEGORY, archive_items, batched, detect_format, import_pool, ndjson_items, spool
+from lrc import LrcCache, Lyrics, parse_lyrics
+from metrics import Metrics, MetricsMiddleware, ProfiledRoute, run_in_threadpool
+from scheduler import TurnScheduler
+from scoring import SCORING_MODES, AnswerIndex, build_answer_index, score_attempt
+from search import SearchIndex, matching_line
+from storage import LIBRARY_LOCK, STAT_FIELDS, open_store
+from timeline import LyricTimeline, build_timeline, lyric_events
 
 
 app = FastAPI()
+app.router.route_class = ProfiledRoute
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -22,29 +53,29 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"]
 )
-
-# Utility function to parse LRC content
-def parse_lrc(lrc_content: str):
-    """Parse LRC content into array of {time, text} objects"""
-    lines = lrc_content.split('\n')
-    result = []
-    time_exp = re.compile(r'\[(\d+):(\d+)(?:\.(\d+))?\]')
-    
-    for line in lines:
-        match = time_exp.match(line)
-        if match:
-            min_val = int(match.group(1))
-            sec_val = int(match.group(2))
-            ms_val = int(match.group(3).ljust(3, '0')[:3]) if match.group(3) else 0
-            time_ms = min_val * 60 * 1000 + sec_val * 1000 + ms_val
-            text = time_exp.sub('', line).strip()
-            result.append({"time": time_ms, "text": text})
-    
-    return result
+app.add_middleware(CompressionMiddleware)
+metrics = Metrics()
+if os.environ.get("METRICS", "1") != "0":
+    # Outermost: times compression too, and counts the bytes actually sent
+    app.add_middleware(
+        MetricsMiddleware, metrics=metrics,
+        slow_ms=float(os.environ["PROFILE_SLOW_MS"]) if os.environ.get("PROFILE_SLOW_MS") else None,
+        sample=float(os.environ.get("PROFILE_SAMPLE", 0.01)),
+        profile_dir=os.environ.get("PROFILE_DIR", "profiles"),
+    )
 
 # Data models
+# Stored compactly (see lrc.Lyrics); validated from and serialized to a list of {time, text}
+LyricLines = Annotated[
+    Lyrics,
+    PlainValidator(Lyrics.coerce),
+    PlainSerializer(Lyrics.as_dicts),
+    WithJsonSchema({"type": "array", "items": {"type": "object"}}),
+]
+
 class Song(BaseModel):
     id: int
     title: str
@@ -52,8 +83,39 @@ class Song(BaseModel):
     youtube_url: str
     spotify_id: str
     lrc: str  # LRC file content as string
-    lyrics: List[Dict]  # Parsed lyrics with timing
+    lyrics: LyricLines  # Parsed lyrics with timing
     hidden_line_indices: List[int]  # Indices of lines to hide
+    source_id: Optional[int] = None  # Library song whose lrc/lyrics a game song shares
+    _answers: Optional[AnswerIndex] = PrivateAttr(default=None)
+    _timeline: Optional[LyricTimeline] = PrivateAttr(default=None)
+    _json: Optional[dict] = PrivateAttr(default=None)  # {projection: serialized payload}, see song_json()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Endpoints edit titles and categories in place: the serialized payloads are stale
+        if name[0] != "_":
+            self._json = None
+
+    def answer_index(self) -> AnswerIndex:
+        """Normalized hidden words, built when the song is created or reloaded from storage"""
+        if self._answers is None:
+            self._answers = build_answer_index(self.lyrics, self.hidden_line_indices)
+        return self._answers
+
+    def timeline(self) -> LyricTimeline:
+        """Line times and hidden passages for the singing screen, built on first use"""
+        if self._timeline is None:
+            self._timeline = build_timeline(self.lyrics, self.hidden_line_indices)
+        return self._timeline
+
+class SongSummary(BaseModel):
+    """What song pickers need; the lyrics come from select_song"""
+    id: int
+    title: str
+    category: str
+
+class CategorySongs(BaseModel):
+    songs: List[SongSummary]
 
 class Category(BaseModel):
     name: str
@@ -66,6 +128,8 @@ class Player(BaseModel):
 class CategorySelection(BaseModel):
     category: str
 
+CHANGE_LOG_SIZE = 256  # versions a client can lag behind before /changes sends the full game
+
 class Game(BaseModel):
     id: int
     name: str
@@ -78,13 +142,313 @@ class Game(BaseModel):
     players_played_this_round: List[str]  # Track who has played in current round
     state: str  # 'waiting', 'playing', 'finished'
     scores: Dict[str, int]
+    # Attempt totals per player ({"attempts", "scored", "words", "correct_words"}), see count_attempt();
+    # None for games from before player stats, whose scores aren't in the totals until next changed
+    player_stats: Optional[Dict[str, Dict[str, int]]] = None
+    scoring_mode: str = "exact"  # 'exact' (word by word) or 'fuzzy' (aligned, typo-tolerant)
+    seed: Optional[int] = None  # Turn order seed; games from before it use their id
+    version: int = 0  # Bumped by save_game() on every change; drives ETag and /changes
+    catalog_version: int = 0  # Version of the last change to songs or categories; drives their ETags
+    # (version, fields, changed song ids, deleted song ids) for the most recent changes
+    _changes: deque = PrivateAttr(default_factory=lambda: deque(maxlen=CHANGE_LOG_SIZE))
+    _payload: Optional[tuple] = PrivateAttr(default=None)  # (version, {projection: serialized JSON})
+    _catalog: Optional[CatalogIndex] = PrivateAttr(default=None)
+    _turns: Optional[TurnScheduler] = PrivateAttr(default=None)
+    _search: Optional[tuple] = PrivateAttr(default=None)  # (version, SearchIndex), see game_search_index()
+
+    def catalog(self) -> CatalogIndex:
+        """Category membership index; mutate through it, save_game() writes it back to categories"""
+        catalog = self._catalog
+        if catalog is None:
+            # Reads build it too: under the game's lock, so a mutation can't land halfway through
+            with store.game_lock(self.id):
+                catalog = self._catalog
+                if catalog is None:
+                    catalog = self._catalog = CatalogIndex.build(self.categories, self.songs)
+        return catalog
+
+    def turns(self) -> TurnScheduler:
+        """Turn order and played players/categories, rebuilt from the saved fields when loaded"""
+        turns = self._turns
+        if turns is None:
+            turns = self._turns = TurnScheduler(
+                self.seed if self.seed is not None else self.id, self.current_round,
+                (p.username for p in self.players), self.players_played_this_round, self.played_categories)
+        return turns
+
+# In-memory storage, recovered from disk when STORAGE_BACKEND=log and shared
+# between workers when STORAGE_BACKEND=sqlite
+store = open_store()
+songs: Dict[int, Song]
+categories: Dict[str, Category]
+games: Dict[int, Game]
+contents: Dict[int, Song]  # lyrics of game songs the library doesn't list, see shared_song()
+def reference_song(library: Song, song_id: int, **overrides) -> Song:
+    """A game's copy of a library song: its own id and fields (title, category,
+    hidden lines...) but the library's lrc and lyrics objects, not copies"""
+    return Song(id=song_id, lrc=library.lrc, lyrics=library.lyrics, source_id=library.id, **overrides)
+
+SONG_CONTENT = {"lrc", "lyrics"}
+
+def dump_game_song(song: Song) -> dict:
+    """Game songs that reference the library are stored without their lyrics"""
+    if song.source_id is not None:
+        return song.dict(exclude=SONG_CONTENT)
+    return song.dict()
+
+def load_game_song(data: dict, library: Dict[int, Song]) -> Song:
+    if "lrc" in data:
+        return Song(**data)
+    overrides = {k: v for k, v in data.items() if k not in ("id", "source_id")}
+    return reference_song(library[data["source_id"]], data["id"], **overrides)
+
+songs, categories, games, contents = store.open(Song, Category, Game, load_game_song, dump_game_song)
+events = GameEvents(store)
+
+def in_memory(game_id: Optional[int]) -> bool:
+    """Whether looking the game up is a dict read. An archived game is restored from
+    disk by its lookup, which belongs in the threadpool rather than on the event loop."""
+    return store.in_process and (game_id is None or games.is_resident(game_id))
+
+def loop_read(func):
+    """Serve a read-only endpoint on the event loop, without a threadpool round trip, when
+    lookups are in-process dict reads; with SQLite it stays a threadpool endpoint"""
+    if not store.in_process:
+        return func
+
+    @wraps(func)
+    async def endpoint(*args, **kwargs):
+        if in_memory(kwargs.get("game_id")):
+            return func(*args, **kwargs)
+        return await run_in_threadpool(func, *args, **kwargs)
+    return endpoint
+
+async def lookup(func, *args):
+    """Call func(*args), which reads songs/categories, from an async endpoint"""
+    if store.in_process:
+        return func(*args)
+    return await run_in_threadpool(func, *args)
+
+async def game_lookup(func, game_id: int, *args):
+    """Call func(game_id, *args), which reads the game, from an async endpoint"""
+    if in_memory(game_id):
+        return func(game_id, *args)
+    return await run_in_threadpool(func, game_id, *args)
+
+async def game_atomic(func, game_id: int, *args):
+    """Call a @store.atomic helper taking game_id: right here when the game is in memory and
+    nobody holds its lock (it only touches memory then), otherwise in the threadpool"""
+    if in_memory(game_id):
+        lock = store.game_lock(game_id)
+        if lock.acquire(blocking=False):
+            try:
+                return func(game_id, *args)
+            finally:
+                lock.release()
+    return await run_in_threadpool(func, game_id, *args)
+
+def find_game(game_id: int) -> Game:
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return games[game_id]
+
+def save_game(game: Game, *fields: str, songs=(), deleted_songs=()):
+    """Bump the game's version, remember what changed for /changes and persist it"""
+    catalog = game._catalog
+    if catalog is not None:
+        catalog.sync(game.categories, Category)
+    game.version += 1
+    if not fields or "categories" in fields or songs or deleted_songs:
+        game.catalog_version = game.version
+    game._changes.append((game.version, fields, tuple(songs), tuple(deleted_songs)))
+    store.save_game(game)
+
+# --- Game serialization ---
+SONG_FIELDS = ("id", "title", "category", "youtube_url", "spotify_id", "lrc", "lyrics", "hidden_line_indices",
+               "source_id")
+SONG_SUMMARY_FIELDS = ("id", "title", "category")
+GAME_FIELDS = ("id", "name", "players", "songs", "categories", "played_categories", "current_round",
+               "current_player", "players_played_this_round", "state", "scores", "player_stats", "scoring_mode",
+               "seed", "version")
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. id,title,category"
+
+def parse_fields(fields: Optional[str], allowed: tuple) -> Optional[tuple]:
+    """Validate a ?fields= projection; None means every field"""
+    if fields is None:
+        return None
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return requested
+
+def song_payload(song: Song, fields: Optional[tuple] = None) -> dict:
+    if fields is not None:
+        return {f: song.lyrics.as_dicts() if f == "lyrics" else getattr(song, f) for f in fields}
+    return {
+        "id": song.id,
+        "title": song.title,
+        "category": song.category,
+        "youtube_url": song.youtube_url,
+        "spotify_id": song.spotify_id,
+        "lrc": song.lrc,
+        "lyrics": song.lyrics.as_dicts(),
+        "hidden_line_indices": song.hidden_line_indices,
+        "source_id": song.source_id
+    }
+
+def song_json(song: Song, fields: Optional[tuple] = None) -> bytes:
+    """Serialized song_payload(), kept on the song until one of its fields changes"""
+    cached = song._json
+    if cached is None:
+        cached = song._json = {}
+    body = cached.get(fields)
+    if body is None:
+        body = cached[fields] = encode_json(song_payload(song, fields))
+    return body
+
+def json_array(items) -> bytes:
+    """JSON array stitched from already serialized items"""
+    return b"[" + b",".join(items) + b"]"
+
+def song_response(song: Song) -> Response:
+    return Response(content=song_json(song), media_type="application/json")
+
+def songs_response(request: Request, etag: str, song_list: Callable[[], list], fields: Optional[str]) -> Response:
+    projection = parse_fields(fields, SONG_FIELDS)
+    return catalog_response(request, projected_etag(etag, projection),
+                            lambda: json_array([song_json(s, projection) for s in song_list()]), projection)
+
+def game_field(game: Game, field: str):
+    if field == "players":
+        return [{"username": p.username, "picture_url": p.picture_url} for p in game.players]
+    if field == "categories":
+        # Ensure categories are properly formatted as a dict with string keys
+        return {name: {"name": c.name, "song_ids": c.song_ids} for name, c in game.categories.items()}
+    return getattr(game, field)
+
+def game_payload(game: Game, fields: Optional[tuple] = None, song_fields: Optional[tuple] = None) -> dict:
+    payload = {}
+    for field in fields or GAME_FIELDS:
+        if field == "songs":
+            payload["songs"] = {str(k): song_payload(v, song_fields) for k, v in game.songs.items()}
+        else:
+            payload[field] = game_field(game, field)
+    return payload
+
+def encode_game(game: Game, fields: Optional[tuple] = None, song_fields: Optional[tuple] = None) -> bytes:
+    """encode_json(game_payload(...)), with the songs stitched from their cached payloads"""
+    parts = []
+    for field in fields or GAME_FIELDS:
+        if field == "songs":
+            value = b"{" + b",".join(b'"%d":%s' % (k, song_json(v, song_fields)) for k, v in game.songs.items()) + b"}"
+        else:
+            value = encode_json(game_field(game, field))
+        parts.append(b'"%s":%s' % (field.encode(), value))
+    return b"{" + b",".join(parts) + b"}"
+
+def encode_json(payload) -> bytes:
+    # Same output as FastAPI's JSONResponse
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer beyond 64 bits: the stdlib handles it
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def cached_game_json(game: Game, fields: Optional[tuple] = None,
+                     song_fields: Optional[tuple] = None) -> Optional[Tuple[int, bytes]]:
+    """(version, body) if the current version is already serialized; doesn't wait for the game's lock"""
+    cached = game._payload
+    if cached is not None and cached[0] == game.version:
+        body = cached[1].get((fields, song_fields))
+        if body is not None:
+            return cached[0], body
+    return None
+
+def game_json(game: Game, fields: Optional[tuple] = None, song_fields: Optional[tuple] = None,
+              blocking: bool = True) -> Optional[Tuple[int, bytes]]:
+    """Serialized game (or projection of it) and its version, memoized until the version changes.
+
+    With blocking=False, None if the game's lock is taken instead of waiting for it.
+    """
+    cached = cached_game_json(game, fields, song_fields)
+    if cached is not None:
+        return cached
+    # Under the game's lock, so the body isn't taken halfway through a mutation
+    # and matches the version it is cached for
+    lock = store.game_lock(game.id)
+    if not lock.acquire(blocking):
+        return None
+    try:
+        cached = game._payload
+        if cached is None or cached[0] != game.version:
+            cached = (game.version, {})
+            game._payload = cached
+        key = (fields, song_fields)
+        body = cached[1].get(key)
+        if body is None:
+            body = encode_game(game, fields, song_fields)
+            cached[1][key] = body
+    finally:
+        lock.release()
+    return cached[0], body
+
+def game_etag(game_id: int, version: int) -> str:
+    # The store's epoch: a restarted in-memory store counts versions (and ids) from 1 again
+    return f'"{store.epoch}g{game_id}v{version}"'
+
+def projected_etag(etag: str, *projections: Optional[tuple]) -> str:
+    """The ETag of one ?fields= projection of a body. Each projection is a different body, so
+    one never validates another; no commas, they separate the tags of If-None-Match."""
+    if all(projection is None for projection in projections):
+        return etag
+    suffix = ";".join("*" if projection is None else "+".join(projection) for projection in projections)
+    return f'{etag[:-1]};{suffix}"'
+
+def game_headers(game_id: int, version: int, *projections: Optional[tuple]) -> dict:
+    # no-cache: browsers may keep the body but must revalidate it with If-None-Match
+    return {"ETag": projected_etag(game_etag(game_id, version), *projections), "Cache-Control": "no-cache"}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+# Compressed variants of the bodies below, keyed by ETag so edits never serve stale ones
+precompressed = CompressedCache()
+
+def encoded_response(request: Request, headers: dict, key: Hashable, build: Callable[[], bytes]) -> Response:
+    """A cacheable JSON body, compressed once per ETag for clients that accept it"""
+    headers = dict(headers, Vary="Accept-Encoding")
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return Response(content=build(), media_type="application/json", headers=headers)
+    content, used = precompressed.get((headers["ETag"], key), encoding, build)
+    if used is not None:
+        headers["Content-Encoding"] = used
+    return Response(content=content, media_type="application/json", headers=headers)
 
-# In-memory storage
-songs: Dict[int, Song] = {}
-categories: Dict[str, Category] = {}
-games: Dict[int, Game] = {}
-song_counter = 1
-game_counter = 1
+def library_etag() -> str:
+    # Library songs are only ever added, so their count identifies the catalog (within the
+    # store's epoch, see game_etag())
+    return f'"{store.epoch}l{len(songs)}"'
+
+def catalog_etag(game: Game) -> str:
+    return f'"{store.epoch}g{game.id}c{game.catalog_version}"'
+
+def catalog_response(request: Request, etag: str, build: Callable[[], bytes],
+                     fields: Optional[tuple] = None) -> Response:
+    """Songs/categories read: 304 while the client's copy is current, built only when it isn't"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return encoded_response(request, headers, (request.url.path, fields), build)
+
+def categories_json(category_list) -> bytes:
+    return encode_json([{"name": c.name, "song_ids": c.song_ids} for c in category_list])
 
 # --- Song & Category Management ---
 class SongCreate(BaseModel):
@@ -95,57 +459,215 @@ class SongCreate(BaseModel):
     lrc: str
     hidden_line_indices: List[int]
 
-@app.post("/songs", response_model=Song)
-def add_song(song: SongCreate):
-    global song_counter
-    song_id = song_counter
-    song_counter += 1
-    lyrics = parse_lrc(song.lrc)
-    new_song = Song(id=song_id, lyrics=lyrics, **song.dict())
-    songs[song_id] = new_song
-    # Add to category
-    if song.category not in categories:
-        categories[song.category] = Category(name=song.category, song_ids=[])
-    categories[song.category].song_ids.append(song_id)
+def song_key(lrc: str) -> str:
+    return LrcCache.key(lrc).hex()
+
+def create_library_song(song: SongCreate, lyrics: Optional[Lyrics] = None) -> Song:
+    song_id = store.next_id("song")
+    new_song = Song(id=song_id, lyrics=lyrics if lyrics is not None else parse_lyrics(song.lrc), **song.dict())
+    new_song.answer_index()
+    with store.lock(LIBRARY_LOCK):
+        songs[song_id] = new_song
+        # Add to category
+        if song.category not in categories:
+            categories[song.category] = Category(name=song.category, song_ids=[])
+        categories[song.category].song_ids.append(song_id)
+        store.save_song(new_song)
+        store.save_category(categories[song.category])
+        # Game songs with these lyrics now share the listed song; an unlisted content keeps its own
+        key = song_key(song.lrc)
+        if store.find_song(key) not in songs:
+            store.save_song_key(key, song_id)
     return new_song
 
+def create_content(song: SongCreate, lyrics: Optional[Lyrics] = None) -> Song:
+    content = Song(id=store.next_id("song"), lyrics=lyrics if lyrics is not None else parse_lyrics(song.lrc),
+                   **song.dict())
+    contents[content.id] = content
+    store.save_content(content)
+    store.save_song_key(song_key(song.lrc), content.id)
+    return content
+
+def shared_song(song: SongCreate, lyrics: Optional[Lyrics] = None) -> Song:
+    """The library song with this LRC, else the unlisted content holding it, one more
+    game song now referencing it (see release_song)"""
+    key = song_key(song.lrc)
+    song_id = store.find_song(key)
+    if song_id is not None and song_id in songs:
+        return songs[song_id]
+    # Requests for other games may be adding or releasing the same content right now
+    with store.lock(LIBRARY_LOCK):
+        song_id = store.find_song(key)
+        if song_id is not None and song_id in songs:
+            return songs[song_id]
+        content = contents.get(song_id) if song_id is not None else None
+        if content is None:
+            content = create_content(song, lyrics)
+        store.ref_content(content.id, 1)
+        return content
+
+def release_song(song: Song):
+    """Drop a game song's reference to its content, deleting the content with the last one"""
+    if song.source_id is None:
+        return
+    with store.lock(LIBRARY_LOCK):
+        if song.source_id not in contents or store.ref_content(song.source_id, -1) > 0:
+            return
+        key = song_key(song.lrc)
+        if store.find_song(key) == song.source_id:
+            store.delete_song_key(key)
+        del contents[song.source_id]
+        store.delete_content(song.source_id)
+
+def game_song(song_id: int, song: SongCreate, lyrics: Optional[Lyrics] = None) -> Song:
+    """A game song for `song`: shared content, this game's own fields on top"""
+    new_song = reference_song(shared_song(song, lyrics), song_id, **song.dict(exclude=SONG_CONTENT))
+    new_song.answer_index()
+    return new_song
+
+def in_library(lrc: str) -> bool:
+    """Whether this LRC is parsed already, in a listed song or an unlisted content"""
+    song_id = store.find_song(song_key(lrc))
+    return song_id is not None and (song_id in songs or song_id in contents)
+
+async def new_lyrics(lrc: str) -> Optional[Lyrics]:
+    """Parsed lyrics for an LRC the library doesn't have yet (None if it does), parsed on the CPU executor"""
+    if await lookup(in_library, lrc):
+        return None
+    return await run_cpu(parse_song, lrc)
+
+@app.post("/songs", response_model=Song)
+async def add_song(song: SongCreate):
+    lyrics = await run_cpu(parse_song, song.lrc)
+    return song_response(await run_in_threadpool(commit_song, song, lyrics))
+
+@store.atomic
+def commit_song(song: SongCreate, lyrics: Lyrics) -> Song:
+    return create_library_song(song, lyrics)
+
 @app.get("/categories", response_model=List[Category])
-def get_categories():
-    return list(categories.values())
+@loop_read
+def get_categories(request: Request):
+    return catalog_response(request, library_etag(), lambda: categories_json(categories.values()))
 
 @app.get("/songs", response_model=List[Song])
-def get_songs():
-    return list(songs.values())
+def get_songs(request: Request, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    return songs_response(request, library_etag(), lambda: songs.values(), fields)
 
 @app.get("/categories/{category_name}/songs", response_model=List[Song])
-def get_songs_by_category(category_name: str):
+def get_songs_by_category(category_name: str, request: Request,
+                          fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     if category_name not in categories:
         raise HTTPException(status_code=404, detail="Category not found")
-    return [songs[sid] for sid in categories[category_name].song_ids]
+    return songs_response(request, library_etag(),
+                          lambda: [songs[sid] for sid in categories[category_name].song_ids], fields)
+
+# --- Search ---
+library_index = SearchIndex()
+
+def library_search_index() -> SearchIndex:
+    """The library's search index, caught up with the songs added since the last search.
+
+    Library songs are only ever added, so a count that differs from the
+    library's means some (possibly added by another worker) aren't indexed yet.
+    """
+    if len(library_index) != len(songs):
+        with library_index.lock:
+            for song_id in list(songs):
+                if song_id not in library_index:
+                    song = songs[song_id]
+                    library_index.add(song_id, song.title, song.lyrics.texts())
+    return library_index
+
+if len(songs):
+    # A recovered library is indexed in the background rather than by the first search
+    Thread(target=library_search_index, name="search-indexer", daemon=True).start()
+
+def game_search_index(game: Game) -> SearchIndex:
+    """The game's search index, built on first use, then kept current by re-indexing
+    the songs its change log says were added, edited or deleted since"""
+    cached = game._search
+    if cached is not None and cached[0] >= game.catalog_version:
+        return cached[1]
+    with store.game_lock(game.id):
+        version, index = game._search or (0, None)
+        changes = [c for c in game._changes if c[0] > version]
+        if index is None or (changes and changes[0][0] != version + 1):
+            index = SearchIndex()
+            changed, deleted = set(game.songs), set()
+        else:
+            changed, deleted = set(), set()
+            for _, _, entry_songs, entry_deleted in changes:
+                changed.update(entry_songs)
+                deleted.update(entry_deleted)
+        with index.lock:
+            for song_id in deleted | changed:
+                song = game.songs.get(song_id)
+                if song is None:
+                    index.remove(song_id)
+                else:
+                    index.add(song_id, song.title, song.lyrics.texts())
+        game._search = (game.version, index)
+    return index
+
+class SongMatch(BaseModel):
+    id: int
+    title: str
+    category: str
+    score: float
+    line: Optional[str] = None  # first lyric line holding a query word; None for title-only matches
+
+@app.get("/search", response_model=List[SongMatch])
+def search_songs(response: Response,
+                 q: str = Query(..., description="Words from a title or the lyrics; the last may be partial"),
+                 game_id: Optional[int] = Query(None, description="Search this game's songs instead of the library"),
+                 offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    """Songs holding every word of q (or a word starting with it), accents and case
+    ignored, best matches first; X-Total-Count has the number of matching songs"""
+    if game_id is None:
+        index, song_map = library_search_index(), songs
+    else:
+        game = find_game(game_id)
+        index, song_map = game_search_index(game), game.songs
+    total, page = index.search(q, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    results = []
+    for song_id, score in page:
+        song = song_map.get(song_id)
+        if song is not None:
+            results.append(SongMatch(id=song.id, title=song.title, category=song.category, score=round(score, 3),
+                                     line=matching_line(song.lyrics.texts(), q)))
+    return results
 
 # --- Game-specific Song & Category Management ---
 @app.post("/games/{game_id}/songs", response_model=Song)
-def add_song_to_game(game_id: int, song: SongCreate):
-    global song_counter
+async def add_song_to_game(game_id: int, song: SongCreate):
+    lyrics = await new_lyrics(song.lrc)
+    return song_response(await run_in_threadpool(commit_game_song, game_id, song, lyrics))
+
+@store.atomic
+def commit_game_song(game_id: int, song: SongCreate, lyrics: Optional[Lyrics]) -> Song:
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
     game = games[game_id]
-    song_id = song_counter
-    song_counter += 1
-    lyrics = parse_lrc(song.lrc)
-    new_song = Song(id=song_id, lyrics=lyrics, **song.dict())
+    song_id = store.next_id("song")
+    new_song = game_song(song_id, song, lyrics)
     game.songs[song_id] = new_song
-    
-    # Add to game-specific category
-    if song.category not in game.categories:
-        game.categories[song.category] = Category(name=song.category, song_ids=[])
-    game.categories[song.category].song_ids.append(song_id)
+    game.catalog().add(song_id, song.category)
+    store.save_game_song(game_id, new_song)
+    save_game(game, "categories", songs=[song_id])
+    events.publish(game_id, "catalog_changed", version=game.version, song_id=song_id)
     
     return new_song
 
 @app.put("/games/{game_id}/songs/{song_id}", response_model=Song)
-def update_song_in_game(game_id: int, song_id: int, song: SongCreate):
+async def update_song_in_game(game_id: int, song_id: int, song: SongCreate):
+    lyrics = await new_lyrics(song.lrc)
+    return song_response(await run_in_threadpool(commit_song_update, game_id, song_id, song, lyrics))
+
+@store.atomic
+def commit_song_update(game_id: int, song_id: int, song: SongCreate, lyrics: Optional[Lyrics]) -> Song:
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
@@ -153,33 +675,20 @@ def update_song_in_game(game_id: int, song_id: int, song: SongCreate):
     if song_id not in game.songs:
         raise HTTPException(status_code=404, detail="Song not found in this game")
     
-    old_song = game.songs[song_id]
-    old_category = old_song.category
-    
-    # Parse new lyrics
-    lyrics = parse_lrc(song.lrc)
-    updated_song = Song(id=song_id, lyrics=lyrics, **song.dict())
+    # Unchanged lyrics keep pointing at the same library song; only this game's fields change
+    updated_song = game_song(song_id, song, lyrics)
+    release_song(game.songs[song_id])
     game.songs[song_id] = updated_song
+    # Moving to another category drops the old one once empty
+    game.catalog().move(song_id, song.category)
     
-    # Handle category changes
-    if old_category != song.category:
-        # Remove from old category
-        if old_category in game.categories:
-            game.categories[old_category].song_ids = [
-                sid for sid in game.categories[old_category].song_ids if sid != song_id
-            ]
-            # Remove category if it becomes empty
-            if not game.categories[old_category].song_ids:
-                del game.categories[old_category]
-        
-        # Add to new category
-        if song.category not in game.categories:
-            game.categories[song.category] = Category(name=song.category, song_ids=[])
-        game.categories[song.category].song_ids.append(song_id)
-    
+    store.save_game_song(game_id, updated_song)
+    save_game(game, "categories", songs=[song_id])
+    events.publish(game_id, "catalog_changed", version=game.version, song_id=song_id)
     return updated_song
 
 @app.delete("/games/{game_id}/songs/{song_id}")
+@store.atomic
 def delete_song_from_game(game_id: int, song_id: int):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -188,55 +697,283 @@ def delete_song_from_game(game_id: int, song_id: int):
     if song_id not in game.songs:
         raise HTTPException(status_code=404, detail="Song not found in this game")
     
-    song = game.songs[song_id]
-    category = song.category
-    
-    # Remove song
-    del game.songs[song_id]
-    
-    # Remove from category
-    if category in game.categories:
-        game.categories[category].song_ids = [
-            sid for sid in game.categories[category].song_ids if sid != song_id
-        ]
-        # Remove category if it becomes empty
-        if not game.categories[category].song_ids:
-            del game.categories[category]
+    # Remove song, and its category once empty
+    release_song(game.songs.pop(song_id))
+    game.catalog().remove(song_id)
     
+    store.delete_game_song(game_id, song_id)
+    save_game(game, "categories", deleted_songs=[song_id])
+    events.publish(game_id, "catalog_changed", version=game.version, song_id=song_id)
     return {"message": "Song deleted successfully"}
 
-@app.get("/games/{game_id}/categories", response_model=List[Category])
-def get_game_categories(game_id: int):
+class SongPatch(BaseModel):
+    id: int
+    title: Optional[str] = None
+    category: Optional[str] = None
+
+class SongsPatch(BaseModel):
+    songs: List[SongPatch]
+
+class SongIds(BaseModel):
+    song_ids: List[int]
+
+def check_game_songs(game: Game, song_ids) -> None:
+    """Batch edits apply to all their songs or to none"""
+    missing = [song_id for song_id in song_ids if song_id not in game.songs]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Song(s) not found in this game: {', '.join(map(str, missing))}")
+
+@app.patch("/games/{game_id}/songs")
+@store.atomic
+def update_songs_in_game(game_id: int, patch: SongsPatch):
+    """Rename and/or move many songs at once; emptied categories are removed"""
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
-    return list(games[game_id].categories.values())
+    
+    game = games[game_id]
+    check_game_songs(game, [p.id for p in patch.songs])
+    catalog = game.catalog()
+    updated = {}
+    for p in patch.songs:
+        song = game.songs[p.id]
+        if p.title is not None:
+            song.title = p.title
+        if p.category is not None:
+            song.category = p.category
+            catalog.move(p.id, p.category)
+        updated[p.id] = song
+    
+    for song in updated.values():
+        store.save_game_song(game_id, song)
+    save_game(game, "categories", songs=list(updated))
+    events.publish(game_id, "catalog_changed", version=game.version, song_ids=list(updated))
+    return {"updated": list(updated)}
 
-@app.get("/games/{game_id}/songs", response_model=List[Song])
-def get_game_songs(game_id: int):
+@app.post("/games/{game_id}/songs/delete")
+@store.atomic
+def delete_songs_from_game(game_id: int, selection: SongIds):
+    """Delete many songs at once; emptied categories are removed"""
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
-    return list(games[game_id].songs.values())
+    
+    game = games[game_id]
+    check_game_songs(game, selection.song_ids)
+    catalog = game.catalog()
+    deleted = list(dict.fromkeys(selection.song_ids))
+    for song_id in deleted:
+        release_song(game.songs.pop(song_id))
+        catalog.remove(song_id)
+        store.delete_game_song(game_id, song_id)
+    
+    save_game(game, "categories", deleted_songs=deleted)
+    events.publish(game_id, "catalog_changed", version=game.version, song_ids=deleted)
+    return {"deleted": deleted}
 
-@app.get("/games/{game_id}/categories/{category_name}/songs", response_model=List[Song])
-def get_game_songs_by_category(game_id: int, category_name: str):
+# --- Hidden line difficulty ---
+MAX_HIDDEN_LINES = 8
+
+class LrcContent(BaseModel):
+    lrc: str
+
+class LineDifficulty(BaseModel):
+    index: int
+    text: str
+    words: int
+    duration_ms: int  # until the next line
+    repeats: int  # lines of the song with the same words, this one included
+    rarity: float  # 0 (words in every library song) to 1 (in none)
+    difficulty: Optional[float] = None  # 0 to 1; None for lines without words, never hidden
+
+class HiddenLinesSuggestion(BaseModel):
+    hidden_line_indices: List[int]
+    difficulty: float
+
+class HiddenLinesReport(BaseModel):
+    difficulty: Optional[float] = None  # the whole song's
+    lines: List[LineDifficulty]
+    suggestions: List[HiddenLinesSuggestion]  # closest to the target difficulty first
+
+def check_difficulty(difficulty: str):
+    if difficulty not in DIFFICULTIES:
+        raise HTTPException(status_code=400, detail=f"Unknown difficulty: {difficulty}")
+
+def parse_song(lrc: str) -> Lyrics:
+    """parse_lyrics, plus the per-line analysis hidden line suggestions need, cached by content"""
+    lyrics = parse_lyrics(lrc)
+    analyses.get(lrc, lyrics)
+    return lyrics
+
+def hidden_lines_report(lrc: str, lyrics: Lyrics, difficulty: str, count: int) -> HiddenLinesReport:
+    """Line difficulties and the runs of `count` lines closest to the target. Word
+    rarity comes from the library's search index, which is kept current one song at a time."""
+    analysis = analyses.get(lrc, lyrics)
+    index = library_search_index()
+    scores = score_lines(analysis, index.frequency, len(index))
+    lines = [LineDifficulty(index=i, text=text, words=analysis.words[i], duration_ms=analysis.durations[i],
+                            repeats=analysis.repeats[i], rarity=round(score.rarity, 3),
+                            difficulty=None if score.difficulty is None else round(score.difficulty, 3))
+             for i, (text, score) in enumerate(zip(lyrics.texts(), scores))]
+    overall = song_difficulty(scores)
+    return HiddenLinesReport(
+        difficulty=None if overall is None else round(overall, 3), lines=lines,
+        suggestions=[HiddenLinesSuggestion(hidden_line_indices=indices, difficulty=round(mean, 3))
+                     for indices, mean in suggest_hidden_lines(scores, difficulty, count)])
+
+@app.post("/lyrics/hidden_lines", response_model=HiddenLinesReport)
+async def suggest_lrc_hidden_lines(content: LrcContent, difficulty: str = Query("medium"),
+                                   count: int = Query(2, ge=1, le=MAX_HIDDEN_LINES)):
+    """Hidden lines for lyrics being edited, before the song is saved"""
+    check_difficulty(difficulty)
+    lyrics = await run_cpu(parse_song, content.lrc)
+    return await run_in_threadpool(hidden_lines_report, content.lrc, lyrics, difficulty, count)
+
+@app.get("/games/{game_id}/songs/{song_id}/hidden_lines", response_model=HiddenLinesReport)
+def suggest_game_hidden_lines(game_id: int, song_id: int, difficulty: str = Query("medium"),
+                              count: int = Query(2, ge=1, le=MAX_HIDDEN_LINES)):
+    check_difficulty(difficulty)
+    song = find_game_song(game_id, song_id)
+    return hidden_lines_report(song.lrc, song.lyrics, difficulty, count)
+
+@app.post("/games/{game_id}/songs/{song_id}/hidden_lines", response_model=Song)
+async def pick_hidden_lines(game_id: int, song_id: int, difficulty: str = Query("medium"),
+                            count: int = Query(2, ge=1, le=MAX_HIDDEN_LINES)):
+    """Hide the best suggested run of lines for the target difficulty"""
+    check_difficulty(difficulty)
+    song = await game_lookup(find_game_song, game_id, song_id)
+    # Scored outside the game's lock: it reads the library's search index, which may be building
+    report = await run_in_threadpool(hidden_lines_report, song.lrc, song.lyrics, difficulty, count)
+    if not report.suggestions:
+        raise HTTPException(status_code=400, detail=f"No {count} consecutive lines with words in this song")
+    return song_response(await run_in_threadpool(
+        commit_hidden_lines, game_id, song_id, song.lrc, report.suggestions[0].hidden_line_indices))
+
+@store.atomic
+def commit_hidden_lines(game_id: int, song_id: int, lrc: str, hidden_line_indices: List[int]) -> Song:
+    song = find_game_song(game_id, song_id)
+    if song.lrc != lrc:
+        raise HTTPException(status_code=409, detail="The song's lyrics changed meanwhile, pick again")
+
+    game = games[game_id]
+    # A new song rather than an edit in place: its answers and timeline follow the hidden lines
+    updated_song = Song(**dict(song.dict(exclude=SONG_CONTENT), lrc=song.lrc, lyrics=song.lyrics,
+                               hidden_line_indices=hidden_line_indices))
+    updated_song.answer_index()
+    game.songs[song_id] = updated_song
+    store.save_game_song(game_id, updated_song)
+    save_game(game, "categories", songs=[song_id])
+    events.publish(game_id, "catalog_changed", version=game.version, song_id=song_id)
+    return updated_song
+
+MAX_REPORTED_ERRORS = 1000
+
+@store.atomic
+def commit_import(game_id: int, batch: list):
+    """Add one parsed import batch to a game in a single transaction; returns (song ids, errors)"""
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
+    
     game = games[game_id]
+    added = []
+    errors = []
+    for name, data, lyrics, error in batch:
+        if error is None:
+            try:
+                song = SongCreate(**data)
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        if error is not None:
+            errors.append({"item": name, "error": error})
+            continue
+        
+        song_id = store.next_id("song")
+        new_song = game_song(song_id, song, lyrics)
+        game.songs[song_id] = new_song
+        game.catalog().add(song_id, song.category)
+        store.save_game_song(game_id, new_song)
+        added.append(song_id)
+    
+    if added:
+        save_game(game, "categories", songs=added)
+        events.publish(game_id, "catalog_changed", version=game.version, song_ids=added)
+    return added, errors
+
+@app.post("/games/{game_id}/songs/import")
+async def import_songs_to_game(
+    game_id: int,
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson, zip or tar; guessed from Content-Type when omitted"),
+    category: str = Query(DEFAULT_CATEGORY, description="Category for archive files not inside a folder"),
+):
+    """Bulk import from a streamed NDJSON body (one SongCreate per line) or a zip/tar of .lrc files.
+
+    Songs are parsed in a process pool and committed in batches; items that
+    fail are reported and skipped without failing the rest of the import.
+    """
+    kind = detect_format(format, request.headers.get("content-type"))
+    if kind is None:
+        raise HTTPException(status_code=400, detail="Unsupported import format, use ?format=ndjson, zip or tar")
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    upload = None
+    if kind == "ndjson":
+        items = ndjson_items(request.stream())
+    else:
+        upload = await spool(request.stream())
+        items = iterate_in_threadpool(archive_items(upload, kind, category))
+    
+    imported = 0
+    failed = 0
+    errors = []
+    try:
+        async for parsed in import_pool.parse(batched(items)):
+            added, batch_errors = await run_in_threadpool(commit_import, game_id, parsed)
+            imported += len(added)
+            failed += len(batch_errors)
+            errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {kind} archive after {imported} songs: {e}")
+    finally:
+        if upload is not None:
+            upload.close()
+    
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+@app.get("/games/{game_id}/categories", response_model=List[Category])
+@loop_read
+def get_game_categories(game_id: int, request: Request):
+    game = find_game(game_id)
+    return catalog_response(request, catalog_etag(game), lambda: categories_json(game.categories.values()))
+
+@app.get("/games/{game_id}/songs", response_model=List[Song])
+def get_game_songs(game_id: int, request: Request, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    game = find_game(game_id)
+    return songs_response(request, catalog_etag(game), lambda: game.songs.values(), fields)
+
+@app.get("/games/{game_id}/categories/{category_name}/songs", response_model=List[Song])
+def get_game_songs_by_category(game_id: int, category_name: str, request: Request,
+                               fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    game = find_game(game_id)
     if category_name not in game.categories:
         raise HTTPException(status_code=404, detail="Category not found in this game")
-    return [game.songs[sid] for sid in game.categories[category_name].song_ids if sid in game.songs]
+    return songs_response(request, catalog_etag(game),
+                          lambda: [game.songs[sid] for sid in game.catalog().song_ids(category_name)], fields)
 
 @app.post("/games/{game_id}/categories")
+@store.atomic
 def add_category_to_game(game_id: int, category: CategorySelection):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
     game = games[game_id]
     if category.category not in game.categories:
-        game.categories[category.category] = Category(name=category.category, song_ids=[])
+        game.catalog().ensure(category.category)
+        save_game(game, "categories")
+        events.publish(game_id, "catalog_changed", version=game.version, category=category.category)
     return {"message": f"Category '{category.category}' added to game"}
 
 @app.put("/games/{game_id}/categories/{old_name}")
+@store.atomic
 def rename_category_in_game(game_id: int, old_name: str, category: CategorySelection):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -246,18 +983,19 @@ def rename_category_in_game(game_id: int, old_name: str, category: CategorySelec
         raise HTTPException(status_code=404, detail="Category not found in this game")
     
     if old_name != category.category:
-        # Rename category
-        game.categories[category.category] = game.categories[old_name]
-        del game.categories[old_name]
-        
-        # Update songs that reference this category
-        for song in game.songs.values():
-            if song.category == old_name:
-                song.category = category.category
+        # Rename category (merging into an existing one), then update its songs
+        renamed = game.catalog().rename(old_name, category.category)
+        for song_id in renamed:
+            song = game.songs[song_id]
+            song.category = category.category
+            store.save_game_song(game_id, song)
+        save_game(game, "categories", songs=renamed)
+        events.publish(game_id, "catalog_changed", version=game.version, category=category.category)
     
     return {"message": f"Category renamed from '{old_name}' to '{category.category}'"}
 
 @app.delete("/games/{game_id}/categories/{category_name}")
+@store.atomic
 def delete_category_from_game(game_id: int, category_name: str):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -266,17 +1004,102 @@ def delete_category_from_game(game_id: int, category_name: str):
     if category_name not in game.categories:
         raise HTTPException(status_code=404, detail="Category not found in this game")
     
-    # Delete all songs in this category
-    song_ids_to_delete = list(game.categories[category_name].song_ids)
+    # Delete the category and all its songs
+    song_ids_to_delete = game.catalog().drop(category_name)
     for song_id in song_ids_to_delete:
-        if song_id in game.songs:
-            del game.songs[song_id]
+        release_song(game.songs.pop(song_id))
+        store.delete_game_song(game_id, song_id)
     
-    # Delete category
-    del game.categories[category_name]
+    save_game(game, "categories", deleted_songs=song_ids_to_delete)
+    events.publish(game_id, "catalog_changed", version=game.version, category=category_name)
     
     return {"message": f"Category '{category_name}' and all its songs deleted successfully"}
 
+# --- Leaderboard & player stats ---
+# Running totals across games, kept by the store and updated by each attempt
+# and player change rather than summed over the games when read
+def count_game(game: Game):
+    """Add the scores of a game from before player stats to the totals, once"""
+    if game.player_stats is None:
+        game.player_stats = {}
+        for username, points in game.scores.items():
+            if points:
+                store.add_stats("player", username, {"points": points})
+        save_game(game, "player_stats")
+
+def player_tally(game: Game, username: str) -> Dict[str, int]:
+    """What the game adds to the player's totals: their score and attempt stats in it"""
+    return dict(game.player_stats.get(username, {}), points=game.scores.get(username, 0))
+
+def add_player_totals(game: Game, before: Dict[str, Dict[str, int]]):
+    """Add to the players' totals what their tallies in the game changed by since `before`"""
+    for username, tally in before.items():
+        after = player_tally(game, username)
+        deltas = {field: after.get(field, 0) - tally.get(field, 0) for field in STAT_FIELDS}
+        if any(deltas.values()):
+            store.add_stats("player", username, deltas)
+
+def add_song_totals(song: Song, tally: Dict[str, int]):
+    # Game songs sharing a library song's lyrics count as that song
+    store.add_stats("song", str(song.source_id if song.source_id is not None else song.id), tally)
+    store.add_stats("category", song.category, tally)
+
+class Totals(BaseModel):
+    points: int
+    attempts: int
+    scored: int  # attempts that earned points
+    words: int  # hidden words attempted
+    correct_words: int
+    accuracy: Optional[float] = None  # correct_words / words
+
+class PlayerTotals(Totals):
+    username: str
+    rank: int  # 1 + players with more points
+
+def totals(row: Dict[str, int]) -> dict:
+    return dict(row, accuracy=round(row["correct_words"] / row["words"], 3) if row["words"] else None)
+
+@app.get("/leaderboard", response_model=List[PlayerTotals])
+@loop_read
+def get_leaderboard(response: Response, offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    """Players by points across all games, most first (ties by name); X-Total-Count has the number of players"""
+    total, page = store.leaderboard(offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    entries = []
+    for i, (username, row) in enumerate(page):
+        if i == 0:
+            rank = store.player_rank(username)
+        elif row["points"] != entries[-1]["points"]:
+            rank = offset + i + 1
+        entries.append(dict(totals(row), username=username, rank=rank))
+    return entries
+
+@app.get("/players/{username}/stats", response_model=PlayerTotals)
+@loop_read
+def get_player_stats(username: str):
+    row = store.stats("player", username)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return dict(totals(row), username=username, rank=store.player_rank(username))
+
+@app.get("/songs/{song_id}/stats", response_model=Totals)
+@loop_read
+def get_song_stats(song_id: int):
+    """Attempts at a library song in every game (or at a game's own song)"""
+    row = store.stats("song", str(song_id))
+    if row is None:
+        raise HTTPException(status_code=404, detail="No attempts at this song")
+    return totals(row)
+
+@app.get("/categories/{category_name}/stats", response_model=Totals)
+@loop_read
+def get_category_stats(category_name: str):
+    """Attempts at songs of this category in every game"""
+    row = store.stats("category", category_name)
+    if row is None:
+        raise HTTPException(status_code=404, detail="No attempts in this category")
+    return totals(row)
+
 # Player management
 class PlayerUpdate(BaseModel):
     old_username: str
@@ -284,11 +1107,14 @@ class PlayerUpdate(BaseModel):
     picture_url: Optional[str] = None
 
 @app.put("/games/{game_id}/players")
+@store.atomic
 def update_player_in_game(game_id: int, player_update: PlayerUpdate):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
     game = games[game_id]
+    count_game(game)
+    before = {name: player_tally(game, name) for name in (player_update.old_username, player_update.new_username)}
     
     # Find and update player
     for player in game.players:
@@ -303,14 +1129,27 @@ def update_player_in_game(game_id: int, player_update: PlayerUpdate):
     # Update scores dictionary
     if player_update.old_username in game.scores:
         game.scores[player_update.new_username] = game.scores.pop(player_update.old_username)
+    if player_update.old_username in game.player_stats:
+        game.player_stats[player_update.new_username] = game.player_stats.pop(player_update.old_username)
     
-    # Update current player if needed
+    # Update current player and this round's turns if needed
     if game.current_player == player_update.old_username:
         game.current_player = player_update.new_username
+    if player_update.old_username in game.players_played_this_round:
+        game.players_played_this_round = [
+            player_update.new_username if p == player_update.old_username else p
+            for p in game.players_played_this_round
+        ]
+    game.turns().rename_player(player_update.old_username, player_update.new_username)
     
+    save_game(game, "players", "scores", "player_stats", "current_player", "players_played_this_round")
+    add_player_totals(game, before)
+    events.publish(game_id, "players_changed", version=game.version, players=game_field(game, "players"),
+                   scores=game.scores, current_player=game.current_player)
     return {"message": f"Player updated successfully"}
 
 @app.post("/games/{game_id}/players")
+@store.atomic
 def add_player_to_game(game_id: int, player: Player):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -323,30 +1162,47 @@ def add_player_to_game(game_id: int, player: Player):
     
     game.players.append(player)
     game.scores[player.username] = 0
+    # Joining mid-round: they get a turn in this round
+    game.turns().add_player(player.username)
+    save_game(game, "players", "scores")
+    events.publish(game_id, "players_changed", version=game.version, players=game_field(game, "players"),
+                   scores=game.scores, current_player=game.current_player)
     
     return {"message": f"Player '{player.username}' added to game"}
 
 @app.delete("/games/{game_id}/players/{username}")
+@store.atomic
 def remove_player_from_game(game_id: int, username: str):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
     game = games[game_id]
+    count_game(game)
+    before = {username: player_tally(game, username)}
     
     # Remove player
     game.players = [p for p in game.players if p.username != username]
+    turns = game.turns()
+    turns.remove_player(username)
     
-    # Remove from scores
+    # Remove from scores, and their points and attempts from their totals
     if username in game.scores:
         del game.scores[username]
+    game.player_stats.pop(username, None)
     
-    # Update current player if needed
+    # Update current player if needed: the next one in this round's order takes the turn
     if game.current_player == username:
-        if game.players:
+        if game.state == "playing" and turns.peek() is not None:
+            game.current_player = turns.peek()
+        elif game.players:
             game.current_player = game.players[0].username
         else:
             game.current_player = None
     
+    save_game(game, "players", "scores", "player_stats", "current_player")
+    add_player_totals(game, before)
+    events.publish(game_id, "players_changed", version=game.version, players=game_field(game, "players"),
+                   scores=game.scores, current_player=game.current_player)
     return {"message": f"Player '{username}' removed from game"}
 
 # --- Game Management ---
@@ -355,12 +1211,45 @@ class GameCreate(BaseModel):
     player_names: List[str]
     songs: Optional[List[SongCreate]] = []
     categories: Optional[List[str]] = []
+    song_ids: Optional[List[int]] = []  # library songs to reference
+    scoring_mode: str = "exact"
+    seed: Optional[int] = None  # Same seed and players, same turn order; random when omitted
+
+def check_scoring_mode(mode: str):
+    if mode not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring mode: {mode}")
+
+class ScoringModeUpdate(BaseModel):
+    scoring_mode: str
+
+@app.put("/games/{game_id}/scoring_mode")
+@store.atomic
+def update_scoring_mode(game_id: int, update: ScoringModeUpdate):
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    check_scoring_mode(update.scoring_mode)
+    
+    game = games[game_id]
+    game.scoring_mode = update.scoring_mode
+    save_game(game, "scoring_mode")
+    events.publish(game_id, "settings_changed", version=game.version, scoring_mode=game.scoring_mode)
+    return {"message": f"Scoring mode set to '{game.scoring_mode}'"}
 
 @app.post("/games")
-def create_game(game: GameCreate):
-    global game_counter, song_counter
-    game_id = game_counter
-    game_counter += 1
+async def create_game(game: GameCreate):
+    check_scoring_mode(game.scoring_mode)
+    lyrics = await asyncio.gather(*(new_lyrics(song.lrc) for song in game.songs))
+    return await run_in_threadpool(commit_game, game, lyrics)
+
+@store.atomic
+def commit_game(game: GameCreate, lyrics: Optional[List[Optional[Lyrics]]] = None) -> Response:
+    """Create the game; `lyrics` are the songs' pre-parsed lyrics (None: parsed here as needed)"""
+    if lyrics is None:
+        lyrics = [None] * len(game.songs)
+    missing = [library_id for library_id in game.song_ids if library_id not in songs]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Song(s) not found: {', '.join(map(str, missing))}")
+    game_id = store.next_id("game")
     players = [Player(username=name) for name in game.player_names]
     
     # Create game-specific songs and categories
@@ -368,11 +1257,9 @@ def create_game(game: GameCreate):
     game_categories = {}
     
     # Process songs for this game
-    for song_data in game.songs:
-        song_id = song_counter
-        song_counter += 1
-        lyrics = parse_lrc(song_data.lrc)
-        new_song = Song(id=song_id, lyrics=lyrics, **song_data.dict())
+    for song_data, song_lyrics in zip(game.songs, lyrics):
+        song_id = store.next_id("song")
+        new_song = game_song(song_id, song_data, song_lyrics)
         game_songs[song_id] = new_song
         
         # Add to game-specific category
@@ -380,6 +1267,17 @@ def create_game(game: GameCreate):
             game_categories[song_data.category] = Category(name=song_data.category, song_ids=[])
         game_categories[song_data.category].song_ids.append(song_id)
     
+    # Songs picked from the library are referenced, not copied
+    for library_id in game.song_ids:
+        library = songs[library_id]
+        song_id = store.next_id("song")
+        new_song = reference_song(library, song_id, **library.dict(exclude=SONG_CONTENT | {"id", "source_id"}))
+        new_song.answer_index()
+        game_songs[song_id] = new_song
+        if library.category not in game_categories:
+            game_categories[library.category] = Category(name=library.category, song_ids=[])
+        game_categories[library.category].song_ids.append(song_id)
+    
     # Add any additional empty categories
     for cat_name in game.categories:
         if cat_name not in game_categories:
@@ -396,40 +1294,20 @@ def create_game(game: GameCreate):
         current_player=None,
         players_played_this_round=[],
         state="waiting",
-        scores={name: 0 for name in game.player_names}
+        scores={name: 0 for name in game.player_names},
+        player_stats={},
+        scoring_mode=game.scoring_mode,
+        seed=game.seed if game.seed is not None else random.getrandbits(63)
     )
-    games[game_id] = game_obj
-    
-    # Return properly formatted response
-    categories_dict = {}
-    for name, category in game_obj.categories.items():
-        categories_dict[name] = {
-            "name": category.name,
-            "song_ids": category.song_ids
-        }
-    
-    return {
-        "id": game_obj.id,
-        "name": game_obj.name,
-        "players": [{"username": p.username, "picture_url": p.picture_url} for p in game_obj.players],
-        "songs": {str(k): {
-            "id": v.id,
-            "title": v.title,
-            "category": v.category,
-            "youtube_url": v.youtube_url,
-            "spotify_id": v.spotify_id,
-            "lrc": v.lrc,
-            "lyrics": v.lyrics,
-            "hidden_line_indices": v.hidden_line_indices
-        } for k, v in game_obj.songs.items()},
-        "categories": categories_dict,
-        "played_categories": game_obj.played_categories,
-        "current_round": game_obj.current_round,
-        "current_player": game_obj.current_player,
-        "players_played_this_round": game_obj.players_played_this_round,
-        "state": game_obj.state,
-        "scores": game_obj.scores
-    }
+    # Locked before anyone can see the game, so holding it after LIBRARY_LOCK can't deadlock
+    with store.game_lock(game_id):
+        games[game_id] = game_obj
+        for song in game_songs.values():
+            store.save_game_song(game_id, song)
+        save_game(game_obj)
+        
+        version, body = game_json(game_obj)
+        return Response(content=body, media_type="application/json", headers=game_headers(game_id, version))
 
 # List all games with id, name, and state (for filtering playable games)
 
@@ -438,64 +1316,155 @@ class GameSummary(BaseModel):
     name: str
     state: str
 
+GAME_STATES = ("waiting", "playing", "finished")
+
 @app.get("/games", response_model=List[GameSummary])
-def list_games():
-    return [GameSummary(id=g.id, name=g.name, state=g.state) for g in games.values()]
+@loop_read
+def list_games(response: Response,
+               state: Optional[str] = Query(None, description="Comma-separated states, e.g. waiting,playing"),
+               offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """Newest first, archived games included; X-Total-Count has the number of matching games"""
+    states = None
+    if state is not None:
+        states = {s.strip() for s in state.split(",") if s.strip()} or None
+        unknown = (states or set()) - set(GAME_STATES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown state(s): {', '.join(sorted(unknown))}")
+    total, page = games.summaries(states, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return [GameSummary(**summary) for summary in page]
+
+def store_gauges() -> Dict[str, Tuple[str, float]]:
+    game_list = games.resident()
+    library = list(songs.values())
+    game_songs = [song for game in game_list for song in list(game.songs.values())]
+    # Game songs share their library song's texts; count each once
+    texts = {id(song.lrc): sys.getsizeof(song.lrc) for song in library + game_songs}
+    parsed = {id(song.lyrics): song.lyrics.nbytes for song in library + game_songs}
+    return {
+        "game_store_games": ("Games in the store, archived ones included.", len(games)),
+        "game_store_resident_games": ("Games held in memory.", len(game_list)),
+        "game_store_players": ("Players across resident games.", sum(len(game.players) for game in game_list)),
+        "game_store_game_songs": ("Songs across resident games.", len(game_songs)),
+        "game_store_library_songs": ("Songs in the global library.", len(library)),
+        "game_store_lyrics_bytes": ("Bytes held by distinct LRC texts and parsed lyrics.",
+                                    sum(texts.values()) + sum(parsed.values())),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text format: per-route latency, sizes and statuses, plus store gauges"""
+    return Response(content=metrics.render(store_gauges()), media_type="text/plain; version=0.0.4")
 
 @app.get("/games/{game_id}")
-def get_game(game_id: int):
+async def get_game(game_id: int, request: Request,
+             fields: Optional[str] = Query(None, description="Comma-separated game fields, e.g. id,name,scores"),
+             song_fields: Optional[str] = Query(None, description="Fields kept for each song, e.g. id,title,category")):
+    game = await game_lookup(find_game, game_id)
+    projection = parse_fields(fields, GAME_FIELDS)
+    song_projection = parse_fields(song_fields, SONG_FIELDS)
+    version = game.version
+    headers = game_headers(game_id, version, projection, song_projection)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    payload = cached_game_json(game, projection, song_projection)
+    if payload is None and projection is not None and "songs" not in projection:
+        # Without songs (the play screen's poll) it is quicker to serialize here than in a thread
+        payload = game_json(game, projection, song_projection, blocking=False)
+    if payload is None:
+        # Serializing the songs, or waiting for the game's lock, isn't for the event loop
+        payload = await run_in_threadpool(game_json, game, projection, song_projection)
+    version, body = payload
+    headers = game_headers(game_id, version, projection, song_projection)
+    key = (projection, song_projection)
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is not None and len(body) >= OFFLOAD_SIZE and precompressed.peek((headers["ETag"], key), encoding) is None:
+        # A large body is compressed once, on the CPU executor; later requests find it cached
+        await run_cpu(precompressed.get, (headers["ETag"], key), encoding, lambda: body)
+    return encoded_response(request, headers, key, lambda: body)
+
+@app.get("/games/{game_id}/changes")
+def get_game_changes(game_id: int, since: int):
+    """Only the fields and songs that changed after version `since`.
+
+    Falls back to the full game ("full": true) when `since` is older than the
+    change log kept in memory, e.g. after a restart or a reload from storage.
+    """
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     
     game = games[game_id]
+    with store.game_lock(game_id):
+        return game_changes(game, since)
+
+def game_changes(game: Game, since: int) -> dict:
+    if since == game.version:
+        return {"version": game.version, "full": False, "fields": {}, "songs": {}, "deleted_songs": []}
+    changes = [c for c in game._changes if c[0] > since]
+    if since < 1 or since > game.version or not changes or changes[0][0] != since + 1:
+        return {"version": game.version, "full": True, "game": game_payload(game)}
     
-    # Ensure categories are properly formatted as a dict with string keys
-    categories_dict = {}
-    for name, category in game.categories.items():
-        categories_dict[name] = {
-            "name": category.name,
-            "song_ids": category.song_ids
-        }
-    
-    # Return game data with properly formatted categories
+    fields = set()
+    changed_songs = set()
+    deleted_songs = set()
+    for _, entry_fields, entry_songs, entry_deleted in changes:
+        fields.update(entry_fields)
+        changed_songs.update(entry_songs)
+        changed_songs.difference_update(entry_deleted)
+        deleted_songs.update(entry_deleted)
+        deleted_songs.difference_update(entry_songs)
     return {
-        "id": game.id,
-        "name": game.name,
-        "players": [{"username": p.username, "picture_url": p.picture_url} for p in game.players],
-        "songs": {str(k): {
-            "id": v.id,
-            "title": v.title,
-            "category": v.category,
-            "youtube_url": v.youtube_url,
-            "spotify_id": v.spotify_id,
-            "lrc": v.lrc,
-            "lyrics": v.lyrics,
-            "hidden_line_indices": v.hidden_line_indices
-        } for k, v in game.songs.items()},
-        "categories": categories_dict,
-        "played_categories": game.played_categories,
-        "current_round": game.current_round,
-        "current_player": game.current_player,
-        "players_played_this_round": game.players_played_this_round,
-        "state": game.state,
-        "scores": game.scores
+        "version": game.version,
+        "full": False,
+        "fields": {field: game_field(game, field) for field in sorted(fields)},
+        "songs": {str(sid): song_payload(game.songs[sid]) for sid in changed_songs if sid in game.songs},
+        "deleted_songs": sorted(deleted_songs)
     }
 
+@app.get("/games/{game_id}/events")
+async def game_events(game_id: int):
+    """Server-sent events for one game: player_changed, round_advanced, score_updated, ..."""
+    if game_id not in games:
+        raise HTTPException(status_code=404, detail="Game not found")
+    subscription = events.subscribe(game_id)
+
+    async def stream():
+        try:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield b": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/games/{game_id}/start")
+@store.atomic
 def start_game(game_id: int):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     game = games[game_id]
     if game.state != "waiting":
         raise HTTPException(status_code=400, detail="Game already started or finished")
-    # Pick first player randomly and start round 1
-    game.current_player = random.choice([p.username for p in game.players])
+    # Start round 1 with the first player of its shuffled order
+    turns = game.turns()
+    turns.start_round(1)
+    game.current_player = turns.peek()
     game.current_round = 1
     game.players_played_this_round = []
     game.state = "playing"
+    save_game(game, "current_player", "current_round", "players_played_this_round", "state")
+    events.publish(game_id, "game_started", version=game.version, current_player=game.current_player,
+                   round=game.current_round)
     return {"current_player": game.current_player, "round": game.current_round}
 
 @app.post("/games/{game_id}/next_player")
+@store.atomic
 def next_player(game_id: int):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -503,58 +1472,74 @@ def next_player(game_id: int):
     if game.state != "playing":
         raise HTTPException(status_code=400, detail="Game not in playing state")
     
+    turns = game.turns()
     # Add current player to played list if not already there
-    if game.current_player and game.current_player not in game.players_played_this_round:
+    if game.current_player and turns.mark_played(game.current_player):
         game.players_played_this_round.append(game.current_player)
     
-    # Get all player usernames
-    all_players = [p.username for p in game.players]
+    # Next player of this round's shuffled order who hasn't played
+    upcoming = turns.peek()
     
-    # Find players who haven't played this round
-    remaining_players_this_round = [p for p in all_players if p not in game.players_played_this_round]
-    
-    if remaining_players_this_round:
-        # Still players left in this round - pick randomly from remaining
-        game.current_player = random.choice(remaining_players_this_round)
+    if upcoming is not None:
+        # Still players left in this round
+        game.current_player = upcoming
+        save_game(game, "current_player", "players_played_this_round")
+        events.publish(game_id, "player_changed", version=game.version, current_player=game.current_player,
+                       round=game.current_round, players_played_this_round=game.players_played_this_round)
         return {
             "current_player": game.current_player, 
             "round": game.current_round,
             "round_complete": False,
-            "players_remaining_this_round": len(remaining_players_this_round) - 1
+            "players_remaining_this_round": turns.remaining() - 1
         }
     else:
-        # All players have played this round - start new round
-        available_categories = [c for c in game.categories.keys() if c not in game.played_categories]
-        
-        # Check if game should end
-        if not available_categories:
+        # All players have played this round - start new round, or end the game
+        # if every category has been played
+        if not turns.categories_left(game.categories):
             game.state = "finished"
+            save_game(game, "state", "players_played_this_round")
+            events.publish(game_id, "game_finished", version=game.version, scores=game.scores)
             return {"message": "Game finished", "scores": game.scores, "round_complete": True}
         
         # Start new round
         game.current_round += 1
         game.players_played_this_round = []
-        game.current_player = random.choice(all_players)
+        turns.start_round(game.current_round)
+        game.current_player = turns.peek()
+        save_game(game, "current_player", "current_round", "players_played_this_round")
+        events.publish(game_id, "round_advanced", version=game.version, current_player=game.current_player,
+                       round=game.current_round, players_played_this_round=game.players_played_this_round)
         
         return {
             "current_player": game.current_player, 
             "round": game.current_round,
             "round_complete": True,
             "new_round_started": True,
-            "players_remaining_this_round": len(all_players) - 1
+            "players_remaining_this_round": turns.remaining() - 1
         }
 
-@app.post("/games/{game_id}/select_category")
-def select_category(game_id: int, selection: CategorySelection):
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
-    game = games[game_id]
-    if selection.category not in game.categories:
-        raise HTTPException(status_code=400, detail="Category not in game")
+@app.post("/games/{game_id}/select_category", response_model=CategorySongs)
+async def select_category(game_id: int, selection: CategorySelection,
+                          fields: Optional[str] = Query(None, description="Song fields, default id,title,category")):
+    game = await game_lookup(find_game, game_id)
     # Don't mark as played here - will be marked when round is complete
-    return {"songs": [game.songs[sid] for sid in game.categories[selection.category].song_ids if sid in game.songs]}
+    # Only summaries by default: the chosen song's lyrics come from select_song
+    projection = parse_fields(fields, SONG_FIELDS) or SONG_SUMMARY_FIELDS
+    if game._catalog is None:
+        # Building the category index waits for the game's lock, which a writer may hold
+        content = await run_in_threadpool(category_songs_json, game, selection.category, projection)
+    else:
+        content = category_songs_json(game, selection.category, projection)
+    return Response(content=content, media_type="application/json")
+
+def category_songs_json(game: Game, category: str, projection: tuple) -> bytes:
+    if category not in game.categories:
+        raise HTTPException(status_code=400, detail="Category not in game")
+    category_songs = [game.songs[sid] for sid in game.catalog().song_ids(category)]
+    return b'{"songs":' + json_array([song_json(s, projection) for s in category_songs]) + b"}"
 
 @app.post("/games/{game_id}/complete_category")
+@store.atomic
 def complete_category(game_id: int, selection: CategorySelection):
     """Mark a category as completed/played"""
     if game_id not in games:
@@ -562,77 +1547,233 @@ def complete_category(game_id: int, selection: CategorySelection):
     game = games[game_id]
     if selection.category not in game.categories:
         raise HTTPException(status_code=400, detail="Category not in game")
-    if selection.category not in game.played_categories:
+    if game.turns().mark_category(selection.category):
         game.played_categories.append(selection.category)
+        save_game(game, "played_categories")
+        events.publish(game_id, "category_completed", version=game.version, category=selection.category,
+                       played_categories=game.played_categories)
     return {"message": f"Category '{selection.category}' marked as completed"}
 
 class SongSelection(BaseModel):
     song_id: int
 
 @app.post("/games/{game_id}/select_song")
+@loop_read
 def select_song(game_id: int, selection: SongSelection):
     if game_id not in games:
         raise HTTPException(status_code=404, detail="Game not found")
     game = games[game_id]
     if selection.song_id not in game.songs:
         raise HTTPException(status_code=404, detail="Song not found in this game")
-    song = game.songs[selection.song_id]
-    return song
+    return song_response(game.songs[selection.song_id])
+
+def find_game_song(game_id: int, song_id: int) -> Song:
+    game = find_game(game_id)
+    if song_id not in game.songs:
+        raise HTTPException(status_code=404, detail="Song not found in this game")
+    return game.songs[song_id]
+
+@app.get("/games/{game_id}/songs/{song_id}/timeline")
+@loop_read
+def get_song_timeline(game_id: int, song_id: int):
+    """Sorted line start times (bisect_right(times, t) - 1 is the line showing at t),
+    hidden passages and the lines to display around them"""
+    song = find_game_song(game_id, song_id)
+    return {"song_id": song.id, **song.timeline().as_dict()}
+
+@app.get("/games/{game_id}/songs/{song_id}/lyrics/stream")
+async def stream_song_lyrics(game_id: int, song_id: int,
+                             position: int = Query(0, ge=0, description="Playback position in ms when the stream starts")):
+    """Server-sent line, hidden_start, hidden_end and end events, each pushed when
+    playback reaches it, for screens that only display what they receive"""
+    song = await game_lookup(find_game_song, game_id, song_id)
+    return StreamingResponse(lyric_events(song.lyrics, song.timeline(), position), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+MAX_ATTEMPT_WORDS = 2000  # longer attempts are refused (422) before anything is scored
 
 class LyricsAttempt(BaseModel):
     song_id: int
-    attempt: List[str]  # Array of guessed words
+    attempt: List[str] = Field(max_length=MAX_ATTEMPT_WORDS)  # Array of guessed words
     player: str
 
-@app.post("/games/{game_id}/attempt_lyrics")
-def attempt_lyrics(game_id: int, attempt: LyricsAttempt):
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
+INLINE_FUZZY_PAIRS = 24 * 24  # hidden x attempted words scored on the event loop (well under a millisecond)
+POINTS_THRESHOLD = 80  # attempt score (percentage of words) from which it earns points
+
+def count_attempt(game: Game, player: str, score: int, correct_count: int, words: int) -> Dict[str, int]:
+    """Add an attempt to the game: points to the player's score when it scored
+    enough, the attempt to their stats. Returns its tally, which also goes to
+    the totals of the song and its category."""
+    points = score // 10 if score >= POINTS_THRESHOLD else 0
+    tally = {"points": points, "attempts": 1, "scored": int(points > 0), "words": words,
+             "correct_words": correct_count}
+    fields = []
+    if points:
+        game.scores[player] += points
+        fields.append("scores")
+    if player in game.scores:
+        stats = game.player_stats.setdefault(player, {})
+        for field in STAT_FIELDS[1:]:  # points are in scores
+            stats[field] = stats.get(field, 0) + tally[field]
+        fields.append("player_stats")
+    if fields:
+        save_game(game, *fields)
+    if points:
+        events.publish(game.id, "score_updated", version=game.version, player=player,
+                       score=game.scores[player], attempt_score=score)
+    return tally
+
+@store.atomic
+def record_attempt(game_id: int, player: str, song_id: int, score: int, correct_count: int, words: int):
     game = games[game_id]
+    count_game(game)
+    before = {player: player_tally(game, player)}
+    tally = count_attempt(game, player, score, correct_count, words)
+    add_player_totals(game, before)
+    song = game.songs.get(song_id)
+    if song is not None:
+        add_song_totals(song, tally)
+
+def attempt_answers(game: Game, attempt: LyricsAttempt) -> Optional[AnswerIndex]:
+    """The expected answer of the attempted song, None if it hides no lines"""
     if attempt.song_id not in game.songs:
         raise HTTPException(status_code=404, detail="Song not found in this game")
-    
     song = game.songs[attempt.song_id]
-    if not song.hidden_line_indices:
-        return {"correct": False, "expected": [], "word_results": []}
-    
-    # Get all hidden lines and their words
-    expected_words = []
-    hidden_texts = []
-    
-    for idx in song.hidden_line_indices:
-        if idx < len(song.lyrics):
-            hidden_text = song.lyrics[idx]["text"]
-            hidden_texts.append(hidden_text)
-            # Split into words, removing punctuation for comparison
-            words = re.findall(r'\b\w+\b', hidden_text.lower())
-            expected_words.extend(words)
-    
-    # Compare word by word
-    word_results = []
-    correct_count = 0
-    
-    for i, (expected, attempted) in enumerate(zip(expected_words, attempt.attempt)):
-        is_correct = expected.lower().strip() == attempted.lower().strip()
-        word_results.append({
-            "word": expected,
-            "attempt": attempted,
-            "correct": is_correct
-        })
-        if is_correct:
-            correct_count += 1
-    
-    # Add score based on percentage of correct words
-    total_words = len(expected_words)
-    score = 0
-    if total_words > 0:
-        score = int((correct_count / total_words) * 100)
-        if score >= 80:  # 80% threshold for points
-            game.scores[attempt.player] += score // 10
-    
+    return song.answer_index() if song.hidden_line_indices else None
+
+def attempt_result(answers: AnswerIndex, correct_count: int, word_results: list) -> dict:
+    # Score is the percentage of correct words
+    total_words = len(answers.words)
     return {
         "correct": correct_count == total_words,
-        "expected": hidden_texts,
+        "expected": list(answers.texts),
         "word_results": word_results,
-        "score": score
+        "score": int((correct_count / total_words) * 100) if total_words > 0 else 0
     }
+
+@app.post("/games/{game_id}/attempt_lyrics")
+async def attempt_lyrics(game_id: int, attempt: LyricsAttempt):
+    game = await game_lookup(find_game, game_id)
+    answers = attempt_answers(game, attempt)
+    if answers is None:
+        return {"correct": False, "expected": [], "word_results": []}
+    
+    if game.scoring_mode == "fuzzy" and len(answers.words) * len(attempt.attempt) > INLINE_FUZZY_PAIRS:
+        # Edit distances for a long passage or attempt: on the CPU executor rather than the event loop
+        correct_count, word_results = await run_cpu(score_attempt, answers, attempt.attempt, game.scoring_mode)
+    else:
+        correct_count, word_results = score_attempt(answers, attempt.attempt, game.scoring_mode)
+    
+    result = attempt_result(answers, correct_count, word_results)
+    await game_atomic(record_attempt, game_id, attempt.player, attempt.song_id, result["score"], correct_count,
+                      len(answers.words))
+    return result
+
+# --- Batched turn commands ---
+# Each command is {"op": <endpoint>, ...that endpoint's JSON body}
+BATCH_COMMANDS = {
+    "start": None,
+    "select_category": CategorySelection,
+    "select_song": SongSelection,
+    "attempt_lyrics": LyricsAttempt,
+    "complete_category": CategorySelection,
+    "next_player": None,
+}
+MAX_BATCH_COMMANDS = 20  # the game stays locked for the whole batch
+# Everything the commands above may change, restored if one of them fails
+TURN_FIELDS = ("scores", "player_stats", "played_categories", "current_player", "current_round", "players_played_this_round",
+               "state")
+BATCH_GAME_FIELDS = tuple(field for field in GAME_FIELDS if field != "songs")
+
+class GameBatch(BaseModel):
+    commands: List[Dict]
+
+def parse_commands(commands: List[Dict]) -> List[Tuple[str, Optional[BaseModel]]]:
+    """Validate every command before any runs, as FastAPI would their endpoint's body"""
+    if len(commands) > MAX_BATCH_COMMANDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_COMMANDS} commands per batch")
+    parsed = []
+    errors = []
+    for index, command in enumerate(commands):
+        op = command.get("op")
+        if op not in BATCH_COMMANDS:
+            errors.append({"loc": ["body", "commands", index, "op"], "type": "value_error",
+                           "msg": f"Unknown command, expected one of: {', '.join(BATCH_COMMANDS)}"})
+            continue
+        model = BATCH_COMMANDS[op]
+        try:
+            parsed.append((op, model(**{k: v for k, v in command.items() if k != "op"}) if model else None))
+        except ValidationError as e:
+            errors += [{"loc": ["body", "commands", index, *err["loc"]], "type": err["type"], "msg": err["msg"]}
+                       for err in e.errors()]
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return parsed
+
+def run_command(game: Game, op: str, body: Optional[BaseModel], tallies: List[Tuple[Song, Dict[str, int]]]) -> bytes:
+    """One batched command's result, serialized as its endpoint would return it.
+    Attempts append their song and tally to `tallies`, for the totals."""
+    if op == "start":
+        return encode_json(start_game(game.id))
+    if op == "select_category":
+        return category_songs_json(game, body.category, SONG_SUMMARY_FIELDS)
+    if op == "select_song":
+        return song_json(find_game_song(game.id, body.song_id))
+    if op == "attempt_lyrics":
+        answers = attempt_answers(game, body)
+        if answers is None:
+            return encode_json({"correct": False, "expected": [], "word_results": []})
+        correct_count, word_results = score_attempt(answers, body.attempt, game.scoring_mode)
+        result = attempt_result(answers, correct_count, word_results)
+        tallies.append((game.songs[body.song_id],
+                        count_attempt(game, body.player, result["score"], correct_count, len(answers.words))))
+        return encode_json(result)
+    if op == "complete_category":
+        return encode_json(complete_category(game.id, body))
+    return encode_json(next_player(game.id))
+
+@app.post("/games/{game_id}/batch")
+@store.atomic
+def run_batch(game_id: int, batch: GameBatch,
+              fields: Optional[str] = Query(None, description="Game fields returned, default all but songs")):
+    """Run a turn's commands (start, select_category, select_song, attempt_lyrics,
+    complete_category, next_player) in order, in one request, with the game
+    locked throughout.
+
+    All or nothing: if a command fails, the ones before it are undone, no
+    event is sent, and the error's detail names the failed command. Otherwise
+    the response has each command's result, as its endpoint returns it (only
+    song summaries for select_category), and the game after the last one.
+    """
+    game = find_game(game_id)
+    commands = parse_commands(batch.commands)
+    projection = parse_fields(fields, GAME_FIELDS) or BATCH_GAME_FIELDS
+    count_game(game)
+    before = game.version
+    snapshot = {field: deepcopy(getattr(game, field)) for field in TURN_FIELDS}
+    results = []
+    tallies = []
+    try:
+        with events.hold():
+            for index, (op, body) in enumerate(commands):
+                try:
+                    results.append(run_command(game, op, body, tallies))
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code,
+                                        detail={"command": index, "op": op, "detail": e.detail})
+            # Totals only take the batch once it has succeeded: nothing to undo otherwise
+            add_player_totals(game, {name: dict(snapshot["player_stats"].get(name, {}), points=points)
+                                     for name, points in snapshot["scores"].items()})
+            for song, tally in tallies:
+                add_song_totals(song, tally)
+    except Exception:
+        # SQLite rolls the transaction back; the in-process stores get the old fields saved again
+        if store.in_process and game.version != before:
+            for field, value in snapshot.items():
+                setattr(game, field, value)
+            game._turns = None
+            save_game(game, *TURN_FIELDS)
+        raise
+    body = (b'{"results":' + json_array(results) + b',"version":%d,"game":' % game.version
+            + encode_game(game, projection) + b"}")
+    return Response(content=body, media_type="application/json", headers=game_headers(game_id, game.version))
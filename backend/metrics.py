@@ -0,0 +1,223 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable, Dict, List, Optional, Tuple
+import cProfile
+import os
+import pstats
+import random
+import re
+import time
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+
+
+# Upper bounds in seconds, Prometheus' defaults plus finer steps below 5 ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"  # route label for paths no route matched, so scanners can't add labels
+
+
+class RouteStats:
+    """Latency histogram, sizes and statuses of one method + route template"""
+    __slots__ = ("buckets", "count", "seconds", "request_bytes", "response_bytes", "statuses", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last one is +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0  # 5xx and unhandled exceptions
+
+    def observe(self, seconds: float, status: int, request_bytes: int, response_bytes: int):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status >= 500:
+            self.errors += 1
+
+
+class Metrics:
+    """Per-route request metrics, rendered in the Prometheus text format.
+
+    Only the middleware writes to it, always from the event loop thread, so
+    the counters need no lock.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+
+    def observe(self, method: str, route: str, seconds: float, status: int, request_bytes: int,
+                response_bytes: int):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.observe(seconds, status, request_bytes, response_bytes)
+
+    def render(self, gauges: Dict[str, Tuple[str, float]]) -> str:
+        """Exposition text; `gauges` maps a metric name to (help, value)"""
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP http_request_duration_seconds Time from request start to the end of the response body.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+        for name, help_text, value in (
+            ("http_requests_total", "Responses by status.", None),
+            ("http_request_errors_total", "5xx responses and unhandled exceptions.", lambda s: s.errors),
+            ("http_request_bytes_total", "Request body bytes, from Content-Length.", lambda s: s.request_bytes),
+            ("http_response_bytes_total", "Response body bytes as sent (after compression).",
+             lambda s: s.response_bytes),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{escape(route)}"'
+                if value is None:
+                    for status, count in sorted(stats.statuses.items()):
+                        lines.append(f'{name}{{{labels},status="{status}"}} {count}')
+                else:
+                    lines.append(f"{name}{{{labels}}} {value(stats)}")
+        for name, (help_text, value) in gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class RequestProfile:
+    """cProfile data of one sampled request: the event loop's, plus one per
+    threadpool call made for it (cProfile only sees the thread it runs in)"""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+
+    def start(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()
+        return profile
+
+    def dump(self, path: str):
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def profile_thread(func: Callable) -> Callable:
+    """Sync endpoint wrapper: profile the call if its request is being profiled"""
+    @wraps(func)
+    def endpoint(*args, **kwargs):
+        request_profile = current_profile.get()
+        if request_profile is None:
+            return func(*args, **kwargs)
+        profile = request_profile.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+    return endpoint
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """starlette's run_in_threadpool, with the call in the request's profile if it has one"""
+    if current_profile.get() is not None:
+        func = profile_thread(func)
+    return await starlette_run_in_threadpool(func, *args, **kwargs)
+
+
+class ProfiledRoute(APIRoute):
+    """Routes whose sync endpoints show up in request profiles (see PROFILE_SLOW_MS)"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not iscoroutinefunction(endpoint):
+            endpoint = profile_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class MetricsMiddleware:
+    """Time every request and, when PROFILE_SLOW_MS is set, profile a sample
+    of them and keep the profiles of the slow ones.
+
+    Profiles are written to PROFILE_DIR as <time>-<method>-<route>-<ms>.prof
+    (open with pstats or snakeviz). One request is profiled at a time; its
+    event loop profile also covers whatever else the loop ran meanwhile.
+    """
+
+    def __init__(self, app, metrics: Metrics, slow_ms: Optional[float] = None, sample: float = 1.0,
+                 profile_dir: str = "profiles"):
+        self.app = app
+        self.metrics = metrics
+        self.slow = slow_ms / 1000 if slow_ms is not None else None
+        self.sample = sample
+        self.profile_dir = profile_dir
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        request_profile = None
+        if self.slow is not None and not self._profiling and random.random() < self.sample:
+            self._profiling = True
+            request_profile = RequestProfile()
+            current_profile.set(request_profile)
+            loop_profile = request_profile.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED
+            request_bytes = 0
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    request_bytes = int(value) if value.isdigit() else 0
+                    break
+            self.metrics.observe(scope["method"], route, elapsed, status, request_bytes, response_bytes)
+            if request_profile is not None:
+                loop_profile.disable()
+                current_profile.set(None)
+                self._profiling = False
+                if elapsed >= self.slow:
+                    self._dump(request_profile, scope["method"], route, elapsed)
+
+    def _dump(self, request_profile: RequestProfile, method: str, route: str, elapsed: float):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{name}-{elapsed * 1000:.0f}ms.prof")
+        request_profile.dump(path)
@@ -0,0 +1,87 @@
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+
+
+def turn_key(seed: int, round_number: int, username: str) -> int:
+    """Position of a player in a round's shuffled order.
+
+    A hash rather than a shuffled list: the order of a round only depends on
+    the seed, the round and the names, so every worker (and a reloaded game)
+    agrees on it, and players joining or leaving mid-round do not reshuffle
+    everyone else.
+    """
+    digest = blake2b(f"{seed}:{round_number}:{username}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class TurnScheduler:
+    """Who plays next: a seeded random order per round, played players and
+    categories kept in sets.
+
+    Derived from the game's persisted fields (players, current_round,
+    players_played_this_round, played_categories) and kept in step with them
+    by the endpoints; the heap holds the round's order, entries for players
+    that already played or left are skipped when they reach the top.
+    """
+    __slots__ = ("seed", "round", "players", "played", "played_categories", "_queue")
+
+    def __init__(self, seed: int, round_number: int, players: Iterable[str], played: Iterable[str] = (),
+                 played_categories: Iterable[str] = ()):
+        self.seed = seed
+        self.players: Dict[str, None] = dict.fromkeys(players)
+        self.played_categories: Set[str] = set(played_categories)
+        self.start_round(round_number)
+        self.played.update(p for p in played if p in self.players)
+
+    def start_round(self, round_number: int):
+        self.round = round_number
+        self.played: Set[str] = set()
+        self._queue: List[Tuple[int, str]] = [(turn_key(self.seed, round_number, p), p) for p in self.players]
+        heapq.heapify(self._queue)
+
+    def peek(self) -> Optional[str]:
+        """The next player of this round who hasn't played, or None once everyone has"""
+        queue = self._queue
+        while queue:
+            username = queue[0][1]
+            if username in self.players and username not in self.played:
+                return username
+            heapq.heappop(queue)
+        return None
+
+    def remaining(self) -> int:
+        """Players who haven't played this round"""
+        return len(self.players) - len(self.played)
+
+    def mark_played(self, username: str) -> bool:
+        """Record a finished turn; False if it was already recorded (or the player left)"""
+        if username not in self.players or username in self.played:
+            return False
+        self.played.add(username)
+        return True
+
+    def add_player(self, username: str):
+        """A player joining mid-round still gets a turn in it"""
+        self.players[username] = None
+        heapq.heappush(self._queue, (turn_key(self.seed, self.round, username), username))
+
+    def remove_player(self, username: str):
+        self.players.pop(username, None)
+        self.played.discard(username)
+
+    def rename_player(self, old: str, new: str):
+        played = old in self.played
+        self.remove_player(old)
+        self.add_player(new)
+        if played:
+            self.played.add(new)
+
+    def mark_category(self, name: str) -> bool:
+        if name in self.played_categories:
+            return False
+        self.played_categories.add(name)
+        return True
+
+    def categories_left(self, categories: Iterable[str]) -> bool:
+        return any(name not in self.played_categories for name in categories)
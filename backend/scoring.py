@@ -0,0 +1,192 @@
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import re
+import unicodedata
+
+
+WORD_EXP = re.compile(r'\w+')
+SCORING_MODES = ("exact", "fuzzy")
+FUZZY_THRESHOLD = 0.8  # character similarity at which a fuzzy-matched word counts as correct
+FUZZY_BAND = 8  # how far (in words) the alignment may drift beyond the length difference
+# Ligatures NFKD leaves alone but players will type as two letters
+LIGATURES = str.maketrans({"œ": "oe", "Œ": "OE", "æ": "ae", "Æ": "AE", "ß": "ss"})
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of a word: "Été" and "ete" both give "ete" """
+    text = unicodedata.normalize("NFKD", text.translate(LIGATURES))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+@lru_cache(maxsize=65536)
+def normalize_word(word: str) -> str:
+    """Comparison key for a typed word; punctuation around or inside it is ignored"""
+    if word.isascii() and word.isalnum():
+        return word.lower()
+    if word.isascii():
+        return "".join(WORD_EXP.findall(word.lower()))
+    return "".join(WORD_EXP.findall(fold(word)))
+
+
+class AnswerIndex(NamedTuple):
+    """Expected answer for a song's hidden lines, computed once per song version"""
+    texts: Tuple[str, ...]  # hidden lines as displayed
+    words: Tuple[str, ...]  # expected words as shown back to the player
+    keys: Tuple[str, ...]  # normalized form of each word, compared against attempts
+
+
+def build_answer_index(lyrics: Sequence[Dict], hidden_line_indices: Sequence[int]) -> AnswerIndex:
+    texts = []
+    words = []
+    for idx in hidden_line_indices:
+        if idx < len(lyrics):
+            text = lyrics[idx]["text"]
+            texts.append(text)
+            words.extend(WORD_EXP.findall(text.lower()))
+    return AnswerIndex(tuple(texts), tuple(words), tuple(normalize_word(w) for w in words))
+
+
+def score_words(index: AnswerIndex, attempt: Sequence[str]) -> Tuple[int, List[Dict]]:
+    """Compare an attempt word by word, returning (correct_count, word_results)"""
+    keys = [normalize_word(attempted) for attempted in attempt[:len(index.keys)]]
+    matches = [a == b for a, b in zip(index.keys, keys)]
+    results = [{"word": expected, "attempt": attempted, "correct": is_correct}
+               for expected, attempted, is_correct in zip(index.words, attempt, matches)]
+    return sum(matches), results
+
+
+def _char_masks(word: str) -> Dict[str, int]:
+    """Bit i of masks[c] is set when word[i] == c, for the bit-parallel edit distance"""
+    masks: Dict[str, int] = {}
+    for i, c in enumerate(word):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
+
+def edit_distance(a: str, b: str, masks: Optional[Dict[str, int]] = None) -> int:
+    """Levenshtein distance using Myers' bit-vector algorithm: one pass over b,
+    a handful of integer operations per character whatever the length of a"""
+    m = len(a)
+    if not m:
+        return len(b)
+    if masks is None:
+        masks = _char_masks(a)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    for c in b:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def similarity(a: str, b: str, masks: Optional[Dict[str, int]] = None) -> float:
+    """1.0 for identical words, down to 0.0 when no character lines up"""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    return 1.0 - edit_distance(a, b, masks) / longest
+
+
+def align_words(expected: Sequence[str], attempted: Sequence[str]) -> List[Tuple[int, float]]:
+    """Needleman-Wunsch alignment of attempted keys onto expected keys.
+
+    Substituting one word for another costs 1 - similarity, skipping or adding
+    a word costs 1, so a forgotten word only loses that word instead of
+    shifting every following one. Returns, for each expected word, the index
+    of the attempted word it was matched with (-1 if none) and their
+    similarity. The DP is restricted to a band around the diagonal and each
+    distinct pair of words is only compared once.
+    """
+    n, m = len(expected), len(attempted)
+    band = abs(n - m) + FUZZY_BAND
+    inf = float("inf")
+    pair_sims: Dict[str, Dict[str, float]] = {}
+
+    # prev/row hold costs for columns 0..m; moves[i][j]: 0 = match, 1 = skip expected, 2 = extra attempted
+    prev = [float(j) if j <= band else inf for j in range(m + 1)]
+    moves = [bytearray(b"\x02" * (m + 1))]
+    for i in range(1, n + 1):
+        row = [inf] * (m + 1)
+        move = bytearray(m + 1)
+        lo, hi = max(0, i - band), min(m, i + band)
+        if lo == 0:
+            row[0] = float(i)
+            move[0] = 1
+            lo = 1
+        word = expected[i - 1]
+        sims = pair_sims.get(word)
+        if sims is None:
+            sims = pair_sims[word] = {word: 1.0}
+        masks = None
+        left = row[lo - 1]
+        for j in range(lo, hi + 1):
+            other = attempted[j - 1]
+            sim = sims.get(other)
+            if sim is None:
+                if masks is None:
+                    masks = _char_masks(word)
+                sim = sims[other] = similarity(word, other, masks)
+            best = prev[j - 1] + 1.0 - sim
+            step = 0
+            up = prev[j] + 1.0
+            if up < best:
+                best, step = up, 1
+            if left + 1.0 < best:
+                best, step = left + 1.0, 2
+            row[j] = left = best
+            move[j] = step
+        moves.append(move)
+        prev = row
+
+    matches = [(-1, 0.0)] * n
+    i, j = n, m
+    while i > 0 and j > 0:
+        step = moves[i][j]
+        if step == 0:
+            matches[i - 1] = (j - 1, pair_sims[expected[i - 1]][attempted[j - 1]])
+            i, j = i - 1, j - 1
+        elif step == 1:
+            i -= 1
+        else:
+            j -= 1
+    return matches
+
+
+def score_words_fuzzy(index: AnswerIndex, attempt: Sequence[str]) -> Tuple[int, List[Dict]]:
+    """Alignment-based variant of score_words; each result also carries the similarity.
+
+    Attempted words matched with no expected word each take one correct word
+    back, so typing more words than the passage holds never helps. Only the
+    first len(expected) + FUZZY_BAND are aligned (the band can't reach further
+    than that); the rest count as extra words.
+    """
+    aligned = attempt[:len(index.keys) + FUZZY_BAND]
+    keys = [normalize_word(attempted) for attempted in aligned]
+    results = []
+    correct_count = 0
+    matched = 0
+    for expected, (j, sim) in zip(index.words, align_words(index.keys, keys)):
+        is_correct = sim >= FUZZY_THRESHOLD
+        results.append({"word": expected, "attempt": aligned[j] if j >= 0 else "",
+                        "correct": is_correct, "similarity": round(sim, 2)})
+        correct_count += is_correct
+        matched += j >= 0
+    return max(0, correct_count - (len(attempt) - matched)), results
+
+
+def score_attempt(index: AnswerIndex, attempt: Sequence[str], mode: str = "exact") -> Tuple[int, List[Dict]]:
+    if mode == "fuzzy":
+        return score_words_fuzzy(index, attempt)
+    return score_words(index, attempt)
@@ -0,0 +1,176 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import nlargest, nsmallest
+from math import log
+from threading import Lock
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from scoring import WORD_EXP, normalize_word
+
+
+TITLE_WEIGHT = 4.0  # a word of the title weighs as much as one sung e^3 (~20) times
+PREFIX_FACTOR = 0.5  # share of a match's score kept when only the start of a word matched
+MIN_PREFIX = 2  # a last query word shorter than this only matches whole words
+MAX_EXPANSIONS = 64  # indexed words a prefix may expand to, the shortest first
+MAX_QUERY_WORDS = 8
+COMPACT_MIN = 1024  # removed documents tolerated before their postings are dropped
+
+
+def terms(text: str) -> List[str]:
+    """Folded words of a text, as indexed and searched: "L'Été" gives ["l", "ete"]"""
+    return [term for term in map(normalize_word, WORD_EXP.findall(text)) if term]
+
+
+def query_terms(query: str) -> List[Tuple[str, bool]]:
+    """(word, matches as a prefix) for each distinct query word. Queries are
+    typed as you go, so only the last word may be incomplete, unless a space
+    or punctuation follows it."""
+    words = terms(query)[-MAX_QUERY_WORDS:]
+    partial = bool(words) and query[-1:].isalnum() and len(words[-1]) >= MIN_PREFIX
+    return [(word, partial and word == words[-1]) for word in dict.fromkeys(words)]
+
+
+def matching_line(lines: Sequence[str], query: str) -> Optional[str]:
+    """First line holding a word of the query, to show where a song matched"""
+    words = query_terms(query)
+    whole = {word for word, prefix in words if not prefix}
+    prefixes = tuple(word for word, prefix in words if prefix)
+    for line in lines:
+        line_terms = terms(line)
+        if not whole.isdisjoint(line_terms) or (prefixes and any(term.startswith(prefixes) for term in line_terms)):
+            return line
+    return None
+
+
+class SearchIndex:
+    """Inverted index of song titles and lyrics for ranked, accent-insensitive
+    prefix search, updated one song at a time.
+
+    Every indexed word maps to two parallel arrays: the slots of the documents
+    holding it and its weight in each (TITLE_WEIGHT for a title word, plus
+    1 + log(count) for a lyric word). A document gets a fresh slot whenever
+    it is (re)indexed; removing it only forgets the slot, and postings of
+    forgotten slots are dropped once they outnumber the live ones. The
+    vocabulary is also kept sorted, so the words a prefix expands to are a
+    bisect away.
+
+    Writers hold `lock`; searches take no lock and may run alongside them.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.vocabulary: List[str] = []
+        self.slots: Dict[Hashable, int] = {}  # document id -> its current slot
+        self.documents: List[Optional[Hashable]] = []  # slot -> document id, None once removed
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.slots
+
+    def frequency(self, term: str) -> int:
+        """Documents holding a folded word, counting removed ones until the next compaction"""
+        entry = self.postings.get(term)
+        return len(entry[0]) if entry is not None else 0
+
+    def add(self, doc_id: Hashable, title: str, lines: Iterable[str]):
+        """Index a document, replacing whatever was indexed under doc_id"""
+        self.remove(doc_id)
+        weights = dict.fromkeys(terms(title), TITLE_WEIGHT)
+        counts: Dict[str, int] = {}
+        # Counted as written, then folded once per distinct word
+        for word, count in Counter(WORD_EXP.findall("\n".join(lines).lower())).items():
+            term = normalize_word(word)
+            if term:
+                counts[term] = counts.get(term, 0) + count
+        for term, count in counts.items():
+            weights[term] = weights.get(term, 0.0) + 1.0 + log(count)
+        slot = len(self.documents)
+        self.documents.append(doc_id)
+        self.slots[doc_id] = slot
+        postings = self.postings
+        for term, weight in weights.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array("I"), array("f"))
+                insort(self.vocabulary, term)
+            entry[0].append(slot)
+            entry[1].append(weight)
+
+    def remove(self, doc_id: Hashable):
+        slot = self.slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self.documents[slot] = None
+        self.removed += 1
+        if self.removed > max(COMPACT_MIN, len(self.slots)):
+            self.compact()
+
+    def compact(self):
+        """Drop the postings of removed documents. Slots keep their numbers, and
+        the new postings replace the old ones whole, for searches in progress."""
+        documents = self.documents
+        postings = {}
+        for term, (slots, weights) in self.postings.items():
+            kept = [i for i, slot in enumerate(slots) if documents[slot] is not None]
+            if kept:
+                postings[term] = (array("I", [slots[i] for i in kept]), array("f", [weights[i] for i in kept]))
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.removed = 0
+
+    def expand(self, word: str, prefix: bool) -> List[Tuple[str, float]]:
+        """Indexed words a query word matches, with the share of the score they keep"""
+        expansions = [(word, 1.0)]
+        if prefix:
+            vocabulary = self.vocabulary
+            longer = vocabulary[bisect_left(vocabulary, word):bisect_left(vocabulary, word + "\U0010ffff")]
+            longer = [term for term in longer if term != word]
+            if len(longer) > MAX_EXPANSIONS:
+                longer = nsmallest(MAX_EXPANSIONS, longer, key=len)
+            expansions += [(term, PREFIX_FACTOR) for term in longer]
+        return expansions
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[Hashable, float]]]:
+        """(number of matches, page of (doc id, score) best first, ties in indexing order).
+
+        A document matches when it holds every word of the query; the last
+        one may also be the start of a word (see query_terms()). Each query word adds the weight of the word it
+        matched in the document times that word's rarity across the index,
+        log(1 + documents / documents holding it), halved for a prefix match.
+        When it matches several, the whole word counts, else the rarest.
+        """
+        postings = self.postings
+        live = max(len(self.slots), 1)
+        words = []
+        for word, prefix in query_terms(query):
+            expansions = [(postings[term], factor) for term, factor in self.expand(word, prefix) if term in postings]
+            words.append((sum(len(entry[0]) for entry, _ in expansions), expansions))
+        if not words:
+            return 0, []
+
+        matches = None
+        # Rarest word first, so the running intersection only shrinks from the smallest set
+        for _, expansions in sorted(words, key=lambda w: w[0]):
+            scores: Dict[int, float] = {}
+            # Most common first: a later (rarer, then whole-word) match overwrites the score
+            for (slots, weights), factor in sorted(expansions, key=lambda e: (e[1], -len(e[0][0]))):
+                scores.update(zip(slots, map((factor * log(1 + live / len(slots))).__mul__, weights)))
+            if matches is None:
+                matches = scores
+            elif len(scores) < len(matches):
+                matches = {slot: matches[slot] + score for slot, score in scores.items() if slot in matches}
+            else:
+                matches = {slot: score + scores[slot] for slot, score in matches.items() if slot in scores}
+            if not matches:
+                return 0, []
+
+        documents = self.documents
+        if self.removed:
+            matches = {slot: score for slot, score in matches.items() if documents[slot] is not None}
+        page = nlargest(offset + limit, matches, key=matches.get)[offset:]
+        return len(matches), [(documents[slot], matches[slot]) for slot in page]
@@ -0,0 +1,1167 @@
+from bisect import bisect_left, insort
+from collections import ChainMap, OrderedDict
+from collections.abc import Mapping, MutableMapping
+from functools import wraps
+from inspect import signature
+from threading import Event, Lock, RLock, Thread, local
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+import atexit
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to SQLite's own busy-wait
+    fcntl = None
+
+
+DEFAULT_FLUSH_INTERVAL = 0.05  # seconds between group commits
+DEFAULT_SNAPSHOT_EVERY = 10000  # log records before the log is compacted into a snapshot
+LIBRARY_LOCK = "library"  # lock key for state shared by all games (library songs, categories)
+DEFAULT_FINISHED_TTL = 3600.0  # seconds a finished game stays in memory after its last use
+DEFAULT_IDLE_TTL = 86400.0  # seconds any game stays in memory after its last use
+DEFAULT_SWEEP_INTERVAL = 60.0  # seconds between looks for games to evict
+SUMMARY_FIELDS = ("name", "state")  # game fields listings need, kept in the archive index
+STAT_FIELDS = ("points", "attempts", "scored", "words", "correct_words")  # running totals, see add_stats()
+
+
+class StoredState:
+    """Raw records recovered from storage, keyed the same way as the in-memory dicts"""
+
+    def __init__(self):
+        self.songs: Dict[int, dict] = {}
+        self.categories: Dict[str, dict] = {}
+        self.games: Dict[int, dict] = {}
+        self.game_songs: Dict[int, Dict[int, dict]] = {}
+        self.song_keys: Dict[str, int] = {}
+        self.contents: Dict[int, dict] = {}
+        self.content_refs: Dict[int, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.stats: Dict[Tuple[str, str], List[int]] = {}
+
+    def apply(self, record: dict):
+        op = record["op"]
+        if op == "song":
+            self.songs[record["data"]["id"]] = record["data"]
+        elif op == "category":
+            self.categories[record["data"]["name"]] = record["data"]
+        elif op == "game":
+            self.games[record["data"]["id"]] = record["data"]
+        elif op == "del_game":
+            self.games.pop(record["id"], None)
+            self.game_songs.pop(record["id"], None)
+        elif op == "game_song":
+            self.game_songs.setdefault(record["game_id"], {})[record["data"]["id"]] = record["data"]
+        elif op == "del_game_song":
+            self.game_songs.get(record["game_id"], {}).pop(record["id"], None)
+        elif op == "song_key":
+            self.song_keys[record["key"]] = record["id"]
+        elif op == "del_song_key":
+            self.song_keys.pop(record["key"], None)
+        elif op == "content":
+            self.contents[record["data"]["id"]] = record["data"]
+            self.content_refs[record["data"]["id"]] = record["refs"]
+        elif op == "content_refs":
+            if record["id"] in self.contents:
+                self.content_refs[record["id"]] = record["refs"]
+        elif op == "del_content":
+            self.contents.pop(record["id"], None)
+            self.content_refs.pop(record["id"], None)
+        elif op == "counter":
+            self.counters[record["name"]] = max(self.counters.get(record["name"], 1), record["value"])
+        elif op == "stats":
+            if any(record["data"]):
+                self.stats[(record["kind"], record["key"])] = record["data"]
+            else:
+                self.stats.pop((record["kind"], record["key"]), None)
+
+    def records(self):
+        """Minimal list of records that rebuilds this state"""
+        for name, value in self.counters.items():
+            yield {"op": "counter", "name": name, "value": value}
+        for data in self.songs.values():
+            yield {"op": "song", "data": data}
+        for data in self.contents.values():
+            yield {"op": "content", "data": data, "refs": self.content_refs.get(data["id"], 0)}
+        for key, song_id in self.song_keys.items():
+            yield {"op": "song_key", "key": key, "id": song_id}
+        for data in self.categories.values():
+            yield {"op": "category", "data": data}
+        for game_id, data in self.games.items():
+            yield {"op": "game", "data": data}
+            for song in self.game_songs.get(game_id, {}).values():
+                yield {"op": "game_song", "game_id": game_id, "data": song}
+        for (kind, key), data in self.stats.items():
+            yield {"op": "stats", "kind": kind, "key": key, "data": data}
+
+
+class EvictionPolicy:
+    """Which resident games to move out of memory. A TTL or cap of 0 is off.
+
+    Finished games go after `finished_ttl` seconds without a request, any game
+    after `idle_ttl`, and beyond `max_resident` games the least recently used.
+    """
+
+    def __init__(self, finished_ttl: float = DEFAULT_FINISHED_TTL, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 max_resident: int = 0, interval: float = DEFAULT_SWEEP_INTERVAL):
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self.max_resident = max_resident
+        self.interval = interval
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.finished_ttl or self.idle_ttl or self.max_resident)
+
+    def select(self, resident: List[Tuple[int, str, float]], now: float) -> List[int]:
+        """Ids to evict, given (game id, state, time of last use) for each resident game"""
+        evicted = []
+        kept = []
+        for game_id, state, used in resident:
+            idle = now - used
+            if (self.idle_ttl and idle >= self.idle_ttl) or (
+                    self.finished_ttl and state == "finished" and idle >= self.finished_ttl):
+                evicted.append(game_id)
+            else:
+                kept.append((used, game_id))
+        if self.max_resident and len(kept) > self.max_resident:
+            kept.sort()
+            evicted += [game_id for _, game_id in kept[:len(kept) - self.max_resident]]
+        return evicted
+
+
+class GameArchive:
+    """Games moved out of memory, each as a gzipped file of its store records.
+
+    index.jsonl lists the archived games with their SUMMARY_FIELDS so listings
+    don't open the files. It is appended to (fsynced: it is what makes a file
+    findable) and rewritten on open or once mostly stale.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._summaries: Dict[int, dict] = {}
+        self._lock = Lock()
+        self._index = None
+        self._index_records = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        break  # torn last line
+                    if record.get("restored"):
+                        self._summaries.pop(record["id"], None)
+                    else:
+                        self._summaries[record["id"]] = record
+            with self._lock:
+                self._rewrite_index()
+
+    def path(self, game_id: int) -> str:
+        return os.path.join(self.directory, f"{game_id}.jsonl.gz")
+
+    def __contains__(self, game_id) -> bool:
+        return game_id in self._summaries
+
+    def __len__(self):
+        return len(self._summaries)
+
+    def summaries(self) -> List[dict]:
+        with self._lock:
+            return list(self._summaries.values())
+
+    def put(self, game_id: int, records: List[dict]):
+        """Archive a game from its records, its own record first"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(game_id)
+        with open(path + ".tmp", "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(path + ".tmp", path)
+        summary = {"id": game_id, **{field: records[0]["data"][field] for field in SUMMARY_FIELDS}}
+        with self._lock:
+            self._summaries[game_id] = summary
+            self._append(summary)
+
+    def get(self, game_id: int) -> StoredState:
+        state = StoredState()
+        with gzip.open(self.path(game_id), "rb") as f:
+            for raw in f:
+                state.apply(json.loads(raw))
+        return state
+
+    def remove(self, game_id: int):
+        with self._lock:
+            if self._summaries.pop(game_id, None) is None:
+                return
+            self._append({"id": game_id, "restored": True})
+        try:
+            os.remove(self.path(game_id))
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record: dict):
+        if self._index is None:
+            self._index = open(self.index_path, "ab")
+        self._index.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._index_records += 1
+        if self._index_records > 2 * len(self._summaries) + 1000:
+            self._rewrite_index()
+
+    def _rewrite_index(self):
+        if self._index is not None:
+            self._index.close()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for summary in self._summaries.values():
+                f.write(json.dumps(summary, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._index = open(self.index_path, "ab")
+        self._index_records = len(self._summaries)
+
+    def close(self):
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+class GameTable(MutableMapping):
+    """Games of an in-process store: the resident ones in a dict, the others in
+    a GameArchive. Looking up an archived game restores it, under the game's
+    lock so that two requests can't each restore their own copy.
+    """
+
+    def __init__(self, store: "MemoryStore", resident: Dict[int, object], archive: GameArchive):
+        self.store = store
+        self.archive = archive
+        self._resident = resident
+        now = time.monotonic()
+        self._used: Dict[int, float] = {game_id: now for game_id in resident}
+        for game_id in resident:
+            # Archived, but its removal from the store didn't reach the disk: the store's copy wins
+            archive.remove(game_id)
+
+    def __getitem__(self, game_id):
+        game = self._resident.get(game_id)
+        if game is None:
+            game = self._restore(game_id)
+        self._used[game_id] = time.monotonic()
+        return game
+
+    def _restore(self, game_id):
+        if game_id not in self.archive:
+            raise KeyError(game_id)
+        with self.store.game_lock(game_id):
+            game = self._resident.get(game_id)
+            if game is not None:
+                return game  # another request restored it meanwhile
+            state = self.archive.get(game_id)
+            game = self.store.decode_game(state.games[game_id], state.game_songs.get(game_id, {}))
+            self._resident[game_id] = game
+            # Back in the store before the archived copy goes
+            for song in game.songs.values():
+                self.store.save_game_song(game_id, song)
+            self.store.save_game(game)
+            self.store.flush()
+            self.archive.remove(game_id)
+        return game
+
+    def __contains__(self, game_id) -> bool:
+        return game_id in self._resident or game_id in self.archive
+
+    def is_resident(self, game_id) -> bool:
+        """Whether game_id is in memory, so that looking it up doesn't restore it"""
+        return game_id in self._resident
+
+    def __setitem__(self, game_id, game):
+        self._resident[game_id] = game
+        self._used[game_id] = time.monotonic()
+
+    def __delitem__(self, game_id):
+        if self._resident.pop(game_id, None) is None and game_id not in self.archive:
+            raise KeyError(game_id)
+        self._used.pop(game_id, None)
+        self.archive.remove(game_id)
+
+    def __iter__(self):
+        return iter(sorted(set(self._resident) | {summary["id"] for summary in self.archive.summaries()}))
+
+    def __len__(self):
+        return len(self._resident) + len(self.archive)
+
+    def resident(self) -> list:
+        """Games held in memory"""
+        return list(self._resident.values())
+
+    def usage(self) -> List[Tuple[int, str, float]]:
+        """(game id, state, time of last use) of the resident games, for EvictionPolicy"""
+        return [(game_id, game.state, self._used.get(game_id, 0.0)) for game_id, game in list(self._resident.items())]
+
+    def evict(self, game_id: int, last_used: float) -> bool:
+        """Archive a resident game, unless it was used after `last_used`"""
+        with self.store.game_lock(game_id):
+            game = self._resident.get(game_id)
+            if game is None or self._used.get(game_id, 0.0) > last_used:
+                return False
+            self.archive.put(game_id, self.store.game_records(game))
+            del self._resident[game_id]
+            self._used.pop(game_id, None)
+            self.store.delete_game(game_id)
+        return True
+
+    def summaries(self, states: Optional[Set[str]], offset: int, limit: int) -> Tuple[int, List[dict]]:
+        """(number of games in `states`, one page of their summaries), newest first"""
+        rows = {summary["id"]: summary for summary in self.archive.summaries()}
+        for game in list(self._resident.values()):
+            rows[game.id] = {"id": game.id, **{field: getattr(game, field) for field in SUMMARY_FIELDS}}
+        matching = [rows[game_id] for game_id in sorted(rows, reverse=True)
+                    if states is None or rows[game_id]["state"] in states]
+        return len(matching), matching[offset:offset + limit]
+
+
+class StatsTable:
+    """Running totals (STAT_FIELDS) per (kind, key), e.g. ("player", "Léa") or
+    ("song", "12"), plus the players ranked by points.
+
+    `ranking` holds (-points, name) in order, so a player's rank is a bisect
+    and a page of the leaderboard a slice; an update moves one entry. Rows
+    back to all zeros are dropped.
+    """
+
+    def __init__(self, rows: Optional[Dict[Tuple[str, str], List[int]]] = None):
+        self.rows: Dict[Tuple[str, str], List[int]] = {key: list(row) for key, row in (rows or {}).items()}
+        self.ranking: List[Tuple[int, str]] = sorted((-row[0], key) for (kind, key), row in self.rows.items()
+                                                     if kind == "player")
+
+    def add(self, kind: str, key: str, deltas: Dict[str, int]) -> List[int]:
+        row = self.rows.get((kind, key))
+        if row is None:
+            row = self.rows[(kind, key)] = [0] * len(STAT_FIELDS)
+        elif kind == "player":
+            del self.ranking[bisect_left(self.ranking, (-row[0], key))]
+        for i, field in enumerate(STAT_FIELDS):
+            row[i] += deltas.get(field, 0)
+        if not any(row):
+            del self.rows[(kind, key)]
+        elif kind == "player":
+            insort(self.ranking, (-row[0], key))
+        return row
+
+    def get(self, kind: str, key: str) -> Optional[List[int]]:
+        return self.rows.get((kind, key))
+
+    def rank(self, name: str) -> Optional[int]:
+        """1 + the number of players with more points"""
+        row = self.rows.get(("player", name))
+        return None if row is None else bisect_left(self.ranking, (-row[0],)) + 1
+
+    def top(self, offset: int, limit: int) -> Tuple[int, List[Tuple[str, List[int]]]]:
+        page = self.ranking[offset:offset + limit]
+        return len(self.ranking), [(name, self.rows[("player", name)]) for _, name in page]
+
+
+class MemoryStore:
+    """Default backend: state lives only in the process, exactly as before"""
+
+    in_process = True  # lookups are dict reads, cheap enough for async endpoints
+
+    def __init__(self, archive_dir: Optional[str] = None, eviction: Optional[EvictionPolicy] = None):
+        # Ids and versions may start over with a new process (or be lost in a crash before a
+        # flush): anything built from them, like an ETag, also carries this
+        self.epoch = os.urandom(4).hex()
+        self._counters: Dict[str, int] = {}
+        self._counter_lock = Lock()
+        self._song_keys: Dict[str, int] = {}
+        self._content_refs: Dict[int, int] = {}
+        self._locks: Dict[Hashable, RLock] = {}
+        self._locks_lock = Lock()
+        self.dump_game_song: Callable[[object], dict] = lambda song: song.dict()
+        self.decode_game: Optional[Callable[[dict, Dict[int, dict]], object]] = None
+        self.archive_dir = archive_dir  # None: a temporary directory, as nothing else survives a restart
+        self.games = None
+        self.eviction = eviction
+        self._stop_sweeping = Event()
+        self._sweeper: Optional[Thread] = None
+        self._stats = StatsTable()
+        self._stats_lock = Lock()
+
+    def load(self) -> StoredState:
+        return StoredState()
+
+    def open(self, song_model, category_model, game_model,
+             load_game_song: Optional[Callable[[dict, Mapping], object]] = None,
+             dump_game_song: Optional[Callable[[object], dict]] = None):
+        """Build the songs, categories, games and contents dicts from whatever load() recovered.
+
+        Game songs may be stored as references to library songs, or to contents:
+        lyrics only games use, kept out of the listed library (see save_content).
+        dump_game_song gives the record to store and load_game_song(record, library)
+        rebuilds it from either. Games the eviction policy picks move to the
+        archive until requested.
+        """
+        if load_game_song is None:
+            load_game_song = lambda data, songs: song_model(**data)  # noqa: E731
+        if dump_game_song is not None:
+            self.dump_game_song = dump_game_song
+        state = self.load()
+        songs = {sid: song_model(**data) for sid, data in state.songs.items()}
+        categories = {name: category_model(**data) for name, data in state.categories.items()}
+        contents = {sid: song_model(**data) for sid, data in state.contents.items()}
+        library = ChainMap(songs, contents)
+
+        def decode_game(data: dict, game_songs: Dict[int, dict]):
+            return game_model(songs={sid: load_game_song(s, library) for sid, s in game_songs.items()}, **data)
+
+        self.decode_game = decode_game
+        resident = {gid: decode_game(data, state.game_songs.get(gid, {})) for gid, data in state.games.items()}
+        if self.archive_dir is None:
+            self.archive_dir = tempfile.mkdtemp(prefix="games-archive-")
+            atexit.register(shutil.rmtree, self.archive_dir, True)
+        self.games = GameTable(self, resident, GameArchive(self.archive_dir))
+        self._song_keys = dict(state.song_keys)
+        self._content_refs = dict(state.content_refs)
+        self._stats = StatsTable(state.stats)
+        self._start_sweeper()
+        return songs, categories, self.games, contents
+
+    def _start_sweeper(self):
+        if self.eviction is not None and self.eviction.enabled:
+            self._sweeper = Thread(target=self._run_sweeper, name="game-evictor", daemon=True)
+            self._sweeper.start()
+
+    def _run_sweeper(self):
+        while not self._stop_sweeping.wait(self.eviction.interval):
+            try:
+                self.sweep()
+            except OSError:
+                pass  # e.g. disk full: the games stay resident until the next sweep
+
+    def sweep(self, now: Optional[float] = None) -> List[int]:
+        """Evict the resident games the policy picks; returns the ids evicted"""
+        usage = self.games.usage()
+        last_used = {game_id: used for game_id, _, used in usage}
+        picked = self.eviction.select(usage, time.monotonic() if now is None else now)
+        return [game_id for game_id in picked if self.games.evict(game_id, last_used[game_id])]
+
+    def _stop_sweeper(self):
+        self._stop_sweeping.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def lock(self, key: Hashable) -> RLock:
+        """Re-entrant lock for one game (see game_lock) or LIBRARY_LOCK, created on first use"""
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._locks_lock:
+                lock = self._locks.setdefault(key, RLock())
+        return lock
+
+    def game_lock(self, game_id: int) -> RLock:
+        return self.lock(("game", game_id))
+
+    def atomic(self, func):
+        """Wrap an endpoint that mutates state so it runs alone on what it mutates.
+
+        Endpoints run in the threadpool. One taking a `game_id` holds that
+        game's lock, so requests for different games never wait on each other;
+        the others (library songs, new games) hold LIBRARY_LOCK. Code that
+        needs both takes the game lock first.
+        """
+        lock_for = self._endpoint_lock(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with lock_for(args, kwargs):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _endpoint_lock(self, func) -> Callable[[tuple, dict], RLock]:
+        """The lock a call to `func` holds: its game's, or LIBRARY_LOCK"""
+        parameters = list(signature(func).parameters)
+        if "game_id" not in parameters:
+            return lambda args, kwargs: self.lock(LIBRARY_LOCK)
+        position = parameters.index("game_id")
+        return lambda args, kwargs: self.game_lock(kwargs["game_id"] if "game_id" in kwargs else args[position])
+
+    def next_id(self, name: str) -> int:
+        with self._counter_lock:
+            value = self._counters.get(name, 1)
+            self._counters[name] = value + 1
+            self._record(("counter", name), lambda: {"op": "counter", "name": name, "value": value + 1})
+        return value
+
+    def save_song(self, song):
+        self._record(("song", song.id), lambda: {"op": "song", "data": song.dict()})
+
+    def find_song(self, key: str) -> Optional[int]:
+        """Library song registered under a content key (see save_song_key)"""
+        return self._song_keys.get(key)
+
+    def save_song_key(self, key: str, song_id: int):
+        self._song_keys[key] = song_id
+        self._record(("song_key", key), lambda: {"op": "song_key", "key": key, "id": song_id})
+
+    def delete_song_key(self, key: str):
+        self._song_keys.pop(key, None)
+        self._record(("song_key", key), lambda: {"op": "del_song_key", "key": key})
+
+    def save_content(self, song):
+        """Store lyrics games use but the library doesn't list, with no references yet"""
+        self._content_refs[song.id] = 0
+        self._record(("content", song.id), lambda: {"op": "content", "data": song.dict(), "refs": 0})
+
+    def ref_content(self, song_id: int, delta: int) -> int:
+        """Add delta to the game songs referencing a content, and return their new count"""
+        refs = self._content_refs[song_id] = self._content_refs[song_id] + delta
+        # Only the count: the body was written once, by save_content()
+        self._record(("content_refs", song_id), lambda: {"op": "content_refs", "id": song_id, "refs": refs})
+        return refs
+
+    def delete_content(self, song_id: int):
+        self._content_refs.pop(song_id, None)
+        self._record(("content", song_id), lambda: {"op": "del_content", "id": song_id})
+
+    def save_category(self, category):
+        self._record(("category", category.name), lambda: {"op": "category", "data": category.dict()})
+
+    def save_game(self, game):
+        """Persist the game itself; songs are saved separately with save_game_song"""
+        self._record(("game", game.id), lambda: {"op": "game", "data": game.dict(exclude={"songs"})})
+
+    def delete_game(self, game_id: int):
+        self._record(("game", game_id), lambda: {"op": "del_game", "id": game_id})
+
+    def game_records(self, game) -> List[dict]:
+        """What save_game() and save_game_song() record for a game, the game first"""
+        return [{"op": "game", "data": game.dict(exclude={"songs"})}] + [
+            {"op": "game_song", "game_id": game.id, "data": self.dump_game_song(song)}
+            for song in game.songs.values()]
+
+    def save_game_song(self, game_id: int, song):
+        self._record(("game_song", game_id, song.id), lambda: {"op": "game_song", "game_id": game_id,
+                                                                       "data": self.dump_game_song(song)})
+
+    def delete_game_song(self, game_id: int, song_id: int):
+        self._record(("game_song", game_id, song_id), lambda: {"op": "del_game_song", "game_id": game_id, "id": song_id})
+
+    def add_stats(self, kind: str, key: str, deltas: Dict[str, int]):
+        """Add to the running totals of a player, song or category (STAT_FIELDS missing from deltas add 0)"""
+        with self._stats_lock:
+            row = self._stats.add(kind, key, deltas)
+            self._record(("stats", kind, key), lambda: {"op": "stats", "kind": kind, "key": key, "data": row})
+
+    def stats(self, kind: str, key: str) -> Optional[Dict[str, int]]:
+        with self._stats_lock:
+            row = self._stats.get(kind, key)
+            return None if row is None else dict(zip(STAT_FIELDS, row))
+
+    def player_rank(self, name: str) -> Optional[int]:
+        with self._stats_lock:
+            return self._stats.rank(name)
+
+    def leaderboard(self, offset: int, limit: int) -> Tuple[int, List[Tuple[str, Dict[str, int]]]]:
+        """(number of players, page of (name, totals) by points, most first, ties by name)"""
+        with self._stats_lock:
+            total, page = self._stats.top(offset, limit)
+            return total, [(name, dict(zip(STAT_FIELDS, row))) for name, row in page]
+
+    def _record(self, key: Tuple, build: Callable[[], dict]):
+        """Hand a record to the backend; `build` is only called by persistent backends"""
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._stop_sweeper()
+        if self.games is not None:
+            self.games.archive.close()
+
+
+class LogStore(MemoryStore):
+    """Append-only log with group commit and compacted snapshots.
+
+    Every mutation is serialized to one JSON line and queued. A background
+    thread appends everything queued since the last commit and fsyncs once,
+    so hot endpoints never wait on the disk. Records for the same key are
+    coalesced while they wait. Once the log holds `snapshot_every` records
+    it is folded into `snapshot.jsonl` (written to a temp file, fsynced and
+    atomically renamed) and truncated.
+
+    On boot the snapshot and then the log are replayed; a torn last line
+    left by a crash is dropped. Replaying a log that was already folded into
+    the snapshot is harmless because records are idempotent puts/deletes.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, eviction: Optional[EvictionPolicy] = None):
+        super().__init__(os.path.join(directory, "archive"), eviction)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_path = os.path.join(directory, "snapshot.jsonl")
+        self.log_path = os.path.join(directory, "wal.jsonl")
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._pending_lock = Lock()
+        self._io_lock = Lock()
+        self._log_records = 0
+        self._log = None
+        self._closed = Event()
+        self._flusher: Optional[Thread] = None
+
+    def load(self) -> StoredState:
+        state = StoredState()
+        self._replay(self.snapshot_path, state)
+        self._log_records = self._replay(self.log_path, state)
+        with self._counter_lock:
+            self._counters.update(state.counters)
+
+        self._log = open(self.log_path, "ab")
+        self._flusher = Thread(target=self._run, name="storage-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        return state
+
+    def _replay(self, path: str, state: StoredState) -> int:
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        good_until = 0
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                state.apply(record)
+                count += 1
+                good_until += len(raw)
+        if good_until != os.path.getsize(path):
+            # Crash mid-append: drop the torn tail so new records follow a clean line
+            with open(path, "r+b") as f:
+                f.truncate(good_until)
+        return count
+
+    def _record(self, key: Tuple, build: Callable[[], dict]):
+        line = json.dumps(build(), separators=(",", ":"))
+        with self._pending_lock:
+            self._pending[key] = line
+            self._pending.move_to_end(key)
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._pending_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending.values())
+            self._pending.clear()
+
+        with self._io_lock:
+            if self._log is None:
+                return
+            self._log.write(("\n".join(batch) + "\n").encode("utf-8"))
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log_records += len(batch)
+            if self._log_records >= self.snapshot_every:
+                self._compact()
+
+    def snapshot(self):
+        self.flush()
+        with self._io_lock:
+            self._compact()
+
+    def _compact(self):
+        state = StoredState()
+        self._replay(self.snapshot_path, state)
+        self._replay(self.log_path, state)
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for record in state.records():
+                f.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(self.directory)
+
+        self._log.truncate(0)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_records = 0
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        super().close()
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._io_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SharedTable(MutableMapping):
+    """Dict-like view of one SQLite table, cached per process and refreshed by row version.
+
+    Lookups cost one indexed SELECT of the version column; the row is only
+    decoded again when another worker has written it since.
+    """
+
+    def __init__(self, store: "SQLiteStore", table: str, key: str, decode: Callable[[dict], object]):
+        self.store = store
+        self.table = table
+        self.key = key
+        self.decode = decode
+        self._cache: Dict = {}  # key -> (version, obj)
+
+    def _version(self, key):
+        row = self.store.conn.execute(f"SELECT version FROM {self.table} WHERE {self.key} = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load(self, key, version, cached):
+        row = self.store.conn.execute(f"SELECT data FROM {self.table} WHERE {self.key} = ?", (key,)).fetchone()
+        return self.decode(json.loads(row[0]))
+
+    def __getitem__(self, key):
+        version = self._version(key)
+        self.store.touch(self, key)
+        cached = self._cache.get(key)
+        if version is None:
+            if cached is not None and cached[0] is None:
+                # Assigned earlier in this request, its save_*() call hasn't happened yet
+                return cached[1]
+            self._cache.pop(key, None)
+            raise KeyError(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        obj = self._load(key, version, cached)
+        self._cache[key] = (version, obj)
+        return obj
+
+    def __contains__(self, key):
+        if self._version(key) is not None:
+            return True
+        cached = self._cache.get(key)
+        return cached is not None and cached[0] is None
+
+    def __setitem__(self, key, obj):
+        # The row itself is written by the matching store.save_*() call
+        self._cache[key] = (None, obj)
+
+    def __delitem__(self, key):
+        self._cache.pop(key, None)
+        self.store.conn.execute(f"DELETE FROM {self.table} WHERE {self.key} = ?", (key,))
+
+    def __iter__(self):
+        keys = [row[0] for row in self.store.conn.execute(f"SELECT {self.key} FROM {self.table} ORDER BY rowid")]
+        return iter(keys)
+
+    def __len__(self):
+        return self.store.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def saved(self, key, version, obj):
+        self._cache[key] = (version, obj)
+
+    def invalidate(self, key):
+        self._cache.pop(key, None)
+
+
+class SharedGames(SharedTable):
+    """Games keep their songs in a separate table with their own version, so a
+    score change in another worker only reloads the small game row.
+
+    The rows are the archive: evicting a game only drops this worker's decoded
+    copy, and the next lookup decodes it again.
+    """
+
+    def __init__(self, store: "SQLiteStore", decode_game, decode_song):
+        super().__init__(store, "games", "id", decode_game)
+        self.decode_song = decode_song
+        self._used: Dict[int, float] = {}
+
+    def __getitem__(self, key):
+        game = super().__getitem__(key)
+        self._used[key] = time.monotonic()
+        return game
+
+    def invalidate(self, key):
+        super().invalidate(key)
+        self._used.pop(key, None)
+
+    def resident(self) -> list:
+        """Games decoded in this worker"""
+        return [game for version, game in list(self._cache.values()) if version is not None]
+
+    def usage(self) -> List[Tuple[int, str, float]]:
+        return [(key, game.state, self._used.get(key, 0.0)) for key, (version, game) in list(self._cache.items())
+                if version is not None]
+
+    def evict(self, key: int, last_used: float) -> bool:
+        with self.store.game_lock(key):
+            cached = self._cache.get(key)
+            # Unsaved (version None) entries belong to a transaction in progress
+            if cached is None or cached[0] is None or self._used.get(key, 0.0) > last_used:
+                return False
+            del self._cache[key]
+            self._used.pop(key, None)
+        return True
+
+    def summaries(self, states: Optional[Set[str]], offset: int, limit: int) -> Tuple[int, List[dict]]:
+        """Same as GameTable.summaries, read from the rows without decoding any game"""
+        where = ""
+        params: list = []
+        if states is not None:
+            where = f" WHERE json_extract(data, '$.state') IN ({', '.join('?' * len(states))})"
+            params = sorted(states)
+        conn = self.store.conn
+        total = conn.execute(f"SELECT COUNT(*) FROM games{where}", params).fetchone()[0]
+        columns = ", ".join(f"json_extract(data, '$.{field}')" for field in SUMMARY_FIELDS)
+        rows = conn.execute(f"SELECT id, {columns} FROM games{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                            params + [limit, offset])
+        return total, [dict(zip(("id",) + SUMMARY_FIELDS, row)) for row in rows]
+
+    def _version(self, key):
+        return self.store.conn.execute(
+            "SELECT version, songs_version FROM games WHERE id = ?", (key,)
+        ).fetchone()
+
+    def _load(self, key, version, cached):
+        data = json.loads(self.store.conn.execute("SELECT data FROM games WHERE id = ?", (key,)).fetchone()[0])
+        if cached is not None and cached[0] is not None and cached[0][1] == version[1]:
+            songs = cached[1].songs
+        else:
+            songs = {
+                song_id: self.decode_song(json.loads(song))
+                for song_id, song in self.store.conn.execute(
+                    "SELECT song_id, data FROM game_songs WHERE game_id = ? ORDER BY rowid", (key,))
+            }
+        return self.decode(dict(data, songs=songs))
+
+
+class SQLiteStore(MemoryStore):
+    """Shared SQLite database (WAL mode) so several uvicorn workers see one state.
+
+    Every worker keeps decoded objects in a local cache and checks the row
+    version before using them. Mutating endpoints run inside BEGIN IMMEDIATE
+    (see atomic()), which serializes read-modify-write across processes, and
+    IDs are allocated with an atomic counter update. With synchronous=NORMAL
+    commits do not fsync; the WAL is synced at checkpoints.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS songs (id INTEGER PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS song_keys (key TEXT PRIMARY KEY, song_id INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS contents (
+            id INTEGER PRIMARY KEY, version INTEGER NOT NULL, refs INTEGER NOT NULL DEFAULT 0, data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY, version INTEGER NOT NULL, songs_version INTEGER NOT NULL, data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS game_songs (
+            game_id INTEGER NOT NULL, song_id INTEGER NOT NULL, data TEXT NOT NULL,
+            PRIMARY KEY (game_id, song_id)
+        );
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, game_id INTEGER NOT NULL, payload BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS stats (
+            kind TEXT NOT NULL, key TEXT NOT NULL, points INTEGER NOT NULL, attempts INTEGER NOT NULL,
+            scored INTEGER NOT NULL, words INTEGER NOT NULL, correct_words INTEGER NOT NULL,
+            PRIMARY KEY (kind, key)
+        );
+        -- Leaderboard pages, and player_rank()'s count of the players with more points
+        CREATE INDEX IF NOT EXISTS stats_ranking ON stats (kind, points DESC, key);
+    """
+    EVENTS_KEPT = 10000  # rows kept in the events table for workers that poll late
+    in_process = False  # lookups query the database and may reload what another worker changed
+
+    def __init__(self, path: str, busy_timeout: float = 30.0, eviction: Optional[EvictionPolicy] = None):
+        super().__init__(eviction=eviction)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = local()
+        # Writers queue on a kernel file lock (no polling) before BEGIN IMMEDIATE,
+        # and on a thread lock first since flock() doesn't exclude threads sharing a descriptor
+        self._write_lock = Lock()
+        self._lock_file = open(path + ".lock", "a+b") if fcntl else None
+        self.songs: Optional[SharedTable] = None
+        self.categories: Optional[SharedTable] = None
+        self.contents: Optional[SharedTable] = None
+        self.games: Optional[SharedGames] = None
+        with self.conn:
+            self.conn.executescript(self.SCHEMA)
+            # Committed ids and versions outlive the process: one epoch per database, for every worker
+            self.conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('epoch', ?)",
+                              (int.from_bytes(os.urandom(4), "big"),))
+        epoch = self.conn.execute("SELECT value FROM counters WHERE name = 'epoch'").fetchone()[0]
+        self.epoch = f"{epoch:08x}"
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """One connection per thread; FastAPI runs sync endpoints in a threadpool"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def open(self, song_model, category_model, game_model, load_game_song=None, dump_game_song=None):
+        if load_game_song is None:
+            load_game_song = lambda data, songs: song_model(**data)  # noqa: E731
+        if dump_game_song is not None:
+            self.dump_game_song = dump_game_song
+        self.songs = SharedTable(self, "songs", "id", lambda data: song_model(**data))
+        self.categories = SharedTable(self, "categories", "name", lambda data: category_model(**data))
+        self.contents = SharedTable(self, "contents", "id", lambda data: song_model(**data))
+        library = ChainMap(self.songs, self.contents)
+        self.games = SharedGames(self, lambda data: game_model(**data), lambda data: load_game_song(data, library))
+        self._start_sweeper()
+        return self.songs, self.categories, self.games, self.contents
+
+    def touch(self, table: SharedTable, key):
+        touched = getattr(self._local, "touched", None)
+        if touched is not None:
+            touched.append((table, key))
+
+    def atomic(self, func):
+        """Run an endpoint in one write transaction shared by every worker.
+
+        If the endpoint raises, objects it looked up are dropped from the local
+        cache, since it may have mutated them before the rollback. The game's
+        lock is held too, for readers of the cached objects in this process.
+        """
+        lock_for = self._endpoint_lock(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = self.conn
+            if conn.in_transaction:
+                return func(*args, **kwargs)
+            with self._write_lock:
+                if self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                self._local.touched = []
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        with lock_for(args, kwargs):
+                            result = func(*args, **kwargs)
+                    except BaseException:
+                        conn.execute("ROLLBACK")
+                        for table, key in self._local.touched:
+                            table.invalidate(key)
+                        raise
+                    conn.execute("COMMIT")
+                finally:
+                    self._local.touched = None
+                    if self._lock_file is not None:
+                        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            return result
+        return wrapper
+
+    def next_id(self, name: str) -> int:
+        row = self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 2) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1 RETURNING value",
+            (name,),
+        ).fetchone()
+        return row[0] - 1
+
+    def _upsert(self, table: SharedTable, key, data: dict):
+        row = self.conn.execute(
+            f"INSERT INTO {table.table} ({table.key}, version, data) VALUES (?, 1, ?) "
+            f"ON CONFLICT ({table.key}) DO UPDATE SET version = version + 1, data = excluded.data RETURNING version",
+            (key, json.dumps(data, separators=(",", ":"))),
+        ).fetchone()
+        return row[0]
+
+    def save_song(self, song):
+        self.songs.saved(song.id, self._upsert(self.songs, song.id, song.dict()), song)
+
+    def find_song(self, key: str) -> Optional[int]:
+        row = self.conn.execute("SELECT song_id FROM song_keys WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def save_song_key(self, key: str, song_id: int):
+        self.conn.execute("INSERT OR REPLACE INTO song_keys (key, song_id) VALUES (?, ?)", (key, song_id))
+
+    def delete_song_key(self, key: str):
+        self.conn.execute("DELETE FROM song_keys WHERE key = ?", (key,))
+
+    def save_content(self, song):
+        self.contents.saved(song.id, self._upsert(self.contents, song.id, song.dict()), song)
+
+    def ref_content(self, song_id: int, delta: int) -> int:
+        # Only the count changes: the version stays, and so does every worker's decoded copy
+        return self.conn.execute("UPDATE contents SET refs = refs + ? WHERE id = ? RETURNING refs",
+                                 (delta, song_id)).fetchone()[0]
+
+    def delete_content(self, song_id: int):
+        self.conn.execute("DELETE FROM contents WHERE id = ?", (song_id,))
+        self.contents.invalidate(song_id)
+
+    def save_category(self, category):
+        self.categories.saved(category.name, self._upsert(self.categories, category.name, category.dict()), category)
+
+    def save_game(self, game):
+        row = self.conn.execute(
+            "INSERT INTO games (id, version, songs_version, data) VALUES (?, 1, 1, ?) "
+            "ON CONFLICT (id) DO UPDATE SET version = version + 1, data = excluded.data "
+            "RETURNING version, songs_version",
+            (game.id, json.dumps(game.dict(exclude={"songs"}), separators=(",", ":"))),
+        ).fetchone()
+        self.games.saved(game.id, tuple(row), game)
+
+    def delete_game(self, game_id: int):
+        self.conn.execute("DELETE FROM game_songs WHERE game_id = ?", (game_id,))
+        self.conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+        self.games.invalidate(game_id)
+
+    def _bump_songs_version(self, game_id: int):
+        # Games created in this transaction have no row yet; save_game() follows
+        self.conn.execute(
+            "UPDATE games SET version = version + 1, songs_version = songs_version + 1 WHERE id = ?", (game_id,)
+        )
+
+    def save_game_song(self, game_id: int, song):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO game_songs (game_id, song_id, data) VALUES (?, ?, ?)",
+            (game_id, song.id, json.dumps(self.dump_game_song(song), separators=(",", ":"))),
+        )
+        self._bump_songs_version(game_id)
+
+    def delete_game_song(self, game_id: int, song_id: int):
+        self.conn.execute("DELETE FROM game_songs WHERE game_id = ? AND song_id = ?", (game_id, song_id))
+        self._bump_songs_version(game_id)
+
+    def add_stats(self, kind: str, key: str, deltas: Dict[str, int]):
+        values = [deltas.get(field, 0) for field in STAT_FIELDS]
+        row = self.conn.execute(
+            f"INSERT INTO stats (kind, key, {', '.join(STAT_FIELDS)}) VALUES (?, ?, {', '.join('?' * len(values))}) "
+            f"ON CONFLICT (kind, key) DO UPDATE SET {', '.join(f'{f} = {f} + excluded.{f}' for f in STAT_FIELDS)} "
+            f"RETURNING {', '.join(STAT_FIELDS)}",
+            (kind, key, *values),
+        ).fetchone()
+        if not any(row):
+            self.conn.execute("DELETE FROM stats WHERE kind = ? AND key = ?", (kind, key))
+
+    def stats(self, kind: str, key: str) -> Optional[Dict[str, int]]:
+        row = self.conn.execute(f"SELECT {', '.join(STAT_FIELDS)} FROM stats WHERE kind = ? AND key = ?",
+                                (kind, key)).fetchone()
+        return None if row is None else dict(zip(STAT_FIELDS, row))
+
+    def player_rank(self, name: str) -> Optional[int]:
+        # A covering range read of stats_ranking, the entries ahead of the player's points:
+        # SQLite keeps no counts in its B-trees, so this grows with the rank (no table scan)
+        row = self.conn.execute(
+            "SELECT 1 + (SELECT COUNT(*) FROM stats WHERE kind = 'player' AND points > s.points) "
+            "FROM stats s WHERE kind = 'player' AND key = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def leaderboard(self, offset: int, limit: int) -> Tuple[int, List[Tuple[str, Dict[str, int]]]]:
+        conn = self.conn
+        total = conn.execute("SELECT COUNT(*) FROM stats WHERE kind = 'player'").fetchone()[0]
+        rows = conn.execute(f"SELECT key, {', '.join(STAT_FIELDS)} FROM stats WHERE kind = 'player' "
+                            f"ORDER BY points DESC, key LIMIT ? OFFSET ?", (limit, offset))
+        return total, [(row[0], dict(zip(STAT_FIELDS, row[1:]))) for row in rows]
+
+    def publish_event(self, game_id: int, payload: bytes):
+        """Queue an event for every worker; it becomes visible when the transaction commits"""
+        event_id = self.conn.execute(
+            "INSERT INTO events (game_id, payload) VALUES (?, ?)", (game_id, payload)
+        ).lastrowid
+        if event_id % 1000 == 0:
+            self.conn.execute("DELETE FROM events WHERE id <= ?", (event_id - self.EVENTS_KEPT,))
+
+    def last_event_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def poll_events(self, after_id: int):
+        return self.conn.execute(
+            "SELECT id, game_id, payload FROM events WHERE id > ? ORDER BY id", (after_id,)
+        ).fetchall()
+
+    def close(self):
+        self._stop_sweeper()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def open_store() -> MemoryStore:
+    """Pick the storage backend from STORAGE_BACKEND ("memory", "log" or "sqlite")"""
+    backend = os.environ.get("STORAGE_BACKEND", "memory")
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if workers > 1 and backend != "sqlite":
+        raise ValueError(f"STORAGE_BACKEND '{backend}' is process-local; use 'sqlite' with several workers")
+    eviction = EvictionPolicy(
+        finished_ttl=float(os.environ.get("GAME_FINISHED_TTL", DEFAULT_FINISHED_TTL)),
+        idle_ttl=float(os.environ.get("GAME_IDLE_TTL", DEFAULT_IDLE_TTL)),
+        max_resident=int(os.environ.get("MAX_RESIDENT_GAMES", 0)),
+        interval=float(os.environ.get("GAME_SWEEP_INTERVAL", DEFAULT_SWEEP_INTERVAL)),
+    )
+    if backend == "memory":
+        return MemoryStore(eviction=eviction)
+    if backend == "log":
+        return LogStore(
+            os.environ.get("STORAGE_DIR", "data"),
+            flush_interval=float(os.environ.get("STORAGE_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)),
+            snapshot_every=int(os.environ.get("STORAGE_SNAPSHOT_EVERY", DEFAULT_SNAPSHOT_EVERY)),
+            eviction=eviction,
+        )
+    if backend == "sqlite":
+        return SQLiteStore(os.environ.get("STORAGE_PATH", os.path.join(os.environ.get("STORAGE_DIR", "data"), "game.db")),
+                           eviction=eviction)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
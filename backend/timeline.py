@@ -0,0 +1,137 @@
+from bisect import bisect_right
+from typing import AsyncIterator, Dict, List, NamedTuple, Sequence, Tuple
+import asyncio
+
+from events import encode_event
+from lrc import Lyrics
+from scoring import WORD_EXP
+
+
+LINE_FALLBACK_MS = 4000  # duration given to the last line, as the singing screen does
+KEEP_ALIVE = 15  # seconds of silence (instrumentals) before a keep-alive comment
+WINDOW_CONTEXT = 2  # lines of context shown around a hidden passage
+
+
+class HiddenSegment(NamedTuple):
+    """A run of consecutive hidden lines, sung between start and end (ms)"""
+    first_line: int
+    last_line: int
+    start: int
+    end: int
+    words: int
+
+
+class LyricTimeline(NamedTuple):
+    """Sorted line start times plus the hidden passages, for O(log n) lookups.
+
+    times[i] is when line i starts and ends[i] when the next line starts (or
+    LINE_FALLBACK_MS later for the last one), so the line on screen at t is
+    bisect_right(times, t) - 1.
+    """
+    times: Tuple[int, ...]
+    ends: Tuple[int, ...]
+    segments: Tuple[HiddenSegment, ...]
+    segment_starts: Tuple[int, ...]
+    context: int
+
+    def line_at(self, time_ms: int) -> int:
+        """Index of the line showing at time_ms, -1 before the first one"""
+        return bisect_right(self.times, time_ms) - 1
+
+    def segment_at(self, time_ms: int) -> int:
+        """Index of the hidden segment being sung at time_ms, or -1"""
+        i = bisect_right(self.segment_starts, time_ms) - 1
+        if i >= 0 and time_ms < self.segments[i].end:
+            return i
+        return -1
+
+    def window(self, segment: HiddenSegment) -> Tuple[int, int]:
+        """First and last line to display around a hidden segment"""
+        return max(0, segment.first_line - self.context), min(len(self.times) - 1, segment.last_line + self.context)
+
+    def as_dict(self) -> Dict:
+        windows = [self.window(s) for s in self.segments]
+        return {
+            "times": list(self.times),
+            "ends": list(self.ends),
+            "duration": self.ends[-1] if self.ends else 0,
+            "hidden_segments": [s._asdict() for s in self.segments],
+            "windows": [
+                {"first_line": first, "last_line": last, "start": self.times[first], "end": self.ends[last]}
+                for first, last in windows
+            ],
+        }
+
+
+def build_timeline(lyrics: Sequence[Dict], hidden_line_indices: Sequence[int],
+                   context: int = WINDOW_CONTEXT) -> LyricTimeline:
+    """Lyrics come sorted by time from the LRC parser; hidden lines may be in any order"""
+    times = tuple(lyrics.times) if isinstance(lyrics, Lyrics) else tuple(line["time"] for line in lyrics)
+    ends = times[1:] + ((times[-1] + LINE_FALLBACK_MS,) if times else ())
+
+    segments: List[HiddenSegment] = []
+    run: List[int] = []
+    for idx in sorted(set(i for i in hidden_line_indices if 0 <= i < len(times))):
+        if run and idx != run[-1] + 1:
+            segments.append(_segment(run, times, ends, lyrics))
+            run = []
+        run.append(idx)
+    if run:
+        segments.append(_segment(run, times, ends, lyrics))
+    return LyricTimeline(times, ends, tuple(segments), tuple(s.start for s in segments), context)
+
+
+def _segment(run: List[int], times, ends, lyrics) -> HiddenSegment:
+    words = sum(len(WORD_EXP.findall(lyrics[i]["text"])) for i in run)
+    return HiddenSegment(run[0], run[-1], times[run[0]], ends[run[-1]], words)
+
+
+def _scheduled_events(lyrics: Sequence[Dict], timeline: LyricTimeline, position: int) -> List[Tuple[int, str, Dict]]:
+    """(time, event type, data) from the line showing at `position` to the end, in time order"""
+    first_of = {s.first_line: (i, s) for i, s in enumerate(timeline.segments)}
+    last_of = {s.last_line: (i, s) for i, s in enumerate(timeline.segments)}
+    hidden = {line for s in timeline.segments for line in range(s.first_line, s.last_line + 1)}
+
+    scheduled = []
+    for line in range(max(0, timeline.line_at(position)), len(timeline.times)):
+        start, end = timeline.times[line], timeline.ends[line]
+        if line in first_of:
+            index, segment = first_of[line]
+            scheduled.append((start, "hidden_start", dict(segment._asdict(), segment=index)))
+        data = {"line": line, "time": start, "end": end}
+        if line in hidden:
+            data["hidden"] = True  # never send the answer ahead of the attempt
+        else:
+            data["text"] = lyrics[line]["text"]
+        scheduled.append((start, "line", data))
+        if line in last_of:
+            index, segment = last_of[line]
+            scheduled.append((end, "hidden_end", {"segment": index, "end": end}))
+    if timeline.ends:
+        scheduled.append((timeline.ends[-1], "end", {"time": timeline.ends[-1]}))
+    # Stable: a hidden_end at the same time as the next line start stays before it
+    scheduled.sort(key=lambda event: event[0])
+    return scheduled
+
+
+async def lyric_events(lyrics: Sequence[Dict], timeline: LyricTimeline, position: int = 0) -> AsyncIterator[bytes]:
+    """Server-sent lyric events, each sent when playback reaches it.
+
+    Playback is assumed to be at `position` ms when the stream starts and to
+    run in real time; clients reconnect with a new position after a pause or
+    a seek. The line already showing at `position` is sent straight away.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time() - position / 1000
+    yield b": connected\n\n"
+    for time_ms, event_type, data in _scheduled_events(lyrics, timeline, position):
+        while True:
+            delay = started + time_ms / 1000 - loop.time()
+            if delay <= 0:
+                break
+            if delay > KEEP_ALIVE:
+                await asyncio.sleep(KEEP_ALIVE)
+                yield b": keep-alive\n\n"
+            else:
+                await asyncio.sleep(delay)
+        yield encode_event(event_type, data)
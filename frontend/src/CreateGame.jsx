@@ -7,6 +7,7 @@ import { parseLRC } from './lrcUtils';
 function CreateGame({ onGameCreated }) {
   const [step, setStep] = useState(1); // 1: game name, 2: songs/categories, 3: players, 4: ready
   const [gameName, setGameName] = useState('');
+  const [scoringMode, setScoringMode] = useState('exact');
   const [gameId, setGameId] = useState(null);
   const [songs, setSongs] = useState([]);
   const [categories, setCategories] = useState([]);
@@ -251,7 +252,8 @@ function CreateGame({ onGameCreated }) {
         lrc: s.lrc,
         hidden_line_indices: s.hidden_line_indices
       })),
-      categories: allCategories
+      categories: allCategories,
+      scoring_mode: scoringMode
     };
     
     try {
@@ -284,6 +286,15 @@ function CreateGame({ onGameCreated }) {
               onChange={e => setGameName(e.target.value)}
               className="mb-3"
             />
+            <label className="mb-3" style={{ display: 'flex', alignItems: 'center', gap: '8px' }}>
+              <input
+                type="checkbox"
+                checked={scoringMode === 'fuzzy'}
+                onChange={e => setScoringMode(e.target.checked ? 'fuzzy' : 'exact')}
+                style={{ width: 'auto' }}
+              />
+              Tolérer les fautes de frappe et les mots oubliés
+            </label>
             <button 
               onClick={handleGameNameSubmit}
               className="btn-primary w-full"
@@ -15,7 +15,7 @@ function GameSelector({ onGameSelected, onBack, title = "Sélectionner une parti
     setLoading(true);
     setError('');
     try {
-      const data = await getGames();
+      const data = await getGames('waiting');
       setGames(data);
     } catch (err) {
       setError('Impossible de charger les parties. Vérifiez que le serveur est démarré.');
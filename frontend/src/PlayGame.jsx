@@ -1,23 +1,62 @@
 import React, { useEffect, useState } from 'react';
-import { getGame, startGame, selectCategory, selectSong, attemptLyrics, nextPlayer, completeCategory } from './api';
+import { getGame, startGame, selectCategory, selectSong, getSongTimeline, runBatch, subscribeToGame } from './api';
 import SingingMode from './SingingMode';
 
+// Everything the play screen shows; song bodies are fetched one at a time with selectSong
+const PLAY_FIELDS = ['id', 'name', 'players', 'categories', 'played_categories', 'current_round',
+  'current_player', 'players_played_this_round', 'state', 'scores', 'version'];
+
 function PlayGame({ gameId, onBack }) {
   const [game, setGame] = useState(null);
   const [step, setStep] = useState('waiting');
   const [category, setCategory] = useState('');
   const [songs, setSongs] = useState([]);
   const [song, setSong] = useState(null);
+  const [timeline, setTimeline] = useState(null);
   const [selectedCategory, setSelectedCategory] = useState('');
   const [attempt, setAttempt] = useState([]);
   const [result, setResult] = useState(null);
 
   useEffect(() => {
     if (gameId) {
-      getGame(gameId).then(setGame);
+      getGame(gameId, PLAY_FIELDS).then(setGame);
     }
   }, [gameId]);
 
+  // Apply pushed state changes instead of refetching the whole game after each action
+  useEffect(() => {
+    if (!gameId) return undefined;
+    return subscribeToGame(gameId, (type, data) => {
+      switch (type) {
+        case 'game_started':
+          setGame(g => g && { ...g, state: 'playing', current_player: data.current_player, current_round: data.round, players_played_this_round: [] });
+          break;
+        case 'player_changed':
+        case 'round_advanced':
+          setGame(g => g && { ...g, current_player: data.current_player, current_round: data.round, players_played_this_round: data.players_played_this_round });
+          break;
+        case 'score_updated':
+          setGame(g => g && { ...g, scores: { ...g.scores, [data.player]: data.score } });
+          break;
+        case 'category_completed':
+          setGame(g => g && { ...g, played_categories: data.played_categories });
+          break;
+        case 'players_changed':
+          setGame(g => g && { ...g, players: data.players, scores: data.scores, current_player: data.current_player });
+          break;
+        case 'game_finished':
+          setGame(g => g && { ...g, state: 'finished', scores: data.scores });
+          break;
+        case 'settings_changed':
+          setGame(g => g && { ...g, scoring_mode: data.scoring_mode });
+          break;
+        default:
+          // catalog_changed / resync: the cheap events don't cover it, reload once
+          getGame(gameId, PLAY_FIELDS).then(setGame);
+      }
+    });
+  }, [gameId]);
+
   if (!gameId) {
     return (
       <div style={{ maxWidth: 600, margin: '40px auto', textAlign: 'center' }}>
@@ -33,9 +72,8 @@ function PlayGame({ gameId, onBack }) {
   }
 
   const handleStart = async () => {
-    await startGame(gameId);
-    const g = await getGame(gameId);
-    setGame(g);
+    const res = await startGame(gameId);
+    setGame(g => ({ ...g, state: 'playing', current_player: res.current_player, current_round: res.round, players_played_this_round: [] }));
     setStep('category');
   };
 
@@ -52,26 +90,28 @@ function PlayGame({ gameId, onBack }) {
   };
 
   const handleSelectSong = async songId => {
-    const s = songs.find(s => s.id === songId);
+    // select_category only returns summaries; load this song's lyrics now
+    const [s, t] = await Promise.all([selectSong(gameId, songId), getSongTimeline(gameId, songId)]);
     setSong(s);
+    setTimeline(t);
     setStep('sing');
   };
 
   const handleAttemptSubmit = async (wordAttempts) => {
-    const res = await attemptLyrics(gameId, song.id, wordAttempts, game.current_player);
-    
-    // Mark category as completed and move to next player
-    await completeCategory(gameId, selectedCategory);
-    const nextPlayerRes = await nextPlayer(gameId);
-    
-    // Refresh game state
-    const updatedGame = await getGame(gameId);
-    setGame(updatedGame);
+    // Score the attempt, mark the category as completed and move to the next player, in one request
+    const { results, game: updated } = await runBatch(gameId, [
+      { op: 'attempt_lyrics', song_id: song.id, attempt: wordAttempts, player: game.current_player },
+      { op: 'complete_category', category: selectedCategory },
+      { op: 'next_player' },
+    ], PLAY_FIELDS);
+    const [res, , nextPlayerRes] = results;
+    // The event stream keeps the game current too; this just doesn't wait for it
+    setGame(g => ({ ...g, ...updated }));
     
     // Check if round is complete or game finished
     if (nextPlayerRes.round_complete) {
       if (nextPlayerRes.message === "Game finished") {
-        alert(`Partie terminée! Scores finaux: ${Object.entries(updatedGame.scores).map(([name, score]) => `${name}: ${score}`).join(', ')}`);
+        alert(`Partie terminée! Scores finaux: ${Object.entries(nextPlayerRes.scores).map(([name, score]) => `${name}: ${score}`).join(', ')}`);
         setStep('waiting');
       } else {
         alert(`Round ${nextPlayerRes.round - 1} terminé! Nouveau round commence.`);
@@ -354,6 +394,7 @@ function PlayGame({ gameId, onBack }) {
       {step === 'sing' && song && (
         <SingingMode 
           song={song}
+          timeline={timeline}
           onAttemptSubmit={handleAttemptSubmit}
           onBack={() => setStep('song')}
         />
@@ -1,7 +1,19 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import YouTube from 'react-youtube';
 
-function SingingMode({ song, onAttemptSubmit, onBack }) {
+// Index of the last line starting at or before time (-1 before the first one)
+const lineAt = (times, time) => {
+  let lo = 0;
+  let hi = times.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (times[mid] <= time) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo - 1;
+};
+
+function SingingMode({ song, timeline, onAttemptSubmit, onBack }) {
   const [currentTime, setCurrentTime] = useState(0);
   const [isPlaying, setIsPlaying] = useState(true); // Auto-start
   const [hiddenWordsInput, setHiddenWordsInput] = useState([]);
@@ -22,8 +34,22 @@ function SingingMode({ song, onAttemptSubmit, onBack }) {
     return match ? match[1] : null;
   };
 
+  // Line start times, precomputed by the server when available
+  const lineTimes = useMemo(
+    () => timeline?.times || song?.lyrics?.map(line => line.time) || [],
+    [timeline, song]
+  );
+
   // Get hidden words and their timing
   useEffect(() => {
+    if (timeline?.hidden_segments?.length) {
+      const segments = timeline.hidden_segments;
+      const wordCount = segments.reduce((total, segment) => total + segment.words, 0);
+      setHiddenWordsInput(new Array(wordCount).fill(''));
+      setHiddenStartTime(segments[0].start);
+      setHiddenEndTime(segments[segments.length - 1].end);
+      return;
+    }
     if (!song?.lyrics || !song?.hidden_line_indices) return;
 
     const hiddenLines = song.hidden_line_indices.map(idx => song.lyrics[idx]);
@@ -60,7 +86,7 @@ function SingingMode({ song, onAttemptSubmit, onBack }) {
     setHiddenWordsInput(new Array(hiddenWords.length).fill(''));
     setHiddenStartTime(startTime);
     setHiddenEndTime(endTime);
-  }, [song]);
+  }, [song, timeline]);
 
   // Update current time and check for hidden sections
   useEffect(() => {
@@ -94,15 +120,9 @@ function SingingMode({ song, onAttemptSubmit, onBack }) {
 
   // Find current lyric based on time
   useEffect(() => {
-    if (!song?.lyrics) return;
-    
-    for (let i = song.lyrics.length - 1; i >= 0; i--) {
-      if (currentTime >= song.lyrics[i].time) {
-        setCurrentLyricIndex(i);
-        break;
-      }
-    }
-  }, [currentTime, song]);
+    const index = lineAt(lineTimes, currentTime);
+    if (index >= 0) setCurrentLyricIndex(index);
+  }, [currentTime, lineTimes]);
 
   const onPlayerReady = (event) => {
     playerRef.current = event.target;
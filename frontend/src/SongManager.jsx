@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { addSong } from './api';
+import { addSong, MAX_HIDDEN_LINES, suggestHiddenLines } from './api';
 import LyricsSelector from './LyricsSelector';
 import { parseLRC } from './lrcUtils';
 
@@ -12,6 +12,7 @@ function SongManager({ onSongAdded, onBack }) {
   const [parsedLyrics, setParsedLyrics] = useState([]);
   const [selectedLines, setSelectedLines] = useState([]);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [difficulty, setDifficulty] = useState('medium');
 
   const handleLrcChange = (content) => {
     setLrcContent(content);
@@ -33,6 +34,21 @@ function SongManager({ onSongAdded, onBack }) {
     );
   };
 
+  const handleSuggest = async () => {
+    try {
+      const count = Math.min(Math.max(selectedLines.length, 1), MAX_HIDDEN_LINES);
+      const report = await suggestHiddenLines(lrcContent, difficulty, count);
+      if (report.suggestions.length > 0) {
+        setSelectedLines(report.suggestions[0].hidden_line_indices);
+      } else {
+        alert(`Aucune suite de ${count} lignes chantées à suggérer`);
+      }
+    } catch (error) {
+      console.error('Error suggesting hidden lines:', error);
+      alert('Erreur lors de la suggestion des lignes');
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setIsSubmitting(true);
@@ -191,6 +207,16 @@ function SongManager({ onSongAdded, onBack }) {
             <label style={{ display: 'block', marginBottom: '8px' }}>
               Sélectionnez les lignes à cacher ({selectedLines.length} sélectionnées):
             </label>
+            <div style={{ marginBottom: '8px' }}>
+              <select value={difficulty} onChange={(e) => setDifficulty(e.target.value)} style={{ marginRight: '8px' }}>
+                <option value="easy">Facile</option>
+                <option value="medium">Moyen</option>
+                <option value="hard">Difficile</option>
+              </select>
+              <button type="button" onClick={handleSuggest}>
+                Suggérer des lignes
+              </button>
+            </div>
             <LyricsSelector 
               lines={parsedLyrics}
               selected={selectedLines}
@@ -1,12 +1,53 @@
 const API_URL = 'http://localhost:8000';
 
-export async function getGame(gameId) {
-  const res = await fetch(`${API_URL}/games/${gameId}`);
+// Optional `fields` (array) limits the response, e.g. ['id', 'name', 'scores']
+function fieldsQuery(fields) {
+  return fields ? `?fields=${fields.join(',')}` : '';
+}
+
+export async function getGame(gameId, fields = null) {
+  const res = await fetch(`${API_URL}/games/${gameId}${fieldsQuery(fields)}`);
+  return res.json();
+}
+
+// Optional `state` (e.g. 'waiting') filters server-side; newest games first, 100 per page
+export async function getGames(state = null, offset = 0) {
+  const params = new URLSearchParams({ offset });
+  if (state) params.set('state', state);
+  const res = await fetch(`${API_URL}/games?${params}`);
+  return res.json();
+}
+
+// Ranked title/lyrics search, accents ignored; the library's songs, or one game's with `gameId`
+export async function searchSongs(q, gameId = null, offset = 0) {
+  const params = new URLSearchParams({ q, offset });
+  if (gameId !== null) params.set('game_id', gameId);
+  const res = await fetch(`${API_URL}/search?${params}`);
+  return res.json();
+}
+
+// At most MAX_HIDDEN_LINES lines per suggestion, as the server allows
+export const MAX_HIDDEN_LINES = 8;
+
+export async function suggestHiddenLines(lrc, difficulty = 'medium', count = 2) {
+  const params = new URLSearchParams({ difficulty, count });
+  const res = await fetch(`${API_URL}/lyrics/hidden_lines?${params}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ lrc })
+  });
+  if (!res.ok) throw new Error(`Suggestion failed (${res.status})`);
+  return res.json();
+}
+
+export async function getLeaderboard(offset = 0, limit = 20) {
+  const params = new URLSearchParams({ offset, limit });
+  const res = await fetch(`${API_URL}/leaderboard?${params}`);
   return res.json();
 }
 
-export async function getGames() {
-  const res = await fetch(`${API_URL}/games`);
+export async function getPlayerStats(username) {
+  const res = await fetch(`${API_URL}/players/${encodeURIComponent(username)}/stats`);
   return res.json();
 }
 
@@ -15,8 +56,8 @@ export async function getCategories() {
   return res.json();
 }
 
-export async function getSongsByCategory(category) {
-  const res = await fetch(`${API_URL}/categories/${encodeURIComponent(category)}/songs`);
+export async function getSongsByCategory(category, fields = null) {
+  const res = await fetch(`${API_URL}/categories/${encodeURIComponent(category)}/songs${fieldsQuery(fields)}`);
   return res.json();
 }
 
@@ -52,6 +93,12 @@ export async function selectSong(gameId, songId) {
   return res.json();
 }
 
+// Sorted line times and hidden passages; the line showing at t is the last one with times[i] <= t
+export async function getSongTimeline(gameId, songId) {
+  const res = await fetch(`${API_URL}/games/${gameId}/songs/${songId}/timeline`);
+  return res.json();
+}
+
 export async function attemptLyrics(gameId, songId, wordAttempts, player) {
   const res = await fetch(`${API_URL}/games/${gameId}/attempt_lyrics`, {
     method: 'POST',
@@ -76,13 +123,13 @@ export async function getGameCategories(gameId) {
   return res.json();
 }
 
-export async function getGameSongs(gameId) {
-  const res = await fetch(`${API_URL}/games/${gameId}/songs`);
+export async function getGameSongs(gameId, fields = null) {
+  const res = await fetch(`${API_URL}/games/${gameId}/songs${fieldsQuery(fields)}`);
   return res.json();
 }
 
-export async function getGameSongsByCategory(gameId, category) {
-  const res = await fetch(`${API_URL}/games/${gameId}/categories/${encodeURIComponent(category)}/songs`);
+export async function getGameSongsByCategory(gameId, category, fields = null) {
+  const res = await fetch(`${API_URL}/games/${gameId}/categories/${encodeURIComponent(category)}/songs${fieldsQuery(fields)}`);
   return res.json();
 }
 
@@ -137,6 +184,44 @@ export async function deleteCategoryFromGame(gameId, categoryName) {
   return res.json();
 }
 
+// Batch edits: songs is [{ id, title?, category? }]; all or nothing if an id is unknown
+export async function updateSongsInGame(gameId, songs) {
+  const res = await fetch(`${API_URL}/games/${gameId}/songs`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ songs })
+  });
+  return res.json();
+}
+
+export async function deleteSongsFromGame(gameId, songIds) {
+  const res = await fetch(`${API_URL}/games/${gameId}/songs/delete`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ song_ids: songIds })
+  });
+  return res.json();
+}
+
+// file: a .ndjson, .zip or .tar(.gz) File/Blob
+export async function importSongsToGame(gameId, file) {
+  const format = /\.zip$/i.test(file.name) ? 'zip' : /\.(tar|tgz|tar\.gz)$/i.test(file.name) ? 'tar' : 'ndjson';
+  const res = await fetch(`${API_URL}/games/${gameId}/songs/import?format=${format}`, {
+    method: 'POST',
+    body: file
+  });
+  return res.json();
+}
+
+export async function setScoringMode(gameId, scoringMode) {
+  const res = await fetch(`${API_URL}/games/${gameId}/scoring_mode`, {
+    method: 'PUT',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ scoring_mode: scoringMode })
+  });
+  return res.json();
+}
+
 export async function updatePlayerInGame(gameId, oldUsername, newUsername, pictureUrl = null) {
   const res = await fetch(`${API_URL}/games/${gameId}/players`, {
     method: 'PUT',
@@ -172,3 +257,52 @@ export async function completeCategory(gameId, category) {
   });
   return res.json();
 }
+
+// Several turn commands in one request, all applied or none, e.g.
+// [{ op: 'complete_category', category }, { op: 'next_player' }];
+// resolves to { results, version, game } with one result per command
+export async function runBatch(gameId, commands, fields = null) {
+  const res = await fetch(`${API_URL}/games/${gameId}/batch${fieldsQuery(fields)}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ commands })
+  });
+  return res.json();
+}
+
+// Live game updates (server-sent events). Returns a function that closes the stream.
+export const GAME_EVENT_TYPES = [
+  'game_started',
+  'player_changed',
+  'round_advanced',
+  'score_updated',
+  'category_completed',
+  'players_changed',
+  'catalog_changed',
+  'game_finished',
+  'settings_changed',
+  'resync'
+];
+
+export function subscribeToGame(gameId, onEvent) {
+  const source = new EventSource(`${API_URL}/games/${gameId}/events`);
+  for (const type of GAME_EVENT_TYPES) {
+    source.addEventListener(type, e => onEvent(type, JSON.parse(e.data)));
+  }
+  return () => source.close();
+}
+
+// Lyric events pushed as playback reaches them, for display-only screens.
+// Reopen with the new position after a pause or a seek. Returns a function that closes the stream.
+export const LYRIC_EVENT_TYPES = ['line', 'hidden_start', 'hidden_end', 'end'];
+
+export function subscribeToLyrics(gameId, songId, positionMs, onEvent) {
+  const source = new EventSource(
+    `${API_URL}/games/${gameId}/songs/${songId}/lyrics/stream?position=${Math.max(0, Math.floor(positionMs))}`);
+  for (const type of LYRIC_EVENT_TYPES) {
+    source.addEventListener(type, e => onEvent(type, JSON.parse(e.data)));
+  }
+  // The stream ends with the song; don't let EventSource reconnect and replay it
+  source.addEventListener('end', () => source.close());
+  return () => source.close();
+}
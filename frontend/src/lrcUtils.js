@@ -1,18 +1,35 @@
 // Parse LRC file content into array of { time, text }
+// Mirrors backend/lrc.py so hidden line indices picked here match the server:
+// lines with several timestamps are repeated, [offset:] is applied, <mm:ss.xx>
+// word tags are stripped, and the result is sorted by time.
 export function parseLRC(lrc) {
   const lines = lrc.split('\n');
   const result = [];
-  const timeExp = /\[(\d+):(\d+)(?:\.(\d+))?\]/;
+  const timeExp = /^\[(\d+):(\d+)(?:[.:](\d+))?\]/;
+  const metaExp = /^\[([A-Za-z#]+):([^\]]*)\]/;
+  const wordExp = /<\d+:\d+(?:[.:]\d+)?>/g;
+  let offset = 0;
   for (const line of lines) {
-    const match = line.match(timeExp);
-    if (match) {
+    const meta = line.match(metaExp);
+    if (meta && meta[1].toLowerCase() === 'offset') {
+      offset = parseInt(meta[2].trim(), 10) || 0;
+      continue;
+    }
+    let rest = line;
+    const times = [];
+    let match;
+    while ((match = rest.match(timeExp))) {
       const min = parseInt(match[1], 10);
       const sec = parseInt(match[2], 10);
-      const ms = match[3] ? parseInt(match[3].padEnd(3, '0'), 10) : 0;
-      const time = min * 60 * 1000 + sec * 1000 + ms;
-      const text = line.replace(timeExp, '').trim();
+      const ms = match[3] ? parseInt(match[3].padEnd(3, '0').slice(0, 3), 10) : 0;
+      times.push(min * 60 * 1000 + sec * 1000 + ms);
+      rest = rest.slice(match[0].length);
+    }
+    const text = rest.replace(wordExp, '').trim();
+    for (const time of times) {
       result.push({ time, text });
     }
   }
-  return result;
+  result.sort((a, b) => a.time - b.time);
+  return result.map(({ time, text }) => ({ time: Math.max(0, time - offset), text }));
 }